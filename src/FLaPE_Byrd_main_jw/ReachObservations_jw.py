@@ -9,13 +9,12 @@ from numpy import reshape,concatenate,zeros,ones,triu,empty,arctan,tan,pi,std,\
    mean,sqrt,var,cov,inf,polyfit,linspace,array,median,piecewise,nanmedian
 import numpy as np
 from scipy import stats,optimize
-import matplotlib.pyplot as plt
 import copy
 import warnings
 
 class ReachObservations:    
         
-    def __init__(self,D,RiverData,ConstrainHWSwitch=False,CalcAreaFitOpt=0,dAOpt=0,Verbose=False,σW=[]):
+    def __init__(self,D,RiverData,ConstrainHWSwitch=False,CalcAreaFitOpt=0,dAOpt=0,Verbose=False,σW=[],WarmStart=None):
         
         """  Initialize ReachObservation Ojbect. 
             Input Arguments:
@@ -24,9 +23,12 @@ class ReachObservations:
                     1 : use equal-spaced breakpoints; 
                     2 : optimize breakpoints & fits together
                     3 : optimize breakpoints, then optimize fits
+                    4 : search breakpoints among observed heights, then optimize fits
                 dAOpt= 
                     0 : use MetroMan style calculation; 
                     1 : use SWOT L2 style calculation
+                WarmStart= prior fit of reach 0 seeding the optimizers (see
+                    CalcAreaFit), or None
 
             Flow:
                 1. Assign data
@@ -44,6 +46,7 @@ class ReachObservations:
         self.CalcAreaFitOpt=CalcAreaFitOpt
         self.ConstrainHWSwitch=ConstrainHWSwitch
         self.Verbose=Verbose
+        self.WarmStart=WarmStart
 
         # 1 assign data from input dictionary
         self.h=copy.deepcopy(RiverData["h"])        
@@ -99,8 +102,12 @@ class ReachObservations:
              if self.Verbose:
                 print('SWOT-style area calculations')
              self.dA=empty( (self.D.nR,self.D.nt)   )
-             for t in range(self.D.nt):
-                 self.dA[0,t],what,hhat,dAUnc=area(self.h[0,t],self.w[0,t],self.area_fit)
+             ###################################################################
+             # JW EDITS: Compute areas of all overpasses at once (area_batch)
+             #for t in range(self.D.nt):
+             #    self.dA[0,t],what,hhat,dAUnc=area(self.h[0,t],self.w[0,t],self.area_fit)
+             self.dA[0,:],what,hhat,dAUnc=area_batch(self.h[0,:],self.w[0,:],self.area_fit)
+             ###################################################################
                  #if ConstrainHWSwitch and not np.isnan(hhat):
                  #    self.h[0,t]=hhat
                  #    self.w[0,t]=what
@@ -163,8 +170,17 @@ class ReachObservations:
             hhat=np.empty((1,self.D.nt))
             what=np.empty((1,self.D.nt))
 
-            for i in range(self.D.nt):
-                hhat[0,i],what[0,i]=self.MapPointToHypsometricCurve(self.hobs[i],self.wobs[i])
+################################################################################
+            # JW EDITS: Map all points at once (MapPointsToHypsometricCurve),
+            # reporting the number of points that did not map to a valid
+            # sub-domain instead of each point
+            #for i in range(self.D.nt):
+            #    hhat[0,i],what[0,i]=self.MapPointToHypsometricCurve(self.hobs[i],self.wobs[i])
+            hhat[0,:],what[0,:],self.n_unmapped=self.MapPointsToHypsometricCurve(self.hobs,self.wobs)
+
+            if self.n_unmapped > 0:
+                print(str(self.n_unmapped) + ' of ' + str(self.D.nt) + ' data points did not map to a valid sub-domain...')
+################################################################################
 
             if self.ConstrainHWSwitch:
                  self.h[0,:]=hhat[0,:]
@@ -229,6 +245,25 @@ class ReachObservations:
         return hhat,what
                     
             
+################################################################################
+    # JW EDITS: Array version of MapPointToHypsometricCurve
+    # Projects all points onto the three sub-domain fits at once (Fuller
+    # 1.3.17, as in MapPointToSubDomain) and keeps, for each point, the last
+    # sub-domain in which its projection is valid. Points without a valid
+    # sub-domain are mapped to the closest breakpoint as in the scalar version.
+    # Returns mapped heights and widths, and the number of points that did not
+    # map to a valid sub-domain.
+    def MapPointsToHypsometricCurve(self,h,w):
+
+        hb=self.area_fit['h_break'][:,0]
+        p0=self.area_fit['fit_coeffs'][1,:,0]  #intercepts
+        p1=self.area_fit['fit_coeffs'][0,:,0]  #slopes
+
+        hhat,what,unmapped=MapPointsToSubDomains(h,w,hb,p0,p1,self.sigh,self.sigw)
+
+        return hhat,what,int(unmapped.sum())
+################################################################################
+
     def MapPointToSubDomain(self,sd,hobs,wobs):
  
         p0=self.area_fit['fit_coeffs'][1,sd,0]  #intercept
@@ -244,53 +279,21 @@ class ReachObservations:
 
         return hhatsd,whatsd
 
+    ################################################################################
+    # JW EDITS: plotting helpers live in plots_jw, imported only when a plot is
+    # requested, so that matplotlib is not loaded by fits run without Verbose
     def plotHW(self,plottitle=[]):
+        from . import plots_jw
+        plots_jw.plotHW(self,plottitle)
 
-        #plt.style.use('tableau-colorblind10')
-
-        fig,ax = plt.subplots()
-        
-        if hasattr(self,'area_fit'):
-
-            for sd in range(3):
-                htest=linspace(self.area_fit['h_break'][sd],self.area_fit['h_break'][sd+1],10)
-                wtest=self.area_fit['fit_coeffs'][0,sd,0]*htest+self.area_fit['fit_coeffs'][1,sd,0]
-                #plt.plot(htest,wtest,color='C0')
-                plt.plot(htest,wtest,color='tab:orange')
-        
-        if self.ConstrainHWSwitch:
-            for i in range(self.D.nt):
-                ax.plot([self.hobs[i],self.h[0,i]],[self.wobs[i],self.w[0,i]],color='grey')
-            ax.scatter(self.hobs,self.wobs,marker='o')   
-            ax.scatter(self.h[0,:],self.w[0,:],marker='o')   
-        else: 
-            ax.scatter(self.h[0,:],self.w[0,:],marker='o')   
-
-
-        if bool(plottitle):
-            plt.title(plottitle)
-        plt.xlabel('WSE, m')
-        plt.ylabel('Width, m')      
-        plt.show() 
-        
     def plotdA(self):
-        fig,ax = plt.subplots()
-        ax.plot(self.D.t.T,self.dA[0,:])        
-            
-        plt.title('dA timeseries')
-        plt.xlabel('Time, days')
-        plt.ylabel('dA, m^2')      
-        plt.show()       
-        
+        from . import plots_jw
+        plots_jw.plotdA(self)
+
     def plotHdA(self):
-        fig,ax = plt.subplots()
-        
-        ax.scatter(self.h[0,:],self.dA[0,:],marker='o')   
-            
-        plt.title('dA vs WSE for first reach')
-        plt.xlabel('WSE, m')
-        plt.ylabel('dA, m')      
-        plt.show()         
+        from . import plots_jw
+        plots_jw.plotHdA(self)
+    ################################################################################
 
     def FitLOC(self,x,y):
         #references from Statistical Methods in Water Resources, by Helsel &
@@ -337,276 +340,519 @@ class ReachObservations:
 
     def CalcAreaFits(self,r=0):
 
-        warnings.filterwarnings("ignore", message="delta_grad == 0.0. Check if the approximated function is linear.")
-
-        # this computes the SWOT-like height-width fit
+        # r : reach ID
 
- 	# r : reach ID
-
-        # outer level parameter vector:
-        # po = Hb0,Hb1 i.e. WSE breakpoint 0, then WSE breakpoint 1
-        # inner level parameter vector:
-        # pi = p00, p01, p10, p11, p20,p21 i.e. p[domain 0][coefficient 0], p[domain 0][coefficient 1], p[domain 1][coefficient 0],...
+################################################################################
+        # JW EDITS: Fits are computed by CalcAreaFit, shared with
+        # ReachObservationsBatch
 
         #0 check uncertainties
         if self.sigw<0:
              self.sigw=10 
-        igoodh=np.logical_not(np.isnan(self.h[r,:]))
-        igoodw=np.logical_not(np.isnan(self.w[r,:]))
-        igoodhw=np.logical_and(igoodh,igoodw)
 
-        if not any(igoodhw):
-            print('No good data. Not computing height-width fits.')
+        self.fit_stats={}
+        fit=CalcAreaFit(self.h[r,:],self.w[r,:],self.sigh,self.sigw,self.CalcAreaFitOpt,self.Verbose,self.WarmStart,self.fit_stats)
+        if fit is None:
             return
 
-        #1 choose initial parameters for outer loop
+        self.area_fit,self.Hbp,self.HWparams,self.fit_method=fit
+################################################################################
 
-        WSEmin=min(self.h[r,igoodhw])
-        WSEmax=max(self.h[r,igoodhw])
-        WSErange=WSEmax-WSEmin
-        WSErange=WSEmax-WSEmin
-        init_params_outer=[WSEmin+WSErange/3, WSEmin+2*WSErange/3]
+        return 
 
-        #2 compute a solution where we set the breakpoints at 1/3 of the way through the domain
-        ReturnSolution=True
-        Jset,p_inner_set=SSE_outer(init_params_outer,self.h[r,igoodhw],self.w[r,igoodhw],ReturnSolution,self.sigh,self.sigw,self.Verbose)
+################################################################################
+# JW EDITS: ReachObservations for many reaches at once
+################################################################################
+class ReachObservationsBatch:
+
+    def __init__(self,h,w,offsets,sigh,sigw,ConstrainHWSwitch=False,CalcAreaFitOpt=3,dAOpt=1,Verbose=False,WarmStart=None):
+
+        """  Initialize ReachObservationsBatch Object, for many reaches given as
+             flat arrays. Results of each reach match those of a
+             ReachObservations object of that reach alone.
+            Input Arguments:
+                h, w = heights and widths of all reaches, one reach after the
+                    other
+                offsets = index in h and w of the first observation of each
+                    reach, followed by the total number of observations
+                sigh, sigw = height and width uncertainty standard deviations
+                CalcAreaFitOpt= as ReachObservations (> 0)
+                dAOpt= 
+                    1 : use SWOT L2 style calculation (only option)
+                WarmStart= list of the prior fit of each reach (or None),
+                    seeding the optimizers (see CalcAreaFit), or None
+
+            Attributes:
+                hobs, wobs = observed heights and widths (flat)
+                h, w = constrained heights and widths (flat)
+                dA = area change of each observation (flat, nan for reaches
+                    without fit)
+                area_fit, fit_method = fit of each reach (None if not fit)
+                error = exception raised by the fit of each reach (None if
+                    fit)
+                fit_stats = optimizer counts and objectives of each reach
+                    (see CalcAreaFit)
+                n_unmapped = number of points of each reach that did not map
+                    to a valid sub-domain
+
+            Flow:
+                1. Calc height-width fits of each reach
+                2. Constrain height-width data of all reaches at once
+                3. Calculate areas of all reaches at once
+        """
+
+        if CalcAreaFitOpt == 0 or dAOpt != 1:
+            print('ReachObservationsBatch needs CalcAreaFitOpt > 0 and dAOpt = 1')
+            print('Stopping ReachObservationsBatch init function...')
+            return
+
+        self.offsets=np.asarray(offsets)
+        self.nR=len(self.offsets)-1
+        self.CalcAreaFitOpt=CalcAreaFitOpt
+        self.ConstrainHWSwitch=ConstrainHWSwitch
+        self.Verbose=Verbose
+        self.sigh=sigh
+        self.sigw=sigw
+        if self.sigw<0:
+            self.sigw=10
+
+        self.hobs=np.array(h,dtype=float)
+        self.wobs=np.array(w,dtype=float)
+        self.h=copy.deepcopy(self.hobs)
+        self.w=copy.deepcopy(self.wobs)
+
+        # 1 calculate height-width fits of each reach
+        self.area_fit=[None]*self.nR
+        self.fit_method=[None]*self.nR
+        self.error=[None]*self.nR
+        self.fit_stats=[{} for r in range(self.nR)]
+        if WarmStart is None:
+            WarmStart=[None]*self.nR
+        for r in range(self.nR):
+            i0,i1=self.offsets[r],self.offsets[r+1]
+            try:
+                fit=CalcAreaFit(self.hobs[i0:i1],self.wobs[i0:i1],self.sigh,self.sigw,self.CalcAreaFitOpt,self.Verbose,WarmStart[r],self.fit_stats[r])
+            except Exception as e:
+                self.error[r]=e
+                continue
+            if fit is None:
+                self.error[r]=ValueError('No good data')
+                continue
+            self.area_fit[r]=fit[0]
+            self.fit_method[r]=fit[3]
+
+        # reach of each observation, and observations of reaches with fits
+        nobs=np.diff(self.offsets)
+        irch=np.repeat(np.arange(self.nR),nobs)
+        rok=np.array([x is not None for x in self.area_fit],dtype=bool)
+        iok=rok[irch]
+        irok=irch[iok]
+        ok_start=np.concatenate(([0],np.cumsum(nobs[rok])[:-1]))
+
+        # 2 constrain heights and widths to be self-consistent
+        hb,p0,p1=self.FitArrays(rok)
+
+        hhat,what,unmapped=MapPointsToSubDomains(self.hobs[iok],self.wobs[iok],hb[irok],p0[irok],p1[irok],self.sigh,self.sigw)
+
+        if self.ConstrainHWSwitch:
+            self.h[iok]=hhat
+            self.w[iok]=what
+
+        self.n_unmapped=np.bincount(irok[unmapped],minlength=self.nR)
+        for r in np.flatnonzero(self.n_unmapped):
+            print(str(self.n_unmapped[r]) + ' of ' + str(nobs[r]) + ' data points did not map to a valid sub-domain...')
+
+        # JW: Change to nanmin/nanmax to allow for nan values for fail to constrain pts
+        if rok.any():
+            hmin=np.fmin.reduceat(hhat,ok_start)
+            hmax=np.fmax.reduceat(hhat,ok_start)
+            for k,r in enumerate(np.flatnonzero(rok)):
+                self.area_fit[r]['h_break'][0]=hmin[k]
+                self.area_fit[r]['h_break'][3]=hmax[k]
+
+        # 3 calculate areas
+        hb,p0,p1=self.FitArrays(rok)
+        poly=np.stack((p1,p0),axis=2)
+        amf=np.zeros(self.nR)
+        fwv=np.zeros(self.nR)
+        fhv=np.zeros(self.nR)
+        low_snr=np.zeros(self.nR,dtype=bool)
+        for r in np.flatnonzero(rok):
+            area_fit=self.area_fit[r]
+            amf[r]=np.squeeze(area_fit['med_flow_area'])
+            fwv[r]=np.squeeze(area_fit['w_err_stdev'])**2
+            fhv[r]=np.squeeze(area_fit['h_err_stdev'])**2
+            low_snr[r]=(np.squeeze(area_fit['h_variance']) - fhv[r])/fhv[r] < 2
+
+        self.dA=np.full(len(self.hobs),np.nan)
+        self.dA[iok]=_area_points(self.h[iok],self.w[iok],hb[irok],poly[irok],amf[irok],fwv[irok],fhv[irok],low_snr[irok])[0]
+
+    def FitArrays(self,rok):
+        # breakpoints (nR,4), intercepts and slopes (nR,3) of reaches rok
+        hb=np.full((self.nR,4),np.nan)
+        p0=np.full((self.nR,3),np.nan)
+        p1=np.full((self.nR,3),np.nan)
+        for r in np.flatnonzero(rok):
+            hb[r]=self.area_fit[r]['h_break'][:,0]
+            p0[r]=self.area_fit[r]['fit_coeffs'][1,:,0]
+            p1[r]=self.area_fit[r]['fit_coeffs'][0,:,0]
+        return hb,p0,p1
+
+################################################################################
+# JW EDITS: Height-width fits of a single reach, moved out of
+# ReachObservations.CalcAreaFits so that they can be computed for each reach
+# of ReachObservationsBatch. h and w are the heights and widths of the reach.
+# Returns area_fit, breakpoints, fit parameters and fit method, or None if
+# there is no good data.
+#
+# WarmStart is an optional prior fit of the reach, a dictionary of its two
+# inner breakpoints ('h_break') and its inner parameters ('fit_coeffs',
+# [m0,b0,m1,b1,m2,b2]). The prior breakpoints seed the breakpoint optimizers
+# of options 2 and 3 and the prior parameters seed the inner solver, in place
+# of the 1/3-2/3 breakpoints and ChooseInitParamsInner. The set breakpoint fit
+# is still computed, as the fallback of the optimized fit.
+# Stats is an optional dictionary filled with 'warm' (whether the warm start
+# was used), 'outer_nfev' (evaluations of the breakpoint optimizer),
+# 'inner_nit' and 'inner_nfev' (iterations and evaluations of the inner
+# solver, summed over its calls), 'J_set', 'J_simple' and 'J' (objectives of
+# the set, optimized and kept fits, nan if not computed).
+################################################################################
+def CalcAreaFit(h,w,sigh,sigw,CalcAreaFitOpt,Verbose=False,WarmStart=None,Stats=None):
+
+    warnings.filterwarnings("ignore", message="delta_grad == 0.0. Check if the approximated function is linear.")
+
+    # this computes the SWOT-like height-width fit
+
+    # outer level parameter vector:
+    # po = Hb0,Hb1 i.e. WSE breakpoint 0, then WSE breakpoint 1
+    # inner level parameter vector:
+    # pi = p00, p01, p10, p11, p20,p21 i.e. p[domain 0][coefficient 0], p[domain 0][coefficient 1], p[domain 1][coefficient 0],...
+
+    #0 check uncertainties
+    if sigw<0:
+         sigw=10 
+    igoodh=np.logical_not(np.isnan(h))
+    igoodw=np.logical_not(np.isnan(w))
+    igoodhw=np.logical_and(igoodh,igoodw)
+
+    if not any(igoodhw):
+        print('No good data. Not computing height-width fits.')
+        return None
+
+    if Stats is None:
+        Stats={}
+    Stats.update(warm=False,outer_nfev=0,inner_nit=0,inner_nfev=0,J_set=np.nan,J_simple=np.nan,J=np.nan)
+
+    # JW EDITS: inner parameters of the warm start
+    p_warm=None
+    if WarmStart is not None and np.all(np.isfinite(WarmStart['fit_coeffs'])):
+        p_warm=np.asarray(WarmStart['fit_coeffs'],dtype=float)
+
+    #1 choose initial parameters for outer loop
+
+    WSEmin=min(h[igoodhw])
+    WSEmax=max(h[igoodhw])
+    WSErange=WSEmax-WSEmin
+    WSErange=WSEmax-WSEmin
+    init_params_outer=[WSEmin+WSErange/3, WSEmin+2*WSErange/3]
+
+    #2 compute a solution where we set the breakpoints at 1/3 of the way through the domain
+    ReturnSolution=True
+    Jset,p_inner_set=SSE_outer(init_params_outer,h[igoodhw],w[igoodhw],ReturnSolution,sigh,sigw,Verbose,p_warm,Stats)
+    Stats['J_set']=Jset
+    
+################################################################################
+    # JW EDITS: In some cases, initial fit is extremely poor or negative
+
+    # When slope terms of subregions > 10000 or negative,, instead use rectangular fit
+    if p_inner_set[0] > 10000 or p_inner_set[2] > 10000 or p_inner_set[4] > 10000 or\
+        p_inner_set[0] < 0 or p_inner_set[2] < 0 or p_inner_set[4] < 0: 
+        print('Implausible set fit. Implementing rectangular fit.')
         
+        # Find median of widths
+        med_width = np.nanmedian(w[igoodhw])
+        
+        # Set p_inner_set parameters to rectangular fit at median width
+        p_inner_set[0] = 0  # slope R1
+        p_inner_set[1] = med_width  # intercept R1
+        p_inner_set[2] = 0  # slope R2
+        p_inner_set[3] = med_width  # intercept R2
+        p_inner_set[4] = 0  # slope R3
+        p_inner_set[5] = med_width  # intercept R3
+        
+        # Enforce rectangular fit due to implausible set fit (Jset = -1)
+        Jset = -1
+        Jsimple = 0
+        # Set placeholder variables for p2
+        p2 = [0, 0, 0]
 ################################################################################
-        # JW EDITS: In some cases, initial fit is extremely poor or negative
+        
+    if Verbose:
+        print('height-width fit for set breakpoints')
+        plot3SDfit(h,w,p_inner_set,init_params_outer)
+
+    #3 optimize both inner and outer loop simultaneously
+
+    #3.1 parameter bounds
+    nparams_outer=len(init_params_outer)
+    lb=zeros(nparams_outer,)
+    ub=zeros(nparams_outer,)
+
+    lb[0]=WSEmin+WSErange*0.1
+    ub[0]=WSEmin+WSErange*0.9
+    lb[1]=WSEmin+WSErange*0.1
+    ub[1]=WSEmin+WSErange*0.9
+
+    param_bounds_outer=optimize.Bounds(lb,ub)
+
+    #3.1.1 JW EDITS: breakpoints of the warm start, if within the bounds
+    x0_outer=init_params_outer
+    if WarmStart is not None:
+        hb_warm=np.clip(np.asarray(WarmStart['h_break'],dtype=float),lb,ub)
+        if np.all(np.isfinite(hb_warm)) and hb_warm[0]<hb_warm[1]:
+            x0_outer=list(hb_warm)
+    Stats['warm']=p_warm is not None or x0_outer is not init_params_outer
+
+    #3.2 constrain breakpoints to be monotonic
+    A=array([[1,-1]])
+    constraint2=optimize.LinearConstraint(A,-inf,-0.1)    
+
+    #3.3 nested solution to three-subdomain fit
+    if CalcAreaFitOpt == 2:
+        #3.3.1 optimize breakpoints
+        ReturnSolution=False
+        res = optimize.minimize(fun=SSE_outer,
+                x0=x0_outer,
+                args=(h,w,ReturnSolution,sigh,sigw,Verbose,p_warm,Stats),
+                bounds=param_bounds_outer,
+                method='trust-constr',    
+                constraints=constraint2,
+                options={'disp':Verbose,'maxiter':1e3,'verbose':0})
+
+        params_outer_hat=res.x
+        Stats['outer_nfev']=res.nfev
+
+        #3.3.2 compute optimal fits for optimal breakpoints
+        ReturnSolution=True
+        [Jnest,params_inner_nest]=SSE_outer(params_outer_hat,h,w,ReturnSolution,sigh,sigw,Verbose,p_warm,Stats)
+        Stats['J_simple']=Jnest
+
+        # if Verbose:
+        #     print('height-width fit for nested optimization')
+        #     plot3SDfit(h,w,params_inner_nest,params_outer_hat)
+
+    #3.3.3 determine whether to use optimal breakpoint solution or equal-spaced breakpoints 
+    if CalcAreaFitOpt == 2  and(res.success or (Jnest<Jset)):
+         print('nested optimiztion sucess:',res.success)
+         print('nested objective:',Jnest)
+         print('set objective function:',Jset)
+         print('using nested solution')
+         Hbp=params_outer_hat
+         HWparams=params_inner_nest
+    else:
+         Hbp=init_params_outer
+         HWparams= p_inner_set
 
-        # When slope terms of subregions > 10000 or negative,, instead use rectangular fit
-        if p_inner_set[0] > 10000 or p_inner_set[2] > 10000 or p_inner_set[4] > 10000 or\
-            p_inner_set[0] < 0 or p_inner_set[2] < 0 or p_inner_set[4] < 0: 
-            print('Implausible set fit. Implementing rectangular fit.')
-            
-            # Find median of widths
-            med_width = np.nanmedian(self.w[r,igoodhw])
+    #3.4 compute simple optimal breakpoints, then compute fits
+    if CalcAreaFitOpt == 3:
+        
+        #3.4.1 optimize breakpoints 
+        def piecewise_linear2(x, x0, y0, x1, k1, k2, k3):
+            return piecewise(x, [x < x0, ((x>=x0)&(x<x1)), x>=x1], \
+                [lambda x:k1*x + y0-k1*x0, lambda x:k2*x + y0-k2*x0, lambda x:k3*x + k2*x1+y0-k2*x0-k3*x1])  
             
-            # Set p_inner_set parameters to rectangular fit at median width
-            p_inner_set[0] = 0  # slope R1
-            p_inner_set[1] = med_width  # intercept R1
-            p_inner_set[2] = 0  # slope R2
-            p_inner_set[3] = med_width  # intercept R2
-            p_inner_set[4] = 0  # slope R3
-            p_inner_set[5] = med_width  # intercept R3
+
+        # JW EDIT: In some cases, the maximum function evaluations is exceeded
+        # If rectangular fit imposed during set fit (Jset = -1), don't implement simple fit
+        if Jset != -1:
+
+            # JW EDITS: start from the warm start breakpoints and slopes
+            p0_curve=[init_params_outer[0],mean(w[igoodhw]),init_params_outer[1],0,0,0]
+            if x0_outer is not init_params_outer and p_warm is not None:
+                m_warm=np.maximum(p_warm[0::2],0)
+                p0_curve=[x0_outer[0],p_warm[0]*x0_outer[0]+p_warm[1],x0_outer[1],m_warm[0],m_warm[1],m_warm[2]]
+             
+            try:
+                p2 , e2 , info2 , msg2 , ier2 = optimize.curve_fit(piecewise_linear2, h[igoodhw], w[igoodhw],\
+                     bounds=([lb[0],-inf,lb[0],0,0,0],[ub[0],inf,ub[0],inf,inf,inf]),\
+                     p0=p0_curve,\
+                     maxfev=1000,full_output=True)
+                Stats['outer_nfev']=info2['nfev']
+                    
+                #this specifies the two WSE breakpoints
+                params_outer_hat=[p2[0],p2[2]]
+    
+                #3.4.2 compute parameters
+                ReturnSolution=True
+                Jsimple,p_inner_simple=SSE_outer(params_outer_hat,h[igoodhw],w[igoodhw],ReturnSolution,sigh,sigw,Verbose,p_warm,Stats)
+                Stats['J_simple']=Jsimple
+                       
+                # JW EDITS: In some cases, simple fit is extremely poor or negative
+                # When slope terms of subregions > 10,000 or negative, instead use set fit
+                if p_inner_simple[0] > 10000 or p_inner_simple[2] > 10000 or p_inner_simple[4] > 10000 or\
+                    p_inner_set[0] < 0 or p_inner_set[2] < 0 or p_inner_set[4] < 0: 
+                    print('Implausible simple fit. Implementing set fit')
+                    
+                    # Enforce set fit due to implausible simple fit (Jset = -2)
+                    Jset = -2
+                          
+            # JW EDITS: In some cases, simple fit is not close to observed points
+            # Check that observations are within reasonable distance of constrainted points
+                    
+            except RuntimeError as e:
+               print("Optimization failed, using set breakpoint fit.")
+               # Enforce set fit due to failed optimization (Jset = -3)
+               Jset = -3
+               Jsimple = -2
+               # Set placeholder variables for p2
+               p2 = [0, 0, 0]
             
-            # Enforce rectangular fit due to implausible set fit (Jset = -1)
-            Jset = -1
-            Jsimple = 0
-            # Set placeholder variables for p2
-            p2 = [0, 0, 0]
+
 ################################################################################
-            
-        if self.Verbose:
-            print('height-width fit for set breakpoints')
-            plot3SDfit(self.h[r,:],self.w[r,:],p_inner_set,init_params_outer)
-
-        #3 optimize both inner and outer loop simultaneously
-
-        #3.1 parameter bounds
-        nparams_outer=len(init_params_outer)
-        lb=zeros(nparams_outer,)
-        ub=zeros(nparams_outer,)
-
-        lb[0]=WSEmin+WSErange*0.1
-        ub[0]=WSEmin+WSErange*0.9
-        lb[1]=WSEmin+WSErange*0.1
-        ub[1]=WSEmin+WSErange*0.9
-
-        param_bounds_outer=optimize.Bounds(lb,ub)
-
-        #3.2 constrain breakpoints to be monotonic
-        A=array([[1,-1]])
-        constraint2=optimize.LinearConstraint(A,-inf,-0.1)    
-
-        #3.3 nested solution to three-subdomain fit
-        if self.CalcAreaFitOpt == 2:
-            #3.3.1 optimize breakpoints
-            ReturnSolution=False
-            res = optimize.minimize(fun=SSE_outer,
-                    x0=init_params_outer,
-                    args=(self.h[r,:],self.w[r,:],ReturnSolution,self.sigh,self.sigw,self.Verbose),
-                    bounds=param_bounds_outer,
-                    method='trust-constr',    
-                    constraints=constraint2,
-                    options={'disp':self.Verbose,'maxiter':1e3,'verbose':0})
-
-            params_outer_hat=res.x
-
-            #3.3.2 compute optimal fits for optimal breakpoints
-            ReturnSolution=True
-            [Jnest,params_inner_nest]=SSE_outer(params_outer_hat,self.h[r,:],self.w[r,:],ReturnSolution,self.sigh,self.sigw,self.Verbose)
-
-            # if self.Verbose:
-            #     print('height-width fit for nested optimization')
-            #     plot3SDfit(self.h[r,:],self.w[r,:],params_inner_nest,params_outer_hat)
-
-        #3.3.3 determine whether to use optimal breakpoint solution or equal-spaced breakpoints 
-        if self.CalcAreaFitOpt == 2  and(res.success or (Jnest<Jset)):
-             print('nested optimiztion sucess:',res.success)
-             print('nested objective:',Jnest)
-             print('set objective function:',Jset)
-             print('using nested solution')
-             self.Hbp=params_outer_hat
-             self.HWparams=params_inner_nest
-        else:
-             self.Hbp=init_params_outer
-             self.HWparams= p_inner_set
+    #3.5 JW EDITS: search every pair of observed heights, then compute fits
+    # Breakpoints are placed at observed heights within the same bounds as
+    # option 3, and the pair with the lowest least-squares misfit of the
+    # piecewise-linear model of option 3 is kept (SearchBreakpoints)
+    if CalcAreaFitOpt == 4:
 
-        #3.4 compute simple optimal breakpoints, then compute fits
-        if self.CalcAreaFitOpt == 3:
-            
-            #3.4.1 optimize breakpoints 
-            def piecewise_linear2(x, x0, y0, x1, k1, k2, k3):
-                return piecewise(x, [x < x0, ((x>=x0)&(x<x1)), x>=x1], \
-                    [lambda x:k1*x + y0-k1*x0, lambda x:k2*x + y0-k2*x0, lambda x:k3*x + k2*x1+y0-k2*x0-k3*x1])  
-                
+        # If rectangular fit imposed during set fit (Jset = -1), don't implement simple fit
+        if Jset != -1:
 
-            # JW EDIT: In some cases, the maximum function evaluations is exceeded
-            # If rectangular fit imposed during set fit (Jset = -1), don't implement simple fit
-            if Jset != -1:
-                 
-                try:
-                    p2 , e2 = optimize.curve_fit(piecewise_linear2, self.h[r,igoodhw], self.w[r,igoodhw],\
-                         bounds=([lb[0],-inf,lb[0],0,0,0],[ub[0],inf,ub[0],inf,inf,inf]),\
-                         p0=[init_params_outer[0],mean(self.w[r,igoodhw]),init_params_outer[1],0,0,0],\
-                         maxfev=1000)
-                        
-                    #this specifies the two WSE breakpoints
-                    params_outer_hat=[p2[0],p2[2]]
-        
-                    #3.4.2 compute parameters
-                    ReturnSolution=True
-                    Jsimple,p_inner_simple=SSE_outer(params_outer_hat,self.h[r,igoodhw],self.w[r,igoodhw],ReturnSolution,self.sigh,self.sigw,self.Verbose)
-                           
-                    # JW EDITS: In some cases, simple fit is extremely poor or negative
-                    # When slope terms of subregions > 10,000 or negative, instead use set fit
-                    if p_inner_simple[0] > 10000 or p_inner_simple[2] > 10000 or p_inner_simple[4] > 10000 or\
-                        p_inner_set[0] < 0 or p_inner_set[2] < 0 or p_inner_set[4] < 0: 
-                        print('Implausible simple fit. Implementing set fit')
-                        
-                        # Enforce set fit due to implausible simple fit (Jset = -2)
-                        Jset = -2
-                              
-                # JW EDITS: In some cases, simple fit is not close to observed points
-                # Check that observations are within reasonable distance of constrainted points
-                        
-                except RuntimeError as e:
-                   print("Optimization failed, using set breakpoint fit.")
-                   # Enforce set fit due to failed optimization (Jset = -3)
-                   Jset = -3
-                   Jsimple = -2
-                   # Set placeholder variables for p2
-                   p2 = [0, 0, 0]
-                
+            params_outer_hat=SearchBreakpoints(h[igoodhw],w[igoodhw],lb[0],ub[0])
+
+            if params_outer_hat is None:
+                print("Too few heights within breakpoint bounds, using set breakpoint fit.")
+                # Enforce set fit due to failed search (Jset = -3)
+                Jset = -3
+                Jsimple = -2
+                # Set placeholder variables for p2
+                p2 = [0, 0, 0]
+
+            else:
+                # Placeholder matching the curve_fit parameters of option 3
+                p2 = [params_outer_hat[0], 0, params_outer_hat[1]]
+
+                ReturnSolution=True
+                Jsimple,p_inner_simple=SSE_outer(params_outer_hat,h[igoodhw],w[igoodhw],ReturnSolution,sigh,sigw,Verbose,p_warm,Stats)
+                Stats['J_simple']=Jsimple
+
+                # When slope terms of subregions > 10,000, instead use set fit
+                if p_inner_simple[0] > 10000 or p_inner_simple[2] > 10000 or p_inner_simple[4] > 10000:
+                    print('Implausible simple fit. Implementing set fit')
+
+                    # Enforce set fit due to implausible simple fit (Jset = -2)
+                    Jset = -2
+################################################################################
 
-             # if self.Verbose:
-             #     print('height-width fit for simple optimized breakpoints')
-             #     plot3SDfit(self.h[r,:],self.w[r,:],p_inner_simple,params_outer_hat)
+         # if Verbose:
+         #     print('height-width fit for simple optimized breakpoints')
+         #     plot3SDfit(h,w,p_inner_simple,params_outer_hat)
  
-             #3.4.3 determine whether to use optimal breakpoint solution or equal-spaced breakpoints 
-             #if self.Verbose:
-                  #print('simple objective:',Jsimple)
-                  #print('set objective function:',Jset)
-             # if  Jsimple<Jset or p2[0]>p2[2]:
-                     
-             #      if self.Verbose:
-             #           if p2[0]>p2[2]:
-             #                print('p2[0]>p2[2]. p2[0]=',p2[0],'p2[2]=',p2[2])
-             #           print('using simple solution')
-             #      if p2[0]>p2[2]:
-             #           print('p2[0]>p2[2]. p2[0]=',p2[0],'p2[2]=',p2[2])
-
-             #      self.Hbp=params_outer_hat
-             #      self.HWparams=p_inner_simple
-             # else:
-             #      if self.Verbose:
-             #           print('using set breakpoints ')
-                                        
-             #      self.Hbp=init_params_outer
-             #      self.HWparams= p_inner_set
+         #3.4.3 determine whether to use optimal breakpoint solution or equal-spaced breakpoints 
+         #if Verbose:
+              #print('simple objective:',Jsimple)
+              #print('set objective function:',Jset)
+         # if  Jsimple<Jset or p2[0]>p2[2]:
+                 
+         #      if Verbose:
+         #           if p2[0]>p2[2]:
+         #                print('p2[0]>p2[2]. p2[0]=',p2[0],'p2[2]=',p2[2])
+         #           print('using simple solution')
+         #      if p2[0]>p2[2]:
+         #           print('p2[0]>p2[2]. p2[0]=',p2[0],'p2[2]=',p2[2])
+
+         #      Hbp=params_outer_hat
+         #      HWparams=p_inner_simple
+         # else:
+         #      if Verbose:
+         #           print('using set breakpoints ')
+                                    
+         #      Hbp=init_params_outer
+         #      HWparams= p_inner_set
 
 ################################################################################                
-        # JW EDITS: Fix inequality to ensure correct fit is used
-        if  Jset<Jsimple or p2[0]>p2[2]:
-               
-            if self.Verbose:
-                  if p2[0]>p2[2]:
-                      print('p2[0]>p2[2]. p2[0]=',p2[0],'p2[2]=',p2[2])
-                  print('using set breakpoint fit')
-            self.Hbp=init_params_outer
-            self.HWparams= p_inner_set
-            self.fit_method = 'set'
+    # JW EDITS: Fix inequality to ensure correct fit is used
+    if  Jset<Jsimple or p2[0]>p2[2]:
+           
+        if Verbose:
+              if p2[0]>p2[2]:
+                  print('p2[0]>p2[2]. p2[0]=',p2[0],'p2[2]=',p2[2])
+              print('using set breakpoint fit')
+        Hbp=init_params_outer
+        HWparams= p_inner_set
+        fit_method = 'set'
 
-        else:
-            if self.Verbose:
-                print('using simple solution ')
-                                 
-            self.Hbp=params_outer_hat
-            self.HWparams=p_inner_simple
-            self.fit_method = 'simple'
-            
-        if Jset == -1:
-            self.fit_method = 'rectangular'
+    else:
+        if Verbose:
+            print('using simple solution ')
+                             
+        Hbp=params_outer_hat
+        HWparams=p_inner_simple
+        fit_method = 'simple'
+        
+    if Jset == -1:
+        fit_method = 'rectangular'
+    elif fit_method == 'set':
+        Stats['J']=Stats['J_set']
+    else:
+        Stats['J']=Stats['J_simple']
 ################################################################################      
 
-        #4 pack up fit parameter data matching swot-format 
-        #4.0 initialize
-        area_fit={}
-        #4.1 set the dataset stats
-        area_fit['h_variance']=array(var(self.h[r,igoodhw]))
-        area_fit['w_variance']=array(var(self.w[r,igoodhw]))
-        hwcov=cov(self.w[r,igoodhw],self.h[r,igoodhw])
-        area_fit['hw_covariance']=hwcov[0,1]
-        area_fit['med_flow_area']=array(0.) #this value estimated as described below 
-        area_fit['h_err_stdev']=array(self.sigh)
-        area_fit['w_err_stdev']=array(self.sigw)
-        area_fit['h_w_nobs']=array(self.D.nt)
-
-        #4.2 set fit_coeffs aka parameters aka coefficients - translate to SWOT L2 style format
-        # pi = p00, p01, p10, p11, p20,p21 i.e. p[domain 0][coefficient 0], p[domain 0][coefficient 1], p[domain 1][coefficient 0],...
-        nsd=3
-        ncoef=2
-        area_fit['fit_coeffs']=zeros((ncoef,nsd,1))
-        for sd in range(nsd):
-            for coef in range(ncoef):
-                param_indx=sd*ncoef+coef
-                area_fit['fit_coeffs'][coef,sd] = self.HWparams[param_indx]
-
-        #4.3 set h_break
-        area_fit['h_break']=zeros((4,1))
+    #4 pack up fit parameter data matching swot-format 
+    #4.0 initialize
+    area_fit={}
+    #4.1 set the dataset stats
+    area_fit['h_variance']=array(var(h[igoodhw]))
+    area_fit['w_variance']=array(var(w[igoodhw]))
+    hwcov=cov(w[igoodhw],h[igoodhw])
+    area_fit['hw_covariance']=hwcov[0,1]
+    area_fit['med_flow_area']=array(0.) #this value estimated as described below 
+    area_fit['h_err_stdev']=array(sigh)
+    area_fit['w_err_stdev']=array(sigw)
+    area_fit['h_w_nobs']=array(len(h))
+
+    #4.2 set fit_coeffs aka parameters aka coefficients - translate to SWOT L2 style format
+    # pi = p00, p01, p10, p11, p20,p21 i.e. p[domain 0][coefficient 0], p[domain 0][coefficient 1], p[domain 1][coefficient 0],...
+    nsd=3
+    ncoef=2
+    area_fit['fit_coeffs']=zeros((ncoef,nsd,1))
+    for sd in range(nsd):
+        for coef in range(ncoef):
+            param_indx=sd*ncoef+coef
+            area_fit['fit_coeffs'][coef,sd] = HWparams[param_indx]
+
+    #4.3 set h_break
+    area_fit['h_break']=zeros((4,1))
 ################################################################################
-        # JW: Change to nanmin to allow for nan values for fail to constrain pts1
-        area_fit['h_break'][0]=np.nanmin(self.h[r,:])  
+    # JW: Change to nanmin to allow for nan values for fail to constrain pts1
+    area_fit['h_break'][0]=np.nanmin(h)  
 ################################################################################        
-        area_fit['h_break'][1]=self.Hbp[0]
-        area_fit['h_break'][2]=self.Hbp[1]
+    area_fit['h_break'][1]=Hbp[0]
+    area_fit['h_break'][2]=Hbp[1]
 ################################################################################             
-        # JW: Change to nanmax to allow for nan values for fail to constrain pts
-        area_fit['h_break'][3]=np.nanmax(self.h[r,:])
+    # JW: Change to nanmax to allow for nan values for fail to constrain pts
+    area_fit['h_break'][3]=np.nanmax(h)
 ################################################################################     
 
-        #4.4 set w_break... though i do not think this get used so just initializing for now
-        area_fit['w_break']=zeros((4,1))
+    #4.4 set w_break... though i do not think this get used so just initializing for now
+    area_fit['w_break']=zeros((4,1))
 
-        #4.5 calculate cross-sectional area at median value of H
-        # a bit confusing, but we are centering the dA on the median H. so to get a dA value that
-        # coresponds to Hbar, we set dA_hbar to zero, then evaluate the area fit at a value of 
-        # Hbar. That returns the area value at median H that we use going forward
-        Hbar=nanmedian(self.h[r,:])
-        wbar=nanmedian(self.w[r,:])
+    #4.5 calculate cross-sectional area at median value of H
+    # a bit confusing, but we are centering the dA on the median H. so to get a dA value that
+    # coresponds to Hbar, we set dA_hbar to zero, then evaluate the area fit at a value of 
+    # Hbar. That returns the area value at median H that we use going forward
+    Hbar=nanmedian(h)
+    wbar=nanmedian(w)
 
-        dA_Hbar,hhat,what,dAunc=area(Hbar, wbar, area_fit)
+    dA_Hbar,hhat,what,dAunc=area(Hbar, wbar, area_fit)
 
-        area_fit['med_flow_area']=dA_Hbar
+    area_fit['med_flow_area']=dA_Hbar
 
-        #4.6 save fit data
-        self.area_fit=area_fit
+    #4.6 save fit data
+    #if Verbose:
+        #print('area fit parameters=',area_fit)
 
-        #if self.Verbose:
-            #print('area fit parameters=',self.area_fit)
-
-        return 
+    return area_fit,Hbp,HWparams,fit_method
 
 def ChooseInitParamsInner(h,w):
     #function to choose initial parameters describing SWOT-like height-width fit
@@ -660,10 +906,51 @@ def SetInnerParamBounds(nparams):
     
     return lb,ub
 
+################################################################################
+# JW EDITS: Solver of the inner (height-width fit) problem of SSE_outer
+#   'reference'         : original scipy trust-constr solve of all six
+#                         parameters, which reproduces the published fits
+#   'trust-constr-sums' : trust-constr solve of all six parameters, with the
+#                         objective, gradient and Hessian evaluated from
+#                         subdomain sums (SSE_inner_sums)
+#   'profile'           : closed-form solve of the intercepts within an
+#                         L-BFGS-B solve of the slopes (SolveInnerProfile)
+InnerSolver='reference'
+################################################################################
+
 # define outer objective function, with inner objective function nested within
-def SSE_outer(param_outer,h,w,ReturnSolution,sigh,sigw,Verbose):
+# JW EDITS: InitParamsInner optionally replaces the initial inner parameters of
+# ChooseInitParamsInner (warm start), and iterations and evaluations of the
+# inner solver are added to Stats, if given
+def SSE_outer(param_outer,h,w,ReturnSolution,sigh,sigw,Verbose,InitParamsInner=None,Stats=None):
     
+    ############################################################################
+    # JW EDITS: Leave observations with missing widths out of the profile and
+    # sums solvers, whose objective and initial parameters would otherwise be
+    # NaN. The reference solver keeps them, as in the published fits
+    if InnerSolver != 'reference':
+        igoodw=np.isfinite(w)
+        if not igoodw.all():
+            h=h[igoodw]
+            w=w[igoodw]
+    ############################################################################
+
     [init_params_inner,nparams_inner]=ChooseInitParamsInner(h,w)
+    if InitParamsInner is not None:
+        init_params_inner=list(InitParamsInner)
+
+    ############################################################################
+    # JW EDITS: Use profile solver of the inner problem. Falls back to the
+    # reference solver if the subdomain sums are not finite (e.g. missing
+    # widths)
+    if InnerSolver == 'profile':
+        sol=SolveInnerProfile(init_params_inner,param_outer,h,w,sigh,sigw,Stats)
+        if sol is not None:
+            if ReturnSolution:
+                return sol
+            else:
+                return sol[0]
+    ############################################################################
     
     [lb,ub]=SetInnerParamBounds(nparams_inner)
 
@@ -692,43 +979,343 @@ def SSE_outer(param_outer,h,w,ReturnSolution,sigh,sigw,Verbose):
         
     constraints=[constraint0,constraint1]    
 
+    args=(param_outer,h,w,sigh,sigw)
+    jac=None
+    hess=None
+
+    ############################################################################
+    # JW EDITS: Use objective of subdomain sums. The breakpoints are fixed
+    # within the inner solve, so the subdomain masks and sums are computed once
+    # here, and the objective and its analytic gradient and Hessian are
+    # evaluated from the sums (SSE_inner_sums). The continuity constraints are
+    # linear.
+    if InnerSolver == 'trust-constr-sums':
+        h0=param_outer[0]
+        w0=np.mean(w)
+        S=InnerSums(param_outer,h,w,h0,w0)
+
+        def SSE_inner(inner_params,S,h0,w0,sigh,sigw):
+            return SSE_inner_sums(inner_params,S,h0,w0,sigh,sigw)[0]
+        def jac(inner_params,S,h0,w0,sigh,sigw):
+            return SSE_inner_sums(inner_params,S,h0,w0,sigh,sigw)[1]
+        def hess(inner_params,S,h0,w0,sigh,sigw):
+            return SSE_inner_sums(inner_params,S,h0,w0,sigh,sigw)[2]
+
+        #these constraints require the fits to be continuous at the breakpoints
+        A=array([[param_outer[0],1,-param_outer[0],-1,0,0],
+                 [0,0,param_outer[1],1,-param_outer[1],-1]])
+        constraints=[optimize.LinearConstraint(A,0,0)]
+        args=(S,h0,w0,sigh,sigw)
+    ############################################################################
+
     ShowDetailedOutput=Verbose
     if not ReturnSolution:
         ShowDetailedOutput=False
 
     res = optimize.minimize(fun=SSE_inner,
                     x0=init_params_inner,
-                    args=(param_outer,h,w,sigh,sigw),
+                    args=args,
+                    jac=jac,
+                    hess=hess,
                     bounds=param_bounds_inner,
                     method='trust-constr',
                     constraints=constraints,
                     #options={'disp':ShowDetailedOutput,'maxiter':1e3,'verbose':0})    
                     options={'disp':False,'maxiter':1e3,'verbose':0})    
 
+    if Stats is not None:
+        Stats['inner_nit']=Stats.get('inner_nit',0)+res.nit
+        Stats['inner_nfev']=Stats.get('inner_nfev',0)+res.nfev
+
     if ReturnSolution:    
         return res.fun,res.x
     else:
         return res.fun
     
 
-def plot3SDfit(h,w,params_inner,params_outer):
-    fig,ax = plt.subplots()
-    ax.scatter(h,w,marker='o')
-    plt.title('WSE vs width ')
-    plt.xlabel('WSE, m')
-    plt.ylabel('Width, m')
+################################################################################
+# JW EDITS: Profile solver of the inner problem of SSE_outer
+#
+# The two continuity constraints are linear in the inner parameters, so the
+# intercepts of subdomains 1 and 2 follow from the intercept of subdomain 0
+# and the slopes:
+#   b1 = b0 + (m0-m1)*xb0,  b2 = b1 + (m1-m2)*xb1
+# For fixed slopes, the objective is then a weighted least-squares problem in
+# b0 alone, solved in closed form. The remaining objective of the three slopes
+# is minimized with L-BFGS-B under the bounds m >= 0, using its analytic
+# gradient. Every term only needs six sums of each subdomain, so the
+# observations are read once per call of SSE_outer.
+def InnerSums(param_outer,h,w,h0,w0):
+    #sums n, sum(h), sum(w), sum(h^2), sum(h*w), sum(w^2) of each subdomain,
+    #with heights and widths centered at h0 and w0 to limit round-off
+    hc=h-h0
+    wc=w-w0
+    masks=[h<param_outer[0], (h>=param_outer[0]) & (h<param_outer[1]), h>=param_outer[1]]
+    S=np.empty((6,3))
+    for k,ik in enumerate(masks):
+        hk=hc[ik]
+        wk=wc[ik]
+        S[:,k]=[len(hk),hk.sum(),wk.sum(),hk@hk,hk@wk,wk@wk]
+    return S
+
+def SSE_inner_sums(p,S,h0,w0,sigh,sigw):
+    #objective (1.3.20 in Fuller), gradient and Hessian of the inner
+    #parameters p=[m0,b0,m1,b1,m2,b2], for subdomain sums S centered at h0, w0
+    n,Sh,Sw,Shh,Shw,Sww=S
+    m=np.asarray(p[0::2],dtype=float)
+    B=np.asarray(p[1::2],dtype=float)+m*h0-w0
+
+    #weights of each subdomain and their derivatives
+    a=1/(sigw**2+m**2*sigh**2)
+    da=-2*m*sigh**2*a**2
+    dda=-2*sigh**2*a**2+8*sigh**4*m**2*a**3
+
+    #sum of squared residuals of each subdomain and its derivatives
+    Q=m**2*Shh+2*m*B*Sh-2*m*Shw+n*B**2-2*B*Sw+Sww
+    Qm=2*(m*Shh+B*Sh-Shw)
+    QB=2*(m*Sh+n*B-Sw)
+
+    J=np.sum(a*Q)
+
+    #derivatives with respect to slope and centered intercept
+    Jm=da*Q+a*Qm
+    JB=a*QB
+    Jmm=dda*Q+2*da*Qm+2*a*Shh
+    JmB=da*QB+2*a*Sh
+    JBB=2*a*n
+
+    #back to uncentered intercepts, for which dB/dm = h0
+    g=np.empty(6)
+    g[0::2]=Jm+h0*JB
+    g[1::2]=JB
+    H=np.zeros((6,6))
+    for k in range(3):
+        i=2*k
+        H[i,i]=Jmm[k]+2*h0*JmB[k]+h0**2*JBB[k]
+        H[i,i+1]=H[i+1,i]=JmB[k]+h0*JBB[k]
+        H[i+1,i+1]=JBB[k]
+
+    return J,g,H
+
+def SSE_profile(m,S,xc,sigh,sigw,ReturnIntercept=False):
+    #objective and gradient of the slopes m, at the optimal intercept b0, for
+    #subdomain sums S and centered breakpoints xc
+    n,Sh,Sw,Shh,Shw,Sww=S
+
+    #offsets of the intercepts from b0, and their derivatives with respect to m
+    c=np.array([0,(m[0]-m[1])*xc[0],(m[0]-m[1])*xc[0]+(m[1]-m[2])*xc[1]])
+    dc=np.array([[0,0,0],
+                 [xc[0],-xc[0],0],
+                 [xc[0],xc[1]-xc[0],-xc[1]]])
+
+    #weights of each subdomain (1.3.20 in Fuller)
+    a=1/(sigw**2+m**2*sigh**2)
+    da=-2*m*sigh**2*a**2
+
+    #optimal intercept
+    b0=np.sum(a*(Sw-m*Sh-n*c))/np.sum(a*n)
+    B=b0+c
+
+    #sum of squared residuals, and its derivatives, of each subdomain
+    Q=m**2*Shh+2*m*B*Sh-2*m*Shw+n*B**2-2*B*Sw+Sww
+    dQm=2*(m*Shh+B*Sh-Shw)
+    dQB=2*(m*Sh+n*B-Sw)
+
+    J=np.sum(a*Q)
+    #b0 is optimal, so its own change does not add to the gradient
+    g=da*Q+a*dQm+dc.T@(a*dQB)
+
+    if ReturnIntercept:
+        return J,g,B
+    return J,g
+
+def SolveInnerProfile(init_params_inner,param_outer,h,w,sigh,sigw,Stats=None):
+    #returns objective and inner parameters [m0,b0,m1,b1,m2,b2], or None if
+    #the subdomain sums are not finite. Iterations and evaluations are added
+    #to Stats, if given
+    h0=param_outer[0]
+    w0=np.mean(w)
+    S=InnerSums(param_outer,h,w,h0,w0)
+    if not np.all(np.isfinite(S)) or S[0].sum()==0:
+        return None
+
+    xc=np.array([0,param_outer[1]-h0])
+
+    m_init=np.maximum(np.array(init_params_inner[0::2],dtype=float),0)
+    res=optimize.minimize(fun=SSE_profile,
+                    x0=m_init,
+                    args=(S,xc,sigh,sigw),
+                    jac=True,
+                    bounds=[(0,inf)]*3,
+                    method='L-BFGS-B',
+                    options={'ftol':1e-14,'gtol':1e-10,'maxiter':1000})
+
+    if Stats is not None:
+        Stats['inner_nit']=Stats.get('inner_nit',0)+res.nit
+        Stats['inner_nfev']=Stats.get('inner_nfev',0)+res.nfev
+
+    m=res.x
+    J,g,B=SSE_profile(m,S,xc,sigh,sigw,ReturnIntercept=True)
+
+    #intercepts in uncentered heights and widths
+    b=B+w0-m*h0
+
+    return J,array([m[0],b[0],m[1],b[1],m[2],b[2]])
+################################################################################
 
-    htest0=linspace(min(h),params_outer[0],10 )
-    wtest0=params_inner[0]*htest0+params_inner[1]
-    htest1=linspace(params_outer[0],params_outer[1],10)
-    wtest1= params_inner[2]*htest1+params_inner[3]
-    htest2=linspace(params_outer[1],max(h),10)
-    wtest2= params_inner[4]*htest2+params_inner[5]
+################################################################################
+# JW EDITS: Map points onto the hypsometric curves of their reaches
+# h and w are arrays of points. hb (breakpoints, 4 per point), p0 and p1
+# (intercepts and slopes, 3 per point) hold the fit of each point's reach, or
+# a single fit shared by all points. Returns mapped heights and widths, and a
+# mask of points that did not map to a valid sub-domain. See
+# ReachObservations.MapPointsToHypsometricCurve.
+def MapPointsToSubDomains(h,w,hb,p0,p1,sigh,sigw):
+
+    h=np.asarray(h,dtype=float)[:,None]
+    w=np.asarray(w,dtype=float)[:,None]
+    hb=np.broadcast_to(hb,(len(h),4))
+    p0=np.broadcast_to(p0,(len(h),3))
+    p1=np.broadcast_to(p1,(len(h),3))
+
+    # use Fuller 1.3.17 for each sub-domain (columns)
+    vhat=w-p0-p1*h
+    suv=-p1*sigh**2 #could add a rho term here
+    svv=sigw**2 + p1**2 * sigh**2 #could add a rho term here
+
+    hhatsd=h-suv/svv*vhat
+    whatsd=p0+p1*hhatsd
+
+    # valid sub-domains, including extrapolation below and above the fit
+    valid=np.zeros(hhatsd.shape,dtype=bool)
+    for sd in range(3):
+        valid[:,sd]=(hhatsd[:,sd] >= hb[:,sd]) & (hhatsd[:,sd] < hb[:,sd+1])
+    valid[:,0]|=hhatsd[:,0] < hb[:,0]
+    valid[:,2]|=hhatsd[:,2] > hb[:,2]
+
+    # keep the last valid sub-domain
+    anyvalid=valid.any(axis=1)
+    sdvalid=2-np.argmax(valid[:,::-1],axis=1)
+    ipt=np.arange(len(h))
+    hhat=hhatsd[ipt,sdvalid]
+    what=whatsd[ipt,sdvalid]
+
+    # map remaining points to the closest breakpoint, using the fit of the
+    # final sub-domain beyond the last breakpoint
+    unmapped=~anyvalid
+    if unmapped.any():
+        hbu=hb[unmapped]
+        iu=np.arange(len(hbu))
+        close_break=np.argmin(np.abs(hbu-h[unmapped]),axis=1)
+        sd=np.minimum(close_break,2)
+        hhat[unmapped]=hbu[iu,close_break]
+        what[unmapped]=p0[unmapped][iu,sd] + p1[unmapped][iu,sd] * hhat[unmapped]
+
+    return hhat,what,unmapped
+################################################################################
 
-    plt.plot(htest0,wtest0,htest1,wtest1,htest2,wtest2)
+################################################################################
+# JW EDITS: Breakpoint search over observed heights (CalcAreaFitOpt=4)
+#
+# Chooses breakpoints of the continuous piecewise-linear model fit by
+# curve_fit in option 3, w = b + m0*min(h,x0) + m1*(min(h,x1)-x0)+
+# + m2*(h-x1)+ with slopes m >= 0, by trying every pair of observed heights
+# x0 < x1 within [lb,ub] as breakpoints. Only observed heights are candidates:
+# the misfit of the model also varies continuously with breakpoints placed
+# between observed heights, so the pair returned is the best pair of observed
+# heights, not necessarily the best breakpoints of the model. Heights are
+# sorted once, so that the sums of each subdomain of a pair follow from prefix
+# sums, and the normal equations of the pair are built in O(1). The slope
+# bounds are enforced by solving with every subset of slopes fixed at zero and
+# keeping the best solution with nonnegative slopes, which is the exact bounded
+# least-squares solution at the given breakpoints. Returns the pair of observed heights
+# [x0,x1] with the lowest sum of squared residuals (the first pair if tied),
+# or None if fewer than two heights are within the bounds.
+def SearchBreakpoints(h,w,lb,ub):
+
+    isort=np.argsort(h,kind='stable')
+    hs=h[isort]
+
+    #candidate breakpoints and their index in the sorted heights
+    xcand=np.unique(hs[(hs>=lb) & (hs<=ub)])
+    if len(xcand)<2:
+        return None
+    icand=np.searchsorted(hs,xcand,side='left')
+
+    #prefix sums of heights and widths, centered to limit round-off
+    href=np.median(hs)
+    wref=np.mean(w)
+    hc=hs-href
+    wc=w[isort]-wref
+    P=np.zeros((5,len(hs)+1))
+    P[:,1:]=np.cumsum([np.ones(len(hs)),hc,hc**2,wc,hc*wc],axis=1)
+    Sww=np.sum(wc**2)
+
+    #every pair of candidates x0 < x1
+    j0,j1=np.triu_indices(len(xcand),k=1)
+    x0=xcand[j0]-href
+    x1=xcand[j1]-href
+    i0=icand[j0]
+    i1=icand[j1]
+
+    #sums n, sum(h), sum(h^2), sum(w), sum(h*w) of each subdomain
+    S0=P[:,i0]
+    S1=P[:,i1]-P[:,i0]
+    S2=P[:,-1][:,None]-P[:,i1]
+
+    #normal equations M p = r of p = [b, m0, m1, m2]. Rows of the design
+    #matrix are [1, h, 0, 0] in subdomain 0, [1, x0, h-x0, 0] in subdomain 1
+    #and [1, x0, x1-x0, h-x1] in subdomain 2
+    n1,Sh1,Shh1,Sw1,Shw1=S1
+    Su1=Sh1-n1*x0
+    Suu1=Shh1-2*x0*Sh1+n1*x0**2
+    Suw1=Shw1-x0*Sw1
+    n2,Sh2,Shh2,Sw2,Shw2=S2
+    d=x1-x0
+    Sv2=Sh2-n2*x1
+    Svv2=Shh2-2*x1*Sh2+n2*x1**2
+    Svw2=Shw2-x1*Sw2
+
+    npair=len(x0)
+    M=np.zeros((npair,4,4))
+    M[:,0,0]=S0[0]+n1+n2
+    M[:,0,1]=S0[1]+(n1+n2)*x0
+    M[:,0,2]=Su1+n2*d
+    M[:,0,3]=Sv2
+    M[:,1,1]=S0[2]+(n1+n2)*x0**2
+    M[:,1,2]=x0*(Su1+n2*d)
+    M[:,1,3]=x0*Sv2
+    M[:,2,2]=Suu1+n2*d**2
+    M[:,2,3]=d*Sv2
+    M[:,3,3]=Svv2
+    M=M+np.triu(M,1).transpose(0,2,1)
+
+    r=np.zeros((npair,4))
+    r[:,0]=S0[3]+Sw1+Sw2
+    r[:,1]=S0[4]+x0*(Sw1+Sw2)
+    r[:,2]=Suw1+d*Sw2
+    r[:,3]=Svw2
+
+    #solve with every subset of slopes fixed at zero, keeping the best
+    #solution with nonnegative slopes
+    SSE=np.full(npair,inf)
+    for k in range(8):
+        free=array([1,k&1,(k>>1)&1,(k>>2)&1],dtype=float)
+        Mk=M*np.outer(free,free)+np.diag(1-free)
+        p=np.einsum('pij,pj->pi',np.linalg.pinv(Mk,hermitian=True),r*free)
+        SSEk=Sww-2*np.sum(p*r,axis=1)+np.einsum('pi,pij,pj->p',p,M,p)
+        ok=np.all(p[:,1:]>=-1e-9,axis=1)
+        SSE=np.where(ok & (SSEk<SSE),SSEk,SSE)
+
+    ibest=np.argmin(SSE)
+
+    return [xcand[j0[ibest]],xcand[j1[ibest]]]
+################################################################################
 
-    plt.show()
-    return
+def plot3SDfit(h,w,params_inner,params_outer):
+    from . import plots_jw
+    plots_jw.plot3SDfit(h,w,params_inner,params_outer)
+################################################################################
 
 # the area and estimate_height functions below are copy and pasted from discharge.py 
 # in the offline-discharge-data-product-creation repo. february 3, 2022 -mike
@@ -742,6 +1329,30 @@ def area(observed_height, observed_width, area_fits):
     observed_width - swot observed width for this reach
     area_fits - dictionary of things extracted from prior DB
     """
+    ############################################################################
+    # JW EDITS: Evaluate a single observation with area_batch
+    delta_area_hat, observed_width_hat, observed_height_hat, dAunc = \
+        area_batch(np.atleast_1d(observed_height),
+                   np.atleast_1d(observed_width), area_fits)
+
+    return (delta_area_hat[0], observed_width_hat[0], observed_height_hat[0],
+            dAunc[0])
+    ############################################################################
+
+################################################################################
+# JW EDITS: Batched versions of area and _area
+#
+# area_batch unpacks area_fits once and _area_batch evaluates every
+# observation at once. Integrated polynomials and their values at the lower
+# breakpoints are computed once per call. Each observation follows the same
+# branches and floating-point operations as _area, so delta area, width hat
+# and height hat are identical to calling _area for each observation. dAunc
+# agrees to rounding, as numpy raises arrays to a power with its own routine.
+def area_batch(observed_height, observed_width, area_fits):
+    """
+    Batched area: arrays of observed heights and widths for this reach.
+    Returns arrays of delta area, width hat, height hat and dA uncertainty.
+    """
     height_breakpoints = np.squeeze(area_fits['h_break'])
     poly_fits = [
         np.squeeze(area_fits['fit_coeffs'])[:, 0],
@@ -760,11 +1371,169 @@ def area(observed_height, observed_width, area_fits):
     cov_height_width[1, 1] = np.squeeze(area_fits['h_variance'])
     num_obs = np.squeeze(area_fits['h_w_nobs'])
 
-    return _area(
+    return _area_batch(
         observed_height, observed_width, height_breakpoints, poly_fits,
         area_median_flow, fit_width_std**2, fit_height_std**2,
         cov_height_width, num_obs)
 
+def _polyval_rows(poly_fits, x):
+    """Evaluates a polynomial with its own coefficients (rows) at each x,
+    as np.polyval does"""
+    y = np.zeros_like(x)
+    for pv in poly_fits.T:
+        y = y * x + pv
+    return y
+
+def _area_batch(
+    observed_height, observed_width, height_breakpoints, poly_fits,
+    area_median_flow, fit_width_var, fit_height_var, cov_height_width,
+    num_obs):
+    """
+    Batched _area: arrays of observed heights and widths for this reach.
+    Returns arrays of delta area, width hat, height hat and dA uncertainty.
+    """
+    observed_height = np.asarray(observed_height, dtype=float)
+    n = len(observed_height)
+
+    low_height_snr = (
+        cov_height_width[1, 1] - fit_height_var)/fit_height_var < 2
+
+    return _area_points(
+        observed_height, observed_width,
+        np.broadcast_to(height_breakpoints, (n, 4)),
+        np.broadcast_to(np.array(poly_fits), (n, 3, 2)),
+        np.full(n, area_median_flow), np.full(n, fit_width_var),
+        np.full(n, fit_height_var), np.full(n, low_height_snr))
+
+def _area_points(
+    observed_height, observed_width, height_breakpoints, poly_fits,
+    area_median_flow, fit_width_var, fit_height_var, low_height_snr):
+    """
+    _area for arrays of observations, each with the fit of its own reach.
+
+    observed_height, observed_width - arrays of observations
+    height_breakpoints - breakpoints of each observation's fit (n, 4)
+    poly_fits - slope and intercept of each sub-domain (n, 3, 2)
+    area_median_flow, fit_width_var, fit_height_var, low_height_snr - values
+        of each observation's fit (n,)
+    """
+    observed_height = np.asarray(observed_height, dtype=float)
+    observed_width = np.asarray(observed_width, dtype=float)
+    n = len(observed_height)
+    ipt = np.arange(n)
+
+    # integrated polynomials of each sub-domain, as np.polyint
+    poly_ints = np.concatenate(
+        (poly_fits / np.arange(2, 0, -1), np.zeros((n, 3, 1))), axis=2)
+
+    height_fits_ll = height_breakpoints[:, 0:-1]
+    height_fits_ul = height_breakpoints[:, 1:]
+
+    # integrals of each sub-domain at its lower breakpoint
+    area_ll = np.column_stack([
+        _polyval_rows(poly_ints[:, k], height_fits_ll[:, k])
+        for k in range(3)])
+
+    # first sub-domain holding each height, if any
+    def find_fit(height, ll, ul):
+        in_fit = np.logical_and(height[:, None] >= ll, height[:, None] < ul)
+        return in_fit.any(axis=1), np.argmax(in_fit, axis=1)
+
+    has_fit, ifit = find_fit(observed_height, height_fits_ll, height_fits_ul)
+
+    delta_area_hat = np.empty(n)
+    observed_width_hat = np.empty(n)
+    observed_height_hat = np.empty(n)
+    dAunc = np.empty(n)
+
+    # heights outside of all sub-domains
+    out = ~has_fit
+    if out.any():
+        h = observed_height[out]
+        w = observed_width[out]
+        hb = height_breakpoints[out]
+        p = poly_fits[out]
+        p_int = poly_ints[out]
+        amf = area_median_flow[out]
+        fwv = fit_width_var[out]
+        fhv = fit_height_var[out]
+        above = h > hb.max(axis=1)
+
+        observed_height_hat[out] = np.nan
+        observed_width_hat[out] = w
+        delta_area_hat[out] = np.where(
+            above,
+            _polyval_rows(p_int[:, -1], hb[:, -1]) -
+            _polyval_rows(p_int[:, -1], hb[:, -2]) +
+            amf,
+            - amf - ((hb[:, 0]-h)
+            * (w + p[:, 0, 0]*hb[:, 0]
+            + p[:, 0, 1])/2))
+        dAunc[out] = np.where(
+            above,
+            np.sqrt(
+                fhv*w**2 +
+                2*fwv*(h-hb[:, -1])**2),
+            np.sqrt(
+                fhv*w**2 +
+                2*fwv*(h-hb[:, 0])**2))
+
+    # heights within a sub-domain
+    if has_fit.any():
+        h = observed_height[has_fit]
+        w = observed_width[has_fit]
+        ll = height_fits_ll[has_fit]
+        ul = height_fits_ul[has_fit]
+        p = poly_fits[has_fit]
+        p_int = poly_ints[has_fit]
+        a_ll = area_ll[has_fit]
+        amf = area_median_flow[has_fit]
+        fwv = fit_width_var[has_fit]
+        fhv = fit_height_var[has_fit]
+        snr = low_height_snr[has_fit]
+        ifit = ifit[has_fit]
+        ih = ipt[:len(h)]
+
+        h_hat = np.where(snr, h, estimate_height(w, h, p[ih, ifit].T,
+                                                 fwv, fhv))
+
+        has_fit_hat, ifit_hat = find_fit(h_hat, ll, ul)
+        ifit = np.where(has_fit_hat, ifit_hat, ifit)
+        h_hat = np.where(has_fit_hat,
+                         estimate_height(w, h, p[ih, ifit].T, fwv, fhv),
+                         h_hat)
+
+        w_hat = np.where(snr, w, _polyval_rows(p[ih, ifit], h_hat))
+
+        # sum areas of sub-domains up to the fit of each height, in order
+        dA = np.zeros(len(h))
+        for k in range(3):
+            dA_k = (_polyval_rows(p_int[:, k], np.minimum(h_hat, ul[:, k]))
+                    - a_ll[:, k])
+            dA = np.where(ifit >= k, dA + dA_k, dA)
+        dA -= amf
+
+        slope = p[ih, ifit, 0]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            mu = (np.sqrt(
+                slope/2) *
+                (h_hat - ul[ih, ifit]) + _polyval_rows(
+                p[ih, ifit], ul[ih, ifit]) / np.sqrt(
+                2 * slope))
+            sigma = np.sqrt(slope/2) * np.sqrt(fhv)
+            dA_unc = np.where(
+                slope == 0,
+                p[ih, ifit, 1] * np.sqrt(fhv),
+                np.sqrt(4*mu**2*sigma**2 + 2*sigma**4))
+
+        delta_area_hat[has_fit] = dA
+        observed_width_hat[has_fit] = w_hat
+        observed_height_hat[has_fit] = h_hat
+        dAunc[has_fit] = dA_unc
+
+    return delta_area_hat, observed_width_hat, observed_height_hat, dAunc
+################################################################################
+
 def _area(
     observed_height, observed_width, height_breakpoints, poly_fits,
     area_median_flow, fit_width_var, fit_height_var, cov_height_width,
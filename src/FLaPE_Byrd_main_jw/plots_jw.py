@@ -0,0 +1,77 @@
+#/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Plotting helpers of ReachObservations_jw, split out of that module so that
+matplotlib is only imported when a plot is requested (Verbose=True).
+JW EDITS
+"""
+
+from numpy import linspace
+import matplotlib.pyplot as plt
+
+def plotHW(obs,plottitle=[]):
+
+    #plt.style.use('tableau-colorblind10')
+
+    fig,ax = plt.subplots()
+    
+    if hasattr(obs,'area_fit'):
+
+        for sd in range(3):
+            htest=linspace(obs.area_fit['h_break'][sd],obs.area_fit['h_break'][sd+1],10)
+            wtest=obs.area_fit['fit_coeffs'][0,sd,0]*htest+obs.area_fit['fit_coeffs'][1,sd,0]
+            #plt.plot(htest,wtest,color='C0')
+            plt.plot(htest,wtest,color='tab:orange')
+    
+    if obs.ConstrainHWSwitch:
+        for i in range(obs.D.nt):
+            ax.plot([obs.hobs[i],obs.h[0,i]],[obs.wobs[i],obs.w[0,i]],color='grey')
+        ax.scatter(obs.hobs,obs.wobs,marker='o')   
+        ax.scatter(obs.h[0,:],obs.w[0,:],marker='o')   
+    else: 
+        ax.scatter(obs.h[0,:],obs.w[0,:],marker='o')   
+
+
+    if bool(plottitle):
+        plt.title(plottitle)
+    plt.xlabel('WSE, m')
+    plt.ylabel('Width, m')      
+    plt.show() 
+    
+def plotdA(obs):
+    fig,ax = plt.subplots()
+    ax.plot(obs.D.t.T,obs.dA[0,:])        
+        
+    plt.title('dA timeseries')
+    plt.xlabel('Time, days')
+    plt.ylabel('dA, m^2')      
+    plt.show()       
+    
+def plotHdA(obs):
+    fig,ax = plt.subplots()
+    
+    ax.scatter(obs.h[0,:],obs.dA[0,:],marker='o')   
+        
+    plt.title('dA vs WSE for first reach')
+    plt.xlabel('WSE, m')
+    plt.ylabel('dA, m')      
+    plt.show()
+
+def plot3SDfit(h,w,params_inner,params_outer):
+    fig,ax = plt.subplots()
+    ax.scatter(h,w,marker='o')
+    plt.title('WSE vs width ')
+    plt.xlabel('WSE, m')
+    plt.ylabel('Width, m')
+
+    htest0=linspace(min(h),params_outer[0],10 )
+    wtest0=params_inner[0]*htest0+params_inner[1]
+    htest1=linspace(params_outer[0],params_outer[1],10)
+    wtest1= params_inner[2]*htest1+params_inner[3]
+    htest2=linspace(params_outer[1],max(h),10)
+    wtest2= params_inner[4]*htest2+params_inner[5]
+
+    plt.plot(htest0,wtest0,htest1,wtest1,htest2,wtest2)
+
+    plt.show()
+    return
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+# ******************************************************************************
+# anomaly_interp.py
+# ******************************************************************************
+
+# Purpose:
+# Interpolate the volume estimates of reaches at the dates of their unfiltered
+# SWOT observations, and compute volume anomalies, for all reaches at once.
+# Estimates and observation dates of all reaches are sorted by reach and date
+# once, and interpolated linearly in time within each reach, with the first
+# and last estimates of a reach extended before and after them. The results
+# are identical to interpolating each reach with pandas (reindex to the
+# union of estimate and observation dates, interpolate(method='time'),
+# ffill().bfill()), removing its mean and averaging values of the same date.
+# Author:
+# Jeffrey Wade, 2025
+
+
+# ******************************************************************************
+# Import Python modules
+# ******************************************************************************
+import numpy as np
+import pandas as pd
+
+
+# ******************************************************************************
+# Declaration of constants
+# ******************************************************************************
+# Nanoseconds in a day, the unit of times interpolated by pandas
+NS_DAY = 86400 * 10 ** 9
+
+
+# ******************************************************************************
+# Define functions
+# ******************************************************************************
+# Sum values of consecutive segments of given starts and lengths
+# Segments of the same length are summed as rows of a matrix, so that each sum
+# is the pairwise sum of np.sum over the segment alone (unlike np.add.reduceat)
+def segment_sums(values, starts, lengths):
+    sums = np.zeros(len(starts))
+    for n in np.unique(lengths):
+        sel = np.flatnonzero(lengths == n)
+        sums[sel] = values[starts[sel][:, None] + np.arange(n)].sum(axis=1)
+    return sums
+
+
+# Compute daily volume anomalies of reaches rch_ids
+# V_df is a long table of volume estimates (reach_id, date and value
+# columns, see swot_io.read_series), and obs_rch and obs_dates hold the reach
+# and date of every unfiltered SWOT observation. Each reach is evaluated at
+# the union of the dates of its estimates and observations, a date observed k
+# times counting k times in the mean of the reach. Returns a long table of
+# reach_id, date and anomaly value, in order of rch_ids and date, NaN for
+# reaches without estimates.
+def interp_anomalies(V_df, obs_rch, obs_dates, rch_ids):
+
+    rch_ids = pd.Index(rch_ids)
+    n_rch = len(rch_ids)
+
+    # Key each (reach, day) by reach position in rch_ids and day, dropping
+    # estimates and observations of other reaches, and observations without
+    # times
+    V_ind = rch_ids.get_indexer(V_df['reach_id'].values)
+    V_day = V_df['date'].values.astype('datetime64[D]').astype(np.int64)
+    obs_ind = rch_ids.get_indexer(obs_rch)
+    obs_dates = np.asarray(obs_dates).astype('datetime64[D]')
+    obs_ok = (obs_ind >= 0) & ~np.isnat(obs_dates)
+    obs_ind = obs_ind[obs_ok]
+    obs_day = obs_dates[obs_ok].astype(np.int64)
+
+    V_ok = V_ind >= 0
+    days = np.r_[V_day[V_ok], obs_day]
+    day_0 = days.min() if len(days) > 0 else 0
+    n_day = days.max() - day_0 + 1 if len(days) > 0 else 1
+
+    V_key = V_ind[V_ok] * n_day + (V_day[V_ok] - day_0)
+    V_order = np.argsort(V_key, kind='stable')
+    V_key = V_key[V_order]
+    V_val = V_df['value'].values[V_ok][V_order]
+
+    # Evaluated dates: the dates of observations of a reach, as many times as
+    # observed, and the dates of its estimates not observed
+    obs_key, obs_n = np.unique(obs_ind * n_day + (obs_day - day_0),
+                               return_counts=True)
+    key = np.union1d(obs_key, V_key)
+    key_n = np.zeros(len(key), dtype=np.int64)
+    key_n[np.searchsorted(key, obs_key)] = obs_n
+    key_n = np.maximum(key_n, np.isin(key, V_key))
+    key = np.repeat(key, key_n)
+
+    ind = key // n_day
+    x = ((key % n_day + day_0) * NS_DAY).astype(np.float64)
+
+    # Estimates of each reach, as range of V_key
+    V_lo = np.searchsorted(V_key, np.arange(n_rch) * n_day)
+    V_hi = np.searchsorted(V_key, np.arange(1, n_rch + 1) * n_day)
+    lo = V_lo[ind]
+    hi = V_hi[ind]
+    has_V = hi > lo
+
+    # Last estimate of the reach at or before each date, with dates before
+    # the first estimate and after the last one taking their value
+    V_i = np.full(len(key), np.nan)
+    if len(V_key) > 0:
+        j = np.searchsorted(V_key, key, side='right') - 1
+        mid = has_V & (j >= lo) & (j < hi - 1)
+        j = np.where(has_V, np.clip(j, lo, hi - 1), 0)
+        V_i[has_V] = V_val[j[has_V]]
+
+        # Linear interpolation in time between estimates, as np.interp
+        V_xp = ((V_key % n_day + day_0) * NS_DAY).astype(np.float64)
+        mid &= V_xp[j] != x
+        j = j[mid]
+        slope = (V_val[j + 1] - V_val[j]) / (V_xp[j + 1] - V_xp[j])
+        V_i[mid] = slope * (x[mid] - V_xp[j]) + V_val[j]
+
+    # Volume anomaly (V - V_mean) of each reach
+    start = np.flatnonzero(np.diff(ind, prepend=-1))
+    n_pos = np.diff(np.r_[start, len(ind)])
+    V_mean = segment_sums(V_i, start, n_pos) / n_pos
+    V_a = V_i - np.repeat(V_mean, n_pos)
+
+    # Mean of anomalies of the same date, for dates observed more than once
+    V_a = pd.Series(V_a).groupby(key).mean()
+    key = V_a.index.values
+
+    return pd.DataFrame({
+        'reach_id': rch_ids.values[key // n_day],
+        'date': (key % n_day + day_0).astype('datetime64[D]'),
+        'value': V_a.values})
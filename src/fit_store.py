@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+# ******************************************************************************
+# fit_store.py
+# ******************************************************************************
+
+# Purpose:
+# Persistent store of the fits of reaches, so that reaches whose observations
+# have not changed since the previous run are not fit again. Each entry holds
+# the fit_reach result of a reach with the hash of the inputs it was fit from
+# (see swot_volume_fit.task_hash). The store is one compressed pickle file,
+# rewritten with the fits of the current run once all reaches are done.
+# Fits of a run in progress are also appended to a checkpoint file as each
+# reach is done, so that an interrupted run resumes with the remaining reaches.
+# Author:
+# Jeffrey Wade, 2025
+
+
+# ******************************************************************************
+# Import Python modules
+# ******************************************************************************
+import os
+import pickle
+import pandas as pd
+
+
+# ******************************************************************************
+# Declaration of constants
+# ******************************************************************************
+# Number of reaches appended to a checkpoint between writes to disk
+CKPT_RCH = 100
+
+
+# ******************************************************************************
+# Define store class
+# ******************************************************************************
+class FitStore:
+
+    def __init__(self, store_file):
+        self.store_file = store_file
+        self.entries = {}
+        self.new = {}
+
+        # A missing or unreadable store file is treated as an empty store
+        if os.path.exists(store_file):
+            try:
+                self.entries = pd.read_pickle(store_file, compression='gzip')
+            except (OSError, EOFError, ValueError):
+                print('Unable to read fit store ' + store_file +
+                      ', refitting all reaches')
+
+    # Retrieve stored fit of a reach, returning None if the reach is not
+    # stored or was fit from other inputs
+    def get(self, rch_id, key):
+        entry = self.entries.get(rch_id)
+        if entry is None or entry[0] != key:
+            return None
+        return entry[1]
+
+    # Add fit of a reach to the store written by save
+    def put(self, rch_id, key, rec):
+        self.new[rch_id] = (key, rec)
+
+    # Write fits added with put, replacing the previous store
+    # Reaches not fit in this run are dropped from the store
+    def save(self):
+        tmp = self.store_file + '.tmp'
+        pd.to_pickle(self.new, tmp, compression='gzip')
+        os.replace(tmp, self.store_file)
+
+
+# ******************************************************************************
+# Define checkpoint class
+# ******************************************************************************
+# Append-only file of the fits of reaches done by a run, written as a sequence
+# of pickled (reach id, hash, fit) entries. Entries of an interrupted run are
+# read back when the checkpoint is opened again. A partially written last
+# entry is discarded, and new entries are appended after the last whole entry.
+class FitCheckpoint:
+
+    def __init__(self, ckpt_file, ckpt_rch=CKPT_RCH):
+        self.ckpt_file = ckpt_file
+        self.ckpt_rch = ckpt_rch
+        self.entries = {}
+        self.n_put = 0
+
+        n_good = 0
+        if os.path.exists(ckpt_file):
+            with open(ckpt_file, 'rb') as file:
+                while True:
+                    try:
+                        rch_id, key, rec = pickle.load(file)
+                    except Exception:
+                        # End of file, or partially written entry
+                        break
+                    self.entries[rch_id] = (key, rec)
+                    n_good = file.tell()
+
+        self.file = open(ckpt_file, 'ab')
+        self.file.truncate(n_good)
+
+    # Retrieve fit of a reach done by an interrupted run, returning None if
+    # the reach was not done or was fit from other inputs
+    def get(self, rch_id, key):
+        entry = self.entries.get(rch_id)
+        if entry is None or entry[0] != key:
+            return None
+        return entry[1]
+
+    # Append fit of a reach, writing to disk every ckpt_rch reaches
+    def put(self, rch_id, key, rec):
+        pickle.dump((rch_id, key, rec), self.file)
+        self.n_put += 1
+        if self.n_put % self.ckpt_rch == 0:
+            self.file.flush()
+            os.fsync(self.file.fileno())
+
+    # Close checkpoint, removing it once the outputs of the run are written
+    def close(self, remove=False):
+        self.file.close()
+        if remove:
+            os.remove(self.ckpt_file)
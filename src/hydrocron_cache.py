@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+# ******************************************************************************
+# hydrocron_cache.py
+# ******************************************************************************
+
+# Purpose:
+# Persistent on-disk cache of parsed Hydrocron reach time series. Entries are
+# keyed by reach id, start time, end time and requested fields, stored as
+# compressed dataframes in one folder per Pfafstetter region, and evicted in
+# least recently used order once the cache exceeds its size limit.
+# When run as a script, invalidates all cached reaches of a region.
+# Author:
+# Jeffrey Wade, 2025
+
+
+# ******************************************************************************
+# Import Python modules
+# ******************************************************************************
+import os
+import sys
+import shutil
+import hashlib
+from collections import OrderedDict
+import pandas as pd
+
+
+# ******************************************************************************
+# Declaration of variables (given as command line arguments)
+# ******************************************************************************
+# 1 - cache_dir
+# 2 - pfaf (two-digit region to invalidate, or 'all')
+
+
+# ******************************************************************************
+# Declaration of constants
+# ******************************************************************************
+# Default cache size limit (MB)
+CACHE_MB = 1024
+
+# Extension of cached files
+CACHE_EXT = '.pkl.gz'
+
+
+# ******************************************************************************
+# Define cache class
+# ******************************************************************************
+class HydrocronCache:
+
+    def __init__(self, cache_dir, max_mb=CACHE_MB):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_mb * 1024**2
+        os.makedirs(cache_dir, exist_ok=True)
+
+        # Index cached files from least to most recently used
+        files = []
+        for reg in os.scandir(cache_dir):
+            if not reg.is_dir():
+                continue
+            for f in os.scandir(reg.path):
+                if f.name.endswith(CACHE_EXT):
+                    st = f.stat()
+                    files.append((st.st_mtime, f.path, st.st_size))
+        files.sort()
+
+        self.index = OrderedDict((x[1], x[2]) for x in files)
+        self.size = sum(self.index.values())
+
+    # Retrieve cache file path of a reach request
+    # The region is given by the first two digits of the SWORD reach id
+    def path(self, rch_id, start_time, end_time, swot_vars):
+        key = '|'.join([str(rch_id), start_time, end_time, swot_vars])
+        name = hashlib.sha1(key.encode()).hexdigest() + CACHE_EXT
+        return os.path.join(self.cache_dir, str(rch_id)[0:2], name)
+
+    # Retrieve cached dataframe, returning False on a cache miss
+    # A cached empty dataframe is returned as None (reach has no observations)
+    def get(self, rch_id, start_time, end_time, swot_vars):
+        path = self.path(rch_id, start_time, end_time, swot_vars)
+        if path not in self.index:
+            return False
+
+        try:
+            df = pd.read_pickle(path, compression='gzip')
+        except (OSError, EOFError, ValueError):
+            self.remove(path)
+            return False
+
+        # Mark as most recently used
+        os.utime(path)
+        self.index.move_to_end(path)
+
+        if len(df) == 0:
+            return None
+        return df
+
+    # Store dataframe of a reach request, with None for no observations
+    def put(self, rch_id, start_time, end_time, swot_vars, df):
+        path = self.path(rch_id, start_time, end_time, swot_vars)
+        if df is None:
+            df = pd.DataFrame()
+
+        # Write to temporary file first so interrupted runs leave no partial
+        # entries behind
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = path + '.tmp'
+        df.to_pickle(tmp, compression='gzip')
+        os.replace(tmp, path)
+
+        self.size -= self.index.pop(path, 0)
+        self.index[path] = os.path.getsize(path)
+        self.size += self.index[path]
+
+        # Evict least recently used entries beyond size limit
+        while self.size > self.max_bytes and len(self.index) > 1:
+            self.remove(next(iter(self.index)))
+
+    # Remove a single cache entry
+    def remove(self, path):
+        self.size -= self.index.pop(path, 0)
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+    # Remove all cache entries of a region
+    def invalidate(self, pfaf):
+        reg_dir = os.path.join(self.cache_dir, pfaf)
+        for path in [x for x in self.index
+                     if os.path.dirname(x) == reg_dir]:
+            self.size -= self.index.pop(path)
+        shutil.rmtree(reg_dir, ignore_errors=True)
+
+
+# ******************************************************************************
+# Invalidate cached region
+# ******************************************************************************
+if __name__ == '__main__':
+
+    IS_arg = len(sys.argv)
+    if IS_arg != 3:
+        print('ERROR - 2 arguments must be used')
+        raise SystemExit(22)
+
+    cache_dir = sys.argv[1]
+    pfaf = sys.argv[2]
+
+    if not os.path.isdir(cache_dir):
+        print('ERROR - ' + cache_dir + ' invalid folder path')
+        raise SystemExit(22)
+
+    cache = HydrocronCache(cache_dir)
+    if pfaf == 'all':
+        regs = sorted(x.name for x in os.scandir(cache_dir) if x.is_dir())
+    else:
+        regs = [pfaf]
+
+    for reg in regs:
+        print('Invalidating cached reaches of region ' + reg)
+        cache.invalidate(reg)
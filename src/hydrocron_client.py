@@ -0,0 +1,338 @@
+#!/usr/bin/env python3
+# ******************************************************************************
+# hydrocron_client.py
+# ******************************************************************************
+
+# Purpose:
+# Shared functions for downloading SWOT L2 HR River Single Pass reach time
+# series from PO.DAAC's Hydrocron service. Requests are issued concurrently
+# through one pooled HTTP session, with a bounded number of requests in flight.
+# Requests are rate limited with a token bucket, and throttled or failed
+# requests are retried with exponential backoff. Reaches that still fail are
+# retried once more at the end of the download.
+# Author:
+# Jeffrey Wade, 2025
+
+
+# ******************************************************************************
+# Import Python modules
+# ******************************************************************************
+import io
+import time
+import random
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+import numpy as np
+import pandas as pd
+import requests
+from requests.adapters import HTTPAdapter
+
+
+# ******************************************************************************
+# Declaration of constants
+# ******************************************************************************
+# Hydrocron time series endpoint
+HYDROCRON_URL = 'https://soto.podaac.earthdatacloud.nasa.gov/hydrocron/v1/'\
+    'timeseries'
+
+# SWOT variables of interest
+SWOT_VARS = 'reach_id,time,wse,wse_u,wse_r_u,width,width_u,'\
+    'reach_q,reach_q_b,dark_frac,ice_clim_f,ice_dyn_f,xtrk_dist,'\
+    'obs_frac_n,xovr_cal_q,p_length,crid'
+
+# Base date of SWOT times
+BASE_DATE = datetime(2000, 1, 1)
+
+# Default number of concurrent requests
+N_CONC = 8
+
+# Default maximum request rate (requests per second)
+MAX_RATE = 50
+
+# Number of retries of a throttled or failed request
+N_RETRY = 5
+
+# Base and maximum backoff between retries (seconds)
+BACKOFF = 1
+BACKOFF_MAX = 60
+
+# Request timeout (seconds)
+TIMEOUT = 120
+
+# HTTP status codes of requests that may succeed when retried
+RETRY_CODES = [429, 500, 502, 503, 504]
+
+
+# ******************************************************************************
+# Define functions
+# ******************************************************************************
+# Create Hydrocron API call for a single reach
+def api_call(rch_id, start_time, end_time, swot_vars=SWOT_VARS,
+             url=HYDROCRON_URL):
+    return (url + '?feature=Reach&feature_id=' + str(rch_id) +
+            '&output=csv&start_time=' + start_time +
+            '&end_time=' + end_time + '&fields=' + swot_vars)
+
+
+# Open HTTP session with a connection pool sized to the number of workers
+def open_session(n_conc=N_CONC):
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=n_conc,
+                          pool_block=True)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+# Convert Hydrocron response to dataframe of valid reach observations
+# Returns None if the response holds an error or no valid observations
+def parse_response(response):
+
+    # Check request status, catching errors in api call
+    if 'error' in response:
+        print('Error:', response['error'])
+        return None
+
+    try:
+        if response['status'] != '200 OK':
+            # Catch other errors
+            print('Error:', response['response'])
+            return None
+
+        # Retrieve csv string
+        csv_str = response['results']['csv']
+
+    except KeyError as e:
+        print(f"KeyError: {e}. The status key does not exist.")
+        return None
+
+    # Convert to dataframe
+    df = pd.read_csv(io.StringIO(csv_str))
+
+    # Drop rows with negative times
+    df = df[df['time'] >= 0]
+
+    # If df has no valid observations, skip reach
+    if len(df) == 0:
+        return None
+
+    # Drop all unit columns
+    df = df[df.columns.drop(list(df.filter(like='units')))]
+
+    # Convert times
+    df['time'] = decode_time(df['time'].values)
+
+    return df
+
+
+# Convert SWOT times (seconds since base date) to datetime64
+# Whole seconds and microseconds are converted separately, matching the
+# rounding of datetime.timedelta(seconds=x) for every value
+def decode_time(t_sec):
+    t_sec = np.asarray(t_sec, dtype='float64')
+    sec = np.floor(t_sec)
+    usec = np.round((t_sec - sec) * 1e6)
+    return (np.datetime64(BASE_DATE, 'us') + sec.astype('timedelta64[s]') +
+            usec.astype('timedelta64[us]')).astype('datetime64[ns]')
+
+
+# Check if Hydrocron response is a valid answer, i.e. the reach either has
+# observations or is reported as not found
+def response_ok(response):
+    if 'error' in response:
+        return 'not found' in response['error']
+    return response.get('status') == '200 OK'
+
+
+# Token bucket limiting the rate of requests shared by all workers
+# Up to burst requests may be made at once, after which requests are spaced
+# at the given rate. pause() stops all requests for a number of seconds, e.g.
+# when the server asks clients to slow down.
+class RateLimiter:
+
+    def __init__(self, rate, burst=1):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.t_last = time.monotonic()
+        self.lock = threading.Lock()
+
+    # Wait until a request may be made
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                if now >= self.t_last:
+                    self.tokens = min(self.burst, self.tokens +
+                                      (now - self.t_last) * self.rate)
+                    self.t_last = now
+                    if self.tokens >= 1:
+                        self.tokens -= 1
+                        return
+                    wait = (1 - self.tokens) / self.rate
+                else:
+                    wait = self.t_last - now
+            time.sleep(wait)
+
+    # Stop all requests for a number of seconds
+    def pause(self, seconds):
+        with self.lock:
+            self.tokens = 0
+            self.t_last = max(self.t_last, time.monotonic() + seconds)
+
+
+# Compute backoff before a retry, with full jitter
+def backoff(n_try):
+    return random.uniform(0, min(BACKOFF_MAX, BACKOFF * 2 ** n_try))
+
+
+# Request time series of a single reach
+# Throttled requests, server errors and connection errors are retried up to
+# n_retry times, waiting as requested by a Retry-After header or otherwise
+# with exponential backoff. Returns the response (an error if every attempt
+# failed) and the number of attempts made.
+def fetch_reach(session, call, limiter=None, n_retry=N_RETRY):
+
+    wait = 0
+    for n_try in range(n_retry + 1):
+        time.sleep(wait)
+
+        if limiter is not None:
+            limiter.acquire()
+
+        try:
+            r = session.get(call, timeout=TIMEOUT)
+        except requests.RequestException as e:
+            error = str(e)
+            wait = backoff(n_try)
+            continue
+
+        if r.status_code not in RETRY_CODES:
+            try:
+                return r.json(), n_try + 1
+            except ValueError:
+                return {'error': str(r.status_code) + ': ' + r.text[:200]}, \
+                    n_try + 1
+
+        # Respect server's requested wait, pausing all workers
+        error = str(r.status_code)
+        wait = backoff(n_try)
+        if r.headers.get('Retry-After', '').isdigit():
+            wait = float(r.headers['Retry-After'])
+            if limiter is not None:
+                limiter.pause(wait)
+
+    return {'error': 'Giving up after ' + str(n_retry + 1) + ' attempts (' +
+            error + ')'}, n_retry + 1
+
+
+# Request time series of many reaches concurrently
+# queries is a sequence of (reach id, start time, end time) tuples. Yields each
+# query with its dataframe (or None) in order, while keeping at most
+# 2 * n_conc requests submitted at any time and at most max_rate requests per
+# second. Responses are parsed in the calling thread so that messages print in
+# reach order. If a cache is given, cached reaches are not requested and valid
+# responses are added to the cache.
+# Reaches whose requests fail are set aside and requested again once all other
+# reaches are done, and are yielded at the end. Queries that fail again are
+# yielded with False instead of a dataframe. Counts of requests, retries and
+# failures are added to stats, if given.
+def dwnl_queries(queries, n_conc=N_CONC, cache=None, swot_vars=SWOT_VARS,
+                 url=HYDROCRON_URL, max_rate=MAX_RATE, stats=None):
+
+    session = open_session(n_conc)
+    limiter = RateLimiter(max_rate, n_conc) if max_rate else None
+    window = deque()
+    dead = []
+    count = {'requests': 0, 'retries': 0, 'failures': 0, 'cache_hits': 0,
+             'lost': 0}
+
+    # Submit request of a reach
+    def submit(query):
+        call = api_call(*query, swot_vars=swot_vars, url=url)
+        window.append((query, pool.submit(fetch_reach, session, call,
+                                          limiter), False))
+
+    # Retrieve next result in order, caching fetched responses
+    # Returns query and dataframe, or False if the request failed
+    def pop():
+        query, fut, cached = window.popleft()
+        if cached:
+            return query, fut
+        response, n_try = fut.result()
+        count['requests'] += n_try
+        count['retries'] += n_try - 1
+        if not response_ok(response):
+            print('Error:', response.get('error', response.get('status')))
+            count['failures'] += 1
+            return query, False
+        df = parse_response(response)
+        if cache is not None:
+            cache.put(*query, swot_vars, df)
+        return query, df
+
+    with ThreadPoolExecutor(max_workers=n_conc) as pool:
+        for query in queries:
+            df = False
+            if cache is not None:
+                df = cache.get(*query, swot_vars)
+
+            if df is False:
+                submit(query)
+            else:
+                window.append((query, df, True))
+                count['cache_hits'] += 1
+
+            if len(window) >= 2 * n_conc:
+                query_done, df = pop()
+                if df is False:
+                    dead.append(query_done)
+                else:
+                    yield query_done, df
+
+        while window:
+            query_done, df = pop()
+            if df is False:
+                dead.append(query_done)
+            else:
+                yield query_done, df
+
+        # Request failed reaches again, once all other reaches are done
+        if dead:
+            print('Retrying failed reaches:', len(dead))
+            for query in dead:
+                submit(query)
+            while window:
+                query_done, df = pop()
+                if df is False:
+                    count['lost'] += 1
+                yield query_done, df
+
+    session.close()
+
+    if cache is not None:
+        print('Reaches read from cache:', count['cache_hits'])
+    print('Requests:', count['requests'], '| Retries:', count['retries'],
+          '| Failed requests:', count['failures'], '| Reaches not '
+          'downloaded:', count['lost'])
+
+    if stats is not None:
+        stats.update(count)
+
+
+# Request time series of many reaches concurrently, as in dwnl_queries
+# Yields the dataframe (or None) of each downloaded reach. Queries of reaches
+# that could not be downloaded are appended to failed, if given.
+def dwnl_reaches(queries, n_conc=N_CONC, cache=None, swot_vars=SWOT_VARS,
+                 url=HYDROCRON_URL, max_rate=MAX_RATE, failed=None,
+                 stats=None):
+
+    for query, df in dwnl_queries(queries, n_conc, cache, swot_vars, url,
+                                  max_rate, stats):
+        if df is False:
+            if failed is not None:
+                failed.append(query)
+        else:
+            yield df
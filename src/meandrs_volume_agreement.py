@@ -15,8 +15,8 @@ import os
 import sys
 import pandas as pd
 import numpy as np
-import glob
 from scipy.signal import correlate
+from swot_io import glob_tables, read_table, write_table
 
 
 # ******************************************************************************
@@ -80,14 +80,14 @@ print('Reading files')
 # SWOT MeanDRS Volume Mean Comparisons
 # ------------------------------------------------------------------------------
 # Read regional comparison files
-comp_reg_files = sorted(list(glob.iglob(comp_reg_in + '*.csv')))
-comp_reg_all = [pd.read_csv(x) for x in comp_reg_files]
+comp_reg_files = glob_tables(comp_reg_in)
+comp_reg_all = [read_table(x) for x in comp_reg_files]
 
 # Retrieve pfaf regions of files
 pfaf_list = pd.Series([x.partition("pfaf_")[-1][0:2] for x in comp_reg_files])
 
 # Read global comparison file
-comp_df = pd.read_csv(comp_global_in)
+comp_df = read_table(comp_global_in)
 
 # ------------------------------------------------------------------------------
 # Assess agreement of annual magnitude of volume variability
@@ -125,7 +125,7 @@ for i in range(len(comp_reg_all)):
                                        abs(diff_mag.loc[i, f'mag_rat_{x}'] - 1))
 
 # Write to file
-diff_mag.to_csv(mag_out, index=False)
+write_table(diff_mag, mag_out)
 
 # ------------------------------------------------------------------------------
 # Assess agreement of timing of time series
@@ -184,4 +184,4 @@ diff_corr['best_lag'] = \
              mul(-1)))
 
 # Write to file
-diff_corr.to_csv(corr_out, index=False)
+write_table(diff_corr, corr_out)
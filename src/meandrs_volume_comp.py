@@ -17,9 +17,10 @@ import sys
 import os
 import pandas as pd
 import numpy as np
-import geopandas as gpd
 import glob
 import xarray as xr
+from shp_attrs import read_attrs
+from swot_io import read_table, write_table
 
 
 # ******************************************************************************
@@ -112,7 +113,7 @@ print('Reading files')
 # Volume
 # ------------------------------------------------------------------------------
 # Read V anomaly files
-V_anom = pd.read_csv(V_anom_in, index_col='reach_id')
+V_anom = read_table(V_anom_in, index_col='reach_id')
 
 # Convert columns to dates
 V_anom.columns = pd.to_datetime(V_anom.columns)
@@ -144,8 +145,8 @@ else:
     V_anom_tot = pd.DataFrame(columns=['empty'])
     meandrs_anom_tot = pd.DataFrame(columns=['empty'])
 
-    V_anom_tot.to_csv(swot_anom_out, index=False)
-    meandrs_anom_tot.to_csv(meandrs_anom_out, index=False)
+    write_table(V_anom_tot, swot_anom_out)
+    write_table(meandrs_anom_tot, meandrs_anom_out)
 
     # Exit with success code
     print('No corresponding MeanDRS reaches')
@@ -175,7 +176,7 @@ mV_low = [xr.open_dataset(x) for x in mV_low_in]
 mb_files = [glob.glob(mb_in + '*_pfaf_' + str(x) + '*.shp')[0] for x in regs]
 
 # Read MERIT-Basins shapefiles
-mb_shps = [gpd.read_file(x) for x in mb_files]
+mb_shps = [read_attrs(x, ['COMID', 'lengthkm']) for x in mb_files]
 
 # Create dictionary of MERIT-Basins reach lengths (in meters)
 mb_len = {}
@@ -190,7 +191,7 @@ sword_all = [glob.glob(sword_in + '*hb' + str(x) + '*.shp')[0] for
              x in regs]
 
 # Read SWORD shapefile
-sword_shps = [gpd.read_file(x) for x in sword_all]
+sword_shps = [read_attrs(x, ['reach_id', 'reach_len']) for x in sword_all]
 
 # Create dictionary of SWORD reach lengths
 sword_len = {}
@@ -380,7 +381,7 @@ meandrs_anom_tot = meandrs_anom_tot.rename_axis("dates")
 # ------------------------------------------------------------------------------
 print('Writing files')
 # Write SWOT anomaly to file
-V_anom_tot.to_csv(swot_anom_out, index=False)
+write_table(V_anom_tot, swot_anom_out)
 
 # Write MeanDRS anomaly to file
-meandrs_anom_tot.to_csv(meandrs_anom_out, index=True)
+write_table(meandrs_anom_tot, meandrs_anom_out, index=True)
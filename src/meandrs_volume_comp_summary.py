@@ -16,8 +16,8 @@ import os
 import sys
 import pandas as pd
 import numpy as np
-import glob
 import matplotlib.pyplot as plt
+from swot_io import glob_tables, read_table, write_table
 
 
 # ******************************************************************************
@@ -69,12 +69,12 @@ print('Reading files')
 # Volume Anomalies
 # ------------------------------------------------------------------------------
 # Read SWOT anomaly files
-swot_anom_files = sorted(list(glob.iglob(swot_anom_in + '*.csv')))
-swot_anom_all = [pd.read_csv(x) for x in swot_anom_files]
+swot_anom_files = glob_tables(swot_anom_in)
+swot_anom_all = [read_table(x) for x in swot_anom_files]
 
 # Read MeanDRS anomaly files
-meandrs_anom_files = sorted(list(glob.iglob(meandrs_anom_in + '*.csv')))
-meandrs_anom_all = [pd.read_csv(x) for x in meandrs_anom_files]
+meandrs_anom_files = glob_tables(meandrs_anom_in)
+meandrs_anom_all = [read_table(x) for x in meandrs_anom_files]
 
 # Retrieve list of pfaf ids
 pfaf_list = pd.Series([x.partition("pfaf_")[-1][0:2] for x in swot_anom_files])
@@ -104,6 +104,9 @@ comp_df.mon = [x.month for x in pd.to_datetime(swot_dates)]
 # Initialize list to store regional comparisons
 reg_list = []
 
+# Write regional comparisons in the format (.csv or .parquet) of the global one
+reg_ext = os.path.splitext(comp_global_out)[1]
+
 # Loop through regions
 for j in range(len(pfaf_list)):
 
@@ -118,11 +121,11 @@ for j in range(len(pfaf_list)):
 
     # Set output file path
     comp_fp = comp_reg_out + 'V_MeanDRS_comp_means_pfaf_' + \
-        pfaf_list[j] + '_2023-10-01_2024-09-30.csv'
+        pfaf_list[j] + '_2023-10-01_2024-09-30' + reg_ext
 
     # If no values in comp_j, write empty dataframe
     if len(swot_anom_j) == 0:
-        reg_df.to_csv(comp_fp, index=False)
+        write_table(reg_df, comp_fp)
         continue
 
     # Convert MeanDRS dates to months
@@ -144,7 +147,7 @@ for j in range(len(pfaf_list)):
     reg_df.iloc[:, 3:] = meandrs_summary[:]
 
     # Write to file
-    reg_df.to_csv(comp_fp, index=False)
+    write_table(reg_df, comp_fp)
     reg_list.append(reg_df)
 
 
@@ -183,4 +186,4 @@ global_summary = global_summary.reindex(comp_df.mon).reset_index(drop=True)
 comp_df.iloc[:, 3:] = global_summary[:]
 
 # Write to file
-comp_df.to_csv(comp_global_out, index=False)
+write_table(comp_df, comp_global_out)
@@ -16,9 +16,10 @@ import os
 import sys
 import pandas as pd
 import numpy as np
-import geopandas as gpd
 import glob
 import xarray as xr
+from shp_attrs import read_attrs
+from swot_io import write_table
 
 
 # ******************************************************************************
@@ -125,7 +126,7 @@ if len(ms_sword) != 0:
 # Else, write empty dataframes
 else:
     scale_anom_tot = pd.DataFrame(columns=['empty'])
-    scale_anom_tot.to_csv(scale_anom_out, index=False)
+    write_table(scale_anom_tot, scale_anom_out)
 
     # Exit with success code
     print('No corresponding MeanDRS reaches')
@@ -168,7 +169,7 @@ mon_range = date_range.month
 mb_files = [glob.glob(mb_in + '*_pfaf_' + str(x) + '*.shp')[0] for x in regs]
 
 # Read MERIT-Basins shapefiles
-mb_shps = [gpd.read_file(x) for x in mb_files]
+mb_shps = [read_attrs(x, ['COMID', 'lengthkm']) for x in mb_files]
 
 # Create dictionary of MERIT-Basins reach lengths (in meters)
 mb_len = {}
@@ -183,7 +184,7 @@ sword_all = [glob.glob(sword_in + '*hb' + str(x) + '*.shp')[0] for
              x in regs]
 
 # Read SWORD shapefile
-sword_shps = [gpd.read_file(x) for x in sword_all]
+sword_shps = [read_attrs(x, ['reach_id', 'reach_len']) for x in sword_all]
 
 # Create dictionary of SWORD reach lengths
 sword_len = {}
@@ -307,4 +308,4 @@ for i in range(len(uniq_ind_sw)):
 # Write volume anomalies to file
 # ------------------------------------------------------------------------------
 print('Writing files')
-scale_anom_tot.to_csv(scale_anom_out, index=True)
+write_table(scale_anom_tot, scale_anom_out, index=True)
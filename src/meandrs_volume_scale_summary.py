@@ -16,8 +16,8 @@ import os
 import sys
 import pandas as pd
 import numpy as np
-import glob
 import matplotlib.pyplot as plt
+from swot_io import glob_tables, read_table, write_table
 
 
 # ******************************************************************************
@@ -91,16 +91,16 @@ print('Reading files')
 # Volume Anomalies
 # ------------------------------------------------------------------------------
 # Read SWOT anomaly files
-swot_anom_files = sorted(list(glob.iglob(swot_anom_in + '*.csv')))
-swot_anom_all = [pd.read_csv(x) for x in swot_anom_files]
+swot_anom_files = glob_tables(swot_anom_in)
+swot_anom_all = [read_table(x) for x in swot_anom_files]
 
 # Read MeanDRS anomaly files
-meandrs_anom_files = sorted(list(glob.iglob(meandrs_anom_in + '*.csv')))
-meandrs_anom_all = [pd.read_csv(x) for x in meandrs_anom_files]
+meandrs_anom_files = glob_tables(meandrs_anom_in)
+meandrs_anom_all = [read_table(x) for x in meandrs_anom_files]
 
 # Read MeanDRS scaled anomaly files
-scale_anom_files = sorted(list(glob.iglob(scale_anom_in + '*.csv')))
-scale_anom_all = [pd.read_csv(x) for x in scale_anom_files]
+scale_anom_files = glob_tables(scale_anom_in)
+scale_anom_all = [read_table(x) for x in scale_anom_files]
 
 # Retrieve list of pfaf ids
 pfaf_list = pd.Series([x.partition("pfaf_")[-1][0:2] for x in swot_anom_files])
@@ -127,6 +127,10 @@ ls_scale_list = []
 # Initialize list to store scale_dfs
 scale_list = []
 
+# Write regional scaled volumes in the format (.csv or .parquet) of the global
+# ones
+reg_ext = os.path.splitext(scale_global_out)[1]
+
 for j in range(len(pfaf_list)):
 
     # Initialize dataframe to store values
@@ -134,7 +138,7 @@ for j in range(len(pfaf_list)):
 
     # Set output file path
     scale_fp = scale_reg_out + 'V_MeanDRS_scale_means_pfaf_' + \
-        pfaf_list[j] + '_2023-10-01_2024-09-30.csv'
+        pfaf_list[j] + '_2023-10-01_2024-09-30' + reg_ext
 
     # If no values in scale_df, write empty dataframe
     if len(scale_df) == 0:
@@ -144,7 +148,7 @@ for j in range(len(pfaf_list)):
                                          'mV_low_anom_swot',
                                          'mV_low_anom_ms',
                                          'V_SWOT_ms'])
-        scale_df.to_csv(scale_fp, index=False)
+        write_table(scale_df, scale_fp)
         continue
 
     # Retrieve SWOT and MeanDRS volume anomalies
@@ -191,7 +195,7 @@ for j in range(len(pfaf_list)):
     scale_list.append(scale_df)
 
     # Write to file
-    scale_df.to_csv(scale_fp, index=False)
+    write_table(scale_df, scale_fp)
 
 # Write global_scale_df to file
-global_scale_df.to_csv(scale_global_out, index=False)
+write_table(global_scale_df, scale_global_out)
@@ -16,9 +16,10 @@ import os
 import sys
 import pandas as pd
 import numpy as np
-import geopandas as gpd
 import glob
 import xarray as xr
+from shp_attrs import read_attrs
+from swot_io import read_table, write_table
 
 
 # ******************************************************************************
@@ -109,7 +110,7 @@ print('Reading files')
 # Volume
 # ------------------------------------------------------------------------------
 # Read V anomaly files
-V_anom = pd.read_csv(V_anom_in, index_col='reach_id')
+V_anom = read_table(V_anom_in, index_col='reach_id')
 
 # Convert columns to dates
 V_anom.columns = pd.to_datetime(V_anom.columns)
@@ -139,7 +140,7 @@ if len(ms_swot) != 0:
 # Else, write empty dataframe
 else:
     slice_df = pd.DataFrame(columns=['empty'])
-    slice_df.to_csv(slice_out, index=False)
+    write_table(slice_df, slice_out)
 
     # Exit with success code
     print('No corresponding MeanDRS reaches')
@@ -172,7 +173,7 @@ mV_low = [xr.open_dataset(x) for x in mV_low_in]
 mb_files = [glob.glob(mb_in + '*_pfaf_' + str(x) + '*.shp')[0] for x in regs]
 
 # Read MERIT-Basins shapefiles
-mb_shps = [gpd.read_file(x) for x in mb_files]
+mb_shps = [read_attrs(x, ['COMID', 'lengthkm']) for x in mb_files]
 
 # Create dictionary of MERIT-Basins reach lengths (in meters)
 mb_len = {}
@@ -187,7 +188,7 @@ sword_all = [glob.glob(sword_in + '*hb' + str(x) + '*.shp')[0] for
              x in regs]
 
 # Read sword shapefile
-sword_shps = [gpd.read_file(x) for x in sword_all]
+sword_shps = [read_attrs(x, ['reach_id', 'reach_len']) for x in sword_all]
 
 # Create dictionary of sword reach lengths
 sword_len = {}
@@ -404,4 +405,4 @@ slice_df.columns = ['mon', 'V_SWOT'] +\
     ['mV_low_' + x for x in yr_strs]
 
 # Write to file
-slice_df.to_csv(slice_out, index=False)
+write_table(slice_df, slice_out)
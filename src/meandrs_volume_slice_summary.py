@@ -17,12 +17,12 @@ import re
 import pandas as pd
 import numpy as np
 import geopandas as gpd
-import glob
 import xarray as xr
 import numpy as np
 import matplotlib.dates as mdates
 import matplotlib.pyplot as plt
 from datetime import datetime, timedelta
+from swot_io import glob_tables, read_table, write_table
 
 
 # ******************************************************************************
@@ -63,8 +63,8 @@ print('Reading files')
 # Volume Anomaly slices
 # ------------------------------------------------------------------------------
 # Read anomaly slices files
-slice_files = sorted(list(glob.iglob(slice_in + '*.csv')))
-slice_all = [pd.read_csv(x) for x in slice_files]
+slice_files = glob_tables(slice_in)
+slice_all = [read_table(x) for x in slice_files]
 
 
 # ******************************************************************************
@@ -81,4 +81,4 @@ slice_df = slice_df.sub(slice_df.mean())
 slice_df.insert(0, 'mon', slice_all[0]['mon'])
 
 # Write to file
-slice_df.to_csv(slice_out, index=False)
+write_table(slice_df, slice_out)
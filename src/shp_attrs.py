@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+# ******************************************************************************
+# shp_attrs.py
+# ******************************************************************************
+
+# Purpose:
+# Shared function for reading selected attribute columns of a shapefile (e.g.
+# SWORD reach_id and reach_len, or MERIT-Basins COMID and lengthkm) without
+# reading its geometries. Columns are read directly from the .dbf table, and
+# are cached in a Parquet file next to the shapefile so that later reads of
+# the same region only load the cached columns.
+# Author:
+# Jeffrey Wade, 2025
+
+
+# ******************************************************************************
+# Import Python modules
+# ******************************************************************************
+import os
+import numpy as np
+import pandas as pd
+
+
+# ******************************************************************************
+# Define functions
+# ******************************************************************************
+# Read columns of a dBASE (.dbf) table into a dataframe
+# Records are mapped from file and only the bytes of requested columns are
+# converted. Numeric columns without decimals are returned as int64 (float64
+# if any value is missing), other numeric columns as float64, character
+# columns as str, logical columns as bool and date columns as datetime64.
+# Deleted records are skipped.
+def read_dbf(dbf_in, columns, encoding='utf-8'):
+
+    # Read table header and field descriptors
+    with open(dbf_in, 'rb') as file:
+        head = file.read(32)
+        n_rec = int.from_bytes(head[4:8], 'little')
+        n_head = int.from_bytes(head[8:10], 'little')
+        n_len = int.from_bytes(head[10:12], 'little')
+        desc = file.read(n_head - 32)
+
+    fields = {}
+    offset = 1
+    for i in range(0, len(desc) - 31, 32):
+        if desc[i] == 0x0D:
+            break
+        name = desc[i:i + 11].split(b'\x00')[0].decode(encoding)
+        fields[name] = (chr(desc[i + 11]), offset, desc[i + 16],
+                        desc[i + 17])
+        offset += desc[i + 16]
+
+    missing = [x for x in columns if x not in fields]
+    if missing:
+        raise KeyError('Columns not found in ' + dbf_in + ': ' +
+                       ', '.join(missing))
+
+    # Map records, dropping deleted records
+    rec = np.memmap(dbf_in, dtype=np.uint8, mode='r', offset=n_head,
+                    shape=(n_rec, n_len))
+    keep = rec[:, 0] != ord('*')
+
+    df = pd.DataFrame(index=pd.RangeIndex(int(keep.sum())))
+    for name in columns:
+        f_type, f_off, f_len, f_dec = fields[name]
+        raw = np.ascontiguousarray(rec[keep, f_off:f_off + f_len]) \
+            .view('S' + str(f_len)).ravel()
+
+        if f_type in 'NF':
+            val = np.char.strip(raw)
+            blank = (val == b'') | (np.char.find(val, b'*') >= 0)
+            if f_type == 'N' and f_dec == 0 and not blank.any():
+                df[name] = val.astype(np.int64)
+            else:
+                val[blank] = b'nan'
+                df[name] = val.astype(np.float64)
+        elif f_type == 'L':
+            df[name] = np.isin(raw, [b'T', b't', b'Y', b'y'])
+        elif f_type == 'D':
+            df[name] = pd.to_datetime(np.char.decode(raw, 'ascii'),
+                                      format='%Y%m%d', errors='coerce')
+        else:
+            df[name] = np.char.rstrip(np.char.decode(raw, encoding,
+                                                     'replace')) \
+                .astype(object)
+
+    return df
+
+
+# Read attribute columns of a shapefile without its geometries
+# Columns are cached in <shapefile>_attrs.parquet. The cache is used if it is
+# newer than the .dbf table and holds every requested column, and is otherwise
+# rebuilt from the .dbf table with the union of cached and requested columns.
+# If the cache cannot be written (e.g. read-only folder), columns are read from
+# the .dbf table every time.
+def read_attrs(shp_in, columns):
+
+    stem = os.path.splitext(shp_in)[0]
+    dbf_in = stem + '.dbf'
+    attrs_in = stem + '_attrs.parquet'
+
+    cols = []
+    if os.path.exists(attrs_in) and \
+            os.path.getmtime(attrs_in) >= os.path.getmtime(dbf_in):
+        import pyarrow.parquet as pq
+        cols = pq.read_schema(attrs_in).names
+        if all(x in cols for x in columns):
+            return pd.read_parquet(attrs_in, columns=columns)
+
+    # Read encoding of character columns, if given
+    encoding = 'utf-8'
+    if os.path.exists(stem + '.cpg'):
+        with open(stem + '.cpg') as file:
+            encoding = file.read().strip() or encoding
+
+    cols = cols + [x for x in columns if x not in cols]
+    df = read_dbf(dbf_in, cols, encoding)
+
+    try:
+        df.to_parquet(attrs_in + '.tmp', index=False)
+        os.replace(attrs_in + '.tmp', attrs_in)
+    except OSError:
+        pass
+
+    return df[columns]
@@ -11,13 +11,12 @@
 # Import Python modules
 # ******************************************************************************
 import sys
-import requests
-import io
-from datetime import datetime, timedelta
-import pandas as pd
 import numpy as np
-import geopandas as gpd
 import earthaccess
+from hydrocron_client import SWOT_VARS, N_CONC, MAX_RATE, dwnl_reaches
+from hydrocron_cache import HydrocronCache, CACHE_MB
+from swot_io import SwotWriter, write_failed
+from shp_attrs import read_attrs
 
 
 # ******************************************************************************
@@ -27,14 +26,18 @@ import earthaccess
 # 2 - date1
 # 3 - date2
 # 4 - swot_out
+# 5 - n_conc (optional, number of concurrent requests)
+# 6 - cache_dir (optional, folder of cached reach responses)
+# 7 - cache_mb (optional, cache size limit in MB)
+# 8 - max_rate (optional, maximum requests per second)
 
 
 # ******************************************************************************
 # Get command line arguments
 # ******************************************************************************
 IS_arg = len(sys.argv)
-if IS_arg != 5:
-    print('ERROR - 4 arguments must be used')
+if IS_arg < 5 or IS_arg > 9:
+    print('ERROR - 4 to 8 arguments must be used')
     raise SystemExit(22)
 
 sword_in = sys.argv[1]
@@ -42,6 +45,26 @@ date1 = sys.argv[2]
 date2 = sys.argv[3]
 swot_out = sys.argv[4]
 
+if IS_arg > 5:
+    n_conc = int(sys.argv[5])
+else:
+    n_conc = N_CONC
+
+if IS_arg > 6:
+    cache_dir = sys.argv[6]
+else:
+    cache_dir = None
+
+if IS_arg > 7:
+    cache_mb = float(sys.argv[7])
+else:
+    cache_mb = CACHE_MB
+
+if IS_arg > 8:
+    max_rate = float(sys.argv[8])
+else:
+    max_rate = MAX_RATE
+
 
 # ******************************************************************************
 # Check if inputs exist
@@ -67,8 +90,8 @@ print('Reading files')
 # ------------------------------------------------------------------------------
 # SWORD reach file
 # ------------------------------------------------------------------------------
-# Load sword reach file
-sword_i = gpd.read_file(sword_in, crs="EPSG:4326")
+# Load sword reach ids, without geometries
+sword_i = read_attrs(sword_in, ['reach_id'])
 
 # Retrieve pfaf numbers from file
 pfaf_num = sword_in.partition("reaches_hb")[-1][0:2]
@@ -78,14 +101,6 @@ pfaf_num = sword_in.partition("reaches_hb")[-1][0:2]
 # Make API call to Hydrocron for each pfaf region and reach
 # ******************************************************************************
 print('Making API calls to Hydrocron')
-# Set variables of interest
-swot_vars = 'reach_id,time,wse,wse_u,wse_r_u,width,width_u,'\
-    'reach_q,reach_q_b,dark_frac,ice_clim_f,ice_dyn_f,xtrk_dist,'\
-    'obs_frac_n,xovr_cal_q,p_length,crid'
-
-# Define base date
-base_date = datetime(2000, 1, 1)
-
 # Read reach ids
 rch_id = sword_i.reach_id
 
@@ -93,69 +108,32 @@ rch_id = sword_i.reach_id
 rch_type = np.array([x % 10 for x in rch_id])
 rch_id = rch_id[rch_type != 6]
 
-# Create API calls
-api_calls = ['https://soto.podaac.earthdatacloud.nasa.gov/hydrocron/v1/'
-             'timeseries?feature=Reach&feature_id=' + str(x) +
-             '&output=csv&start_time=' + date1 + 'T00:00:00Z&'
-             'end_time=' + date2 + 'T23:59:59Z&fields=' + swot_vars
-             for x in rch_id]
+# Create API queries
+queries = [(x, date1 + 'T00:00:00Z', date2 + 'T23:59:59Z') for x in rch_id]
 
-# Initialize dataframe
-swot_df = None
-
-# Loop through api_calls
-for j in range(len(api_calls)):
-
-    # print(j)
-
-    # Make API call
-    response = requests.get(api_calls[j]).json()
-
-    # Check request status, catching errors in api call
-    if 'error' in response:
-        print('Error:', response['error'])
-    else:
-        try:
-            if response['status'] == '200 OK':
-
-                # Retrieve csv string
-                csv_str = response['results']['csv']
-
-                # Convert to dataframe
-                df = pd.read_csv(io.StringIO(csv_str))
-
-                # Drop rows with negative times
-                df = df[df['time'] >= 0]
-
-                # If df has no valid observations, skip to next reach
-                if len(df) == 0:
-                    continue
+# Open cache of reach responses
+if cache_dir is not None:
+    cache = HydrocronCache(cache_dir, cache_mb)
+else:
+    cache = None
 
-                # Drop all unit columns
-                df = df[df.columns.drop(list(df.filter(like='units')))]
+# Open writer, appending reaches to file as they are downloaded
+swot_wrt = SwotWriter(swot_out, SWOT_VARS.split(','))
 
-                # Convert times
-                df['time'] = df['time'].apply(lambda x: base_date +
-                                              timedelta(seconds=x))
+# Loop through reach responses, n_conc requests at a time
+failed = []
+for df in dwnl_reaches(queries, n_conc, cache, max_rate=max_rate,
+                       failed=failed):
 
-                # For first file, start new dataframe
-                if swot_df is None:
-                    swot_df = df.copy()
-                # For subsequent files, append to dataframe
-                else:
-                    swot_df = pd.concat([swot_df, df], ignore_index=True)
+    # If reach has no valid observations, skip to next reach
+    if df is None:
+        continue
 
-            # Catch other errors
-            else:
-                print('Error:', response['response'])
+    swot_wrt.write(df)
 
-        except KeyError as e:
-            print(f"KeyError: {e}. The status key does not exist.")
+# Write remaining observations, or empty file if region has no valid
+# observations
+swot_wrt.close()
 
-# Write to file if region has valid observations
-if swot_df is not None:
-    swot_df.to_csv(swot_out, index=False)
-# Otherwise, write empty dataframe
-else:
-    swot_df = pd.DataFrame(columns=swot_vars.split(','))
-    swot_df.to_csv(swot_out, index=False)
+# List reaches that could not be downloaded
+write_failed(swot_out, failed)
@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+# ******************************************************************************
+# swot_dwnl_hydrocron_all.py
+# ******************************************************************************
+# Purpose:
+# Download SWOT L2 HR River Data Products for every SWORD region using
+# Hydrocron. Reaches of all regions are requested through one shared pool of
+# n_conc concurrent requests, so that requests of the next region start while
+# the last requests of the previous region finish. Each region is written to
+# its own file, which is renamed into place once the region is complete.
+# Completed regions are recorded in a progress file in the output folder, so
+# that an interrupted download resumes with the remaining regions (with a
+# cache folder, reaches already downloaded in partially complete regions are
+# read from the cache). The progress file is removed once all regions are
+# done, so that the next run downloads every region again.
+# Author:
+# Jeffrey Wade, 2025
+
+# ******************************************************************************
+# Import Python modules
+# ******************************************************************************
+import sys
+import os
+import glob
+import time
+import earthaccess
+from hydrocron_client import SWOT_VARS, N_CONC, MAX_RATE, dwnl_queries
+from hydrocron_cache import HydrocronCache, CACHE_MB
+from swot_io import SwotWriter, write_failed
+from shp_attrs import read_attrs
+
+
+# ******************************************************************************
+# Declaration of variables (given as command line arguments)
+# ******************************************************************************
+# 1 - sword_in (folder of SWORD reach shapefiles)
+# 2 - date1
+# 3 - date2
+# 4 - swot_out (folder of SWOT observation files)
+# 5 - n_conc (optional, number of concurrent requests)
+# 6 - cache_dir (optional, folder of cached reach responses)
+# 7 - cache_mb (optional, cache size limit in MB)
+# 8 - max_rate (optional, maximum requests per second)
+
+
+# ******************************************************************************
+# Get command line arguments
+# ******************************************************************************
+IS_arg = len(sys.argv)
+if IS_arg < 5 or IS_arg > 9:
+    print('ERROR - 4 to 8 arguments must be used')
+    raise SystemExit(22)
+
+sword_in = sys.argv[1]
+date1 = sys.argv[2]
+date2 = sys.argv[3]
+swot_out = sys.argv[4]
+
+if IS_arg > 5:
+    n_conc = int(sys.argv[5])
+else:
+    n_conc = N_CONC
+
+if IS_arg > 6:
+    cache_dir = sys.argv[6]
+else:
+    cache_dir = None
+
+if IS_arg > 7:
+    cache_mb = float(sys.argv[7])
+else:
+    cache_mb = CACHE_MB
+
+if IS_arg > 8:
+    max_rate = float(sys.argv[8])
+else:
+    max_rate = MAX_RATE
+
+
+# ******************************************************************************
+# Check if inputs exist
+# ******************************************************************************
+sword_files = sorted(glob.glob(os.path.join(sword_in, '*reaches_hb*.shp')))
+if len(sword_files) == 0:
+    print('ERROR - No SWORD reach shapefiles found in ' + sword_in)
+    raise SystemExit(22)
+
+os.makedirs(swot_out, exist_ok=True)
+
+
+# ******************************************************************************
+# Earthdata Authentication
+# ******************************************************************************
+earthaccess.login()
+
+
+# ******************************************************************************
+# Read files
+# ******************************************************************************
+print('Reading files')
+# ------------------------------------------------------------------------------
+# SWORD reach files
+# ------------------------------------------------------------------------------
+# Retrieve pfaf numbers from files, sorting regions by pfaf
+pfaf_list = [x.partition("reaches_hb")[-1][0:2] for x in sword_files]
+sword_files = [x for _, x in sorted(zip(pfaf_list, sword_files))]
+pfaf_list = sorted(pfaf_list)
+
+# Output file of each region
+out_files = [os.path.join(swot_out, 'swot_pfaf_' + x + '_' + date1 + '_' +
+                          date2 + '.csv') for x in pfaf_list]
+
+# Skip regions completed by an interrupted run
+prog_file = os.path.join(swot_out, 'swot_dwnl_' + date1 + '_' + date2 +
+                         '.progress')
+pfaf_done = []
+if os.path.exists(prog_file):
+    with open(prog_file) as file:
+        pfaf_done = file.read().split()
+
+regs = [i for i in range(len(pfaf_list)) if pfaf_list[i] not in pfaf_done or
+        not os.path.exists(out_files[i])]
+print('Regions already downloaded:', len(pfaf_list) - len(regs))
+
+# Load sword reach ids of remaining regions, removing ghost reaches (type 6)
+rch_ids = {}
+for i in regs:
+    rch_id = read_attrs(sword_files[i], ['reach_id']).reach_id.values
+    rch_ids[i] = rch_id[rch_id % 10 != 6]
+
+n_rch = sum(len(x) for x in rch_ids.values())
+print('Regions to download:', len(regs), '| Reaches:', n_rch)
+
+
+# ******************************************************************************
+# Make API call to Hydrocron for all regions and reaches
+# ******************************************************************************
+print('Making API calls to Hydrocron')
+# Open cache of reach responses
+if cache_dir is not None:
+    cache = HydrocronCache(cache_dir, cache_mb)
+else:
+    cache = None
+
+# Index of region of each reach
+reg_idx = {}
+for i in regs:
+    reg_idx.update(dict.fromkeys(rch_ids[i].tolist(), i))
+
+
+# Yield API queries of all regions, in region order
+def queries():
+    for i in regs:
+        for x in rch_ids[i]:
+            yield (x, date1 + 'T00:00:00Z', date2 + 'T23:59:59Z')
+
+
+# Write file of a region once all its reaches are done
+def close_region(i):
+    writers[i].close()
+    os.replace(writers[i].path, out_files[i])
+    write_failed(out_files[i], failed[i])
+    with open(prog_file, 'a') as file:
+        file.write(pfaf_list[i] + '\n')
+    print('Region ' + pfaf_list[i] + ' done | Reaches: ' +
+          str(len(rch_ids[i])) + ' | Observations: ' +
+          str(writers[i].n_rows) + ' | Elapsed: ' +
+          f'{time.perf_counter() - t_start:.0f} s')
+    del writers[i]
+
+
+# Open writers of each region lazily, writing to temporary files
+writers = {}
+n_left = {i: len(rch_ids[i]) for i in regs}
+failed = {i: [] for i in regs}
+t_start = time.perf_counter()
+n_done = 0
+
+# Write regions without reaches
+for i in regs:
+    if n_left[i] == 0:
+        writers[i] = SwotWriter(out_files[i][:-4] + '.part.csv',
+                                SWOT_VARS.split(','))
+        close_region(i)
+
+# Loop through reach responses of all regions, n_conc requests at a time
+for query, df in dwnl_queries(queries(), n_conc, cache, max_rate=max_rate):
+
+    i = reg_idx[query[0]]
+    if i not in writers:
+        writers[i] = SwotWriter(out_files[i][:-4] + '.part.csv',
+                                SWOT_VARS.split(','))
+
+    if df is False:
+        failed[i].append(query)
+    elif df is not None:
+        writers[i].write(df)
+
+    # Close region once all of its reaches are done
+    n_left[i] -= 1
+    if n_left[i] == 0:
+        close_region(i)
+
+    # Report overall progress
+    n_done += 1
+    if n_done % 10000 == 0:
+        print('Reaches done:', n_done, 'of', n_rch)
+
+# All regions are done, so that the next run starts again
+os.remove(prog_file)
+print('All regions downloaded')
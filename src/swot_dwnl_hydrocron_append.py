@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+# ******************************************************************************
+# swot_dwnl_hydrocron_append.py
+# ******************************************************************************
+# Purpose:
+# Extend an existing file of SWOT L2 HR River Data Products with new passes
+# using Hydrocron. Each reach is only requested from its last observed time
+# onwards, so a refresh downloads one SWOT cycle rather than the full record.
+# Author:
+# Jeffrey Wade, 2025
+
+# ******************************************************************************
+# Import Python modules
+# ******************************************************************************
+import sys
+import pandas as pd
+import numpy as np
+import earthaccess
+from hydrocron_client import SWOT_VARS, N_CONC, MAX_RATE, dwnl_reaches
+from hydrocron_cache import HydrocronCache, CACHE_MB
+from swot_io import read_swot, write_failed, write_table
+from shp_attrs import read_attrs
+
+
+# ******************************************************************************
+# Declaration of variables (given as command line arguments)
+# ******************************************************************************
+# 1 - sword_in
+# 2 - swot_in (existing file of SWOT observations, .csv or .parquet)
+# 3 - date1 (start date for reaches absent from swot_in)
+# 4 - date2
+# 5 - swot_out
+# 6 - n_conc (optional, number of concurrent requests)
+# 7 - cache_dir (optional, folder of cached reach responses)
+# 8 - cache_mb (optional, cache size limit in MB)
+# 9 - max_rate (optional, maximum requests per second)
+
+
+# ******************************************************************************
+# Get command line arguments
+# ******************************************************************************
+IS_arg = len(sys.argv)
+if IS_arg < 6 or IS_arg > 10:
+    print('ERROR - 5 to 9 arguments must be used')
+    raise SystemExit(22)
+
+sword_in = sys.argv[1]
+swot_in = sys.argv[2]
+date1 = sys.argv[3]
+date2 = sys.argv[4]
+swot_out = sys.argv[5]
+
+if IS_arg > 6:
+    n_conc = int(sys.argv[6])
+else:
+    n_conc = N_CONC
+
+if IS_arg > 7:
+    cache_dir = sys.argv[7]
+else:
+    cache_dir = None
+
+if IS_arg > 8:
+    cache_mb = float(sys.argv[8])
+else:
+    cache_mb = CACHE_MB
+
+if IS_arg > 9:
+    max_rate = float(sys.argv[9])
+else:
+    max_rate = MAX_RATE
+
+
+# ******************************************************************************
+# Check if inputs exist
+# ******************************************************************************
+try:
+    with open(sword_in) as file:
+        pass
+except IOError:
+    print('ERROR - Unable to open ' + sword_in)
+    raise SystemExit(22)
+
+try:
+    with open(swot_in) as file:
+        pass
+except IOError:
+    print('ERROR - Unable to open ' + swot_in)
+    raise SystemExit(22)
+
+
+# ******************************************************************************
+# Earthdata Authentication
+# ******************************************************************************
+earthaccess.login()
+
+
+# ******************************************************************************
+# Read files
+# ******************************************************************************
+print('Reading files')
+# ------------------------------------------------------------------------------
+# SWORD reach file
+# ------------------------------------------------------------------------------
+# Load sword reach ids, without geometries
+sword_i = read_attrs(sword_in, ['reach_id'])
+
+# ------------------------------------------------------------------------------
+# Existing SWOT observations
+# ------------------------------------------------------------------------------
+# Read SWOT observation file, with times as datetime64
+swot_old = read_swot(swot_in, float_precision='round_trip')
+
+
+# ******************************************************************************
+# Make API call to Hydrocron for new passes at each reach
+# ******************************************************************************
+print('Making API calls to Hydrocron')
+# Read reach ids
+rch_id = sword_i.reach_id
+
+# Remove ghost reaches (type 6)
+rch_type = np.array([x % 10 for x in rch_id])
+rch_id = rch_id[rch_type != 6]
+
+# Find last observed time at each reach
+t_last = swot_old.groupby('reach_id').time.max()
+
+# Request each reach from its last observed time (truncated to seconds), or
+# from date1 if the reach has no previous observations. The last observation
+# is requested again and removed as a duplicate below.
+start_time = [t_last[x].strftime('%Y-%m-%dT%H:%M:%SZ') if x in t_last.index
+              else date1 + 'T00:00:00Z' for x in rch_id]
+
+# Create API queries
+queries = [(x, t, date2 + 'T23:59:59Z') for x, t in zip(rch_id, start_time)]
+
+# Open cache of reach responses
+if cache_dir is not None:
+    cache = HydrocronCache(cache_dir, cache_mb)
+else:
+    cache = None
+
+# Retrieve new observations, n_conc requests at a time
+failed = []
+swot_new = [df for df in dwnl_reaches(queries, n_conc, cache,
+                                      max_rate=max_rate, failed=failed)
+            if df is not None]
+
+
+# ******************************************************************************
+# Merge new observations into existing observations
+# ******************************************************************************
+print('Merging observations')
+# Append new observations
+swot_df = pd.concat([swot_old] + swot_new, ignore_index=True)
+
+# Drop observations that were downloaded twice
+n_old = len(swot_old)
+swot_df = swot_df.drop_duplicates(subset=['reach_id', 'time'])
+print('New observations:', len(swot_df) - n_old)
+
+# Group observations by reach, following order of reaches in SWORD
+rch_order = pd.Series(np.arange(len(rch_id)), index=rch_id.values)
+swot_df = swot_df.iloc[np.argsort(swot_df.reach_id.map(rch_order).values,
+                                  kind='stable')]
+
+# Write to file
+if len(swot_df) == 0:
+    swot_df = pd.DataFrame(columns=SWOT_VARS.split(','))
+
+write_table(swot_df, swot_out)
+
+# List reaches that could not be downloaded
+write_failed(swot_out, failed)
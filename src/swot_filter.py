@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+# ******************************************************************************
+# swot_filter.py
+# ******************************************************************************
+
+# Purpose:
+# Shared quality filter of SWOT reach observations. Observations are kept if
+# they pass every quality, geometry and reach type criterion, and reaches are
+# kept if they have at least 5 kept observations within a reasonable WSE
+# range. The keep-mask of observations and the kept reach ids are cached in a
+# file next to the SWOT observation file, so that later scripts filtering the
+# same, unmodified file only load them.
+# Author:
+# Jeffrey Wade, 2025
+
+
+# ******************************************************************************
+# Import Python modules
+# ******************************************************************************
+import os
+import numpy as np
+import pandas as pd
+
+
+# ******************************************************************************
+# Declaration of constants
+# ******************************************************************************
+# Maximum reach quality flag (reach_q < 3)
+MAX_REACH_Q = 3
+
+# Maximum crossover calibration quality flag (xovr_cal_q < 1)
+MAX_XOVR_CAL_Q = 1
+
+# Maximum fraction of dark water (dark_frac < 0.3)
+MAX_DARK_FRAC = 0.3
+
+# Minimum fraction of nodes of reach observed (obs_frac_n > 0.5)
+MIN_OBS_FRAC_N = 0.5
+
+# Range of absolute cross-track distance (m)
+XTRK_DIST = (10000, 60000)
+
+# Minimum valid wse and width
+MIN_WSE_WIDTH = -1e5
+
+# Reach types kept (last digit of reach id)
+RCH_TYPES = [1, 5]
+
+# Minimum number of kept observations of a reach
+MIN_NOBS = 5
+
+# Maximum WSE range of a reach (m)
+MAX_WSE_RNG = 20
+
+# Columns of SWOT observations used by the filter
+FILTER_COLS = ['reach_id', 'reach_q', 'xovr_cal_q', 'dark_frac', 'ice_clim_f',
+               'obs_frac_n', 'xtrk_dist', 'wse', 'width']
+
+# Criteria recorded in cached masks, which are recomputed if they change
+CRITERIA = repr([MAX_REACH_Q, MAX_XOVR_CAL_Q, MAX_DARK_FRAC, MIN_OBS_FRAC_N,
+                 XTRK_DIST, MIN_WSE_WIDTH, RCH_TYPES, MIN_NOBS, MAX_WSE_RNG])
+
+
+# ******************************************************************************
+# Define functions
+# ******************************************************************************
+# Compute keep-mask of SWOT observations, as a boolean array of rows of
+# swot_df passing every criterion
+def swot_keep(swot_df):
+
+    xtrk = swot_df['xtrk_dist'].values
+    xtrk_abs_ok = (((xtrk >= XTRK_DIST[0]) & (xtrk <= XTRK_DIST[1])) |
+                   ((xtrk <= -XTRK_DIST[0]) & (xtrk >= -XTRK_DIST[1])))
+
+    return ((swot_df['reach_q'].values < MAX_REACH_Q) &
+            (swot_df['xovr_cal_q'].values < MAX_XOVR_CAL_Q) &
+            (swot_df['dark_frac'].values < MAX_DARK_FRAC) &
+            (swot_df['ice_clim_f'].values == 0) &
+            (swot_df['obs_frac_n'].values > MIN_OBS_FRAC_N) &
+            xtrk_abs_ok &
+            (swot_df['wse'].values >= MIN_WSE_WIDTH) &
+            (swot_df['width'].values >= MIN_WSE_WIDTH) &
+            np.isin(swot_df['reach_id'].values % 10, RCH_TYPES))
+
+
+# Retrieve ids of reaches with at least MIN_NOBS kept observations and a WSE
+# range of kept observations of at most MAX_WSE_RNG, ordered by decreasing
+# number of kept observations
+def swot_reaches(swot_df, keep):
+
+    rch_id = swot_df['reach_id'][keep]
+    wse = swot_df['wse'][keep]
+
+    rch_counts = rch_id.value_counts()
+    rch_ids = rch_counts.index[rch_counts >= MIN_NOBS]
+
+    wse_rng = wse.groupby(rch_id.values).agg(['min', 'max'])
+    wse_rng = wse_rng['max'] - wse_rng['min']
+
+    return rch_ids[~(wse_rng[rch_ids].values > MAX_WSE_RNG)]
+
+
+# Filter SWOT observations read from swot_in
+# Returns the keep-mask of the rows of swot_df and the kept reach ids. Both
+# are cached in <swot_in>_mask.npz, together with the size and modification
+# time (ns) of swot_in. The cache is used if swot_in still has this size and
+# modification time and the cache was computed with the same criteria for the
+# same number of rows, and is otherwise recomputed. If the cache cannot be
+# written (e.g. read-only folder), the filter is computed every time.
+def filter_swot(swot_in, swot_df):
+
+    mask_in = swot_in + '_mask.npz'
+    stat = os.stat(swot_in)
+    swot_stat = np.array([stat.st_size, stat.st_mtime_ns], dtype=np.int64)
+
+    if os.path.exists(mask_in):
+        try:
+            with np.load(mask_in) as mask:
+                if np.array_equal(mask['swot_stat'], swot_stat) and \
+                        str(mask['criteria']) == CRITERIA and \
+                        len(mask['keep']) == len(swot_df):
+                    return mask['keep'], pd.Index(mask['rch_ids'],
+                                                  name='reach_id')
+        except (OSError, ValueError, KeyError):
+            pass
+
+    keep = swot_keep(swot_df)
+    rch_ids = swot_reaches(swot_df, keep)
+
+    try:
+        with open(mask_in + '.tmp', 'wb') as file:
+            np.savez(file, keep=keep, rch_ids=rch_ids.values,
+                     criteria=CRITERIA, swot_stat=swot_stat)
+        os.replace(mask_in + '.tmp', mask_in)
+    except OSError:
+        pass
+
+    return keep, rch_ids
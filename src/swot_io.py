@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+# ******************************************************************************
+# swot_io.py
+# ******************************************************************************
+
+# Purpose:
+# Shared functions for reading and writing SWOT observation files and the
+# tables passed between stages of the workflow. Files are read and written as
+# csv or Parquet depending on their extension. Parquet files are compressed,
+# keep column types, and can be read for a subset of columns only.
+# Author:
+# Jeffrey Wade, 2025
+
+
+# ******************************************************************************
+# Import Python modules
+# ******************************************************************************
+import os
+import io
+import csv
+import glob
+import numpy as np
+import pandas as pd
+
+
+# ******************************************************************************
+# Declaration of constants
+# ******************************************************************************
+# Default number of rows buffered before writing to file
+BATCH_ROWS = 20000
+
+# Compression of Parquet files
+PARQUET_COMP = 'zstd'
+
+
+# ******************************************************************************
+# Define functions
+# ******************************************************************************
+# Read SWOT observation file (.csv or .parquet), returning times as datetime64
+# Parquet files store times as timestamps and need no conversion; csv times
+# are parsed in a single vectorized pass. Only the given columns are read if
+# columns is not None. Keyword arguments are passed to pd.read_csv.
+def read_swot(path, columns=None, **kwargs):
+    if path.endswith('.parquet'):
+        df = pd.read_parquet(path, columns=columns)
+    else:
+        df = pd.read_csv(path, usecols=columns, **kwargs)
+
+    if 'time' in df.columns and \
+            not pd.api.types.is_datetime64_any_dtype(df['time']):
+        df['time'] = pd.to_datetime(df['time'], format='ISO8601')
+
+    return df
+
+
+# Read table written by write_table (.csv or .parquet)
+# Only the given columns (and index_col) are read if columns is not None, and
+# index_col is set as index if given.
+def read_table(path, columns=None, index_col=None):
+    if columns is not None and index_col is not None and \
+            index_col not in columns:
+        columns = [index_col] + list(columns)
+
+    if path.endswith('.parquet'):
+        df = pd.read_parquet(path, columns=columns)
+        if index_col is not None:
+            df = df.set_index(index_col)
+    else:
+        df = pd.read_csv(path, usecols=columns, index_col=index_col)
+
+    return df
+
+
+# Write table to a csv or Parquet file, including the index if index is True
+# Parquet columns are named as the header of the csv file would be (e.g.
+# dates as YYYY-MM-DD), so that both formats are read back alike.
+def write_table(df, path, index=False):
+    if path.endswith('.parquet'):
+        header = df.head(0).to_csv(index=index)
+        if index:
+            df = df.reset_index()
+        df = df.set_axis(next(csv.reader(io.StringIO(header))), axis=1)
+        df.to_parquet(path, index=False, compression=PARQUET_COMP)
+    else:
+        df.to_csv(path, index=index)
+
+
+# Write series of values of reaches at dates, given as a long table of
+# reach_id, date and value columns (one row per observed value)
+# Parquet files keep the long table, sorted by reach and date, with float32
+# values and dates as date32, so that their size scales with the number of
+# values. csv files are written as a matrix of reaches (rows, rch_ids) by
+# dates (columns, dates), NaN where a reach has no value, as published.
+def write_series(V_df, path, rch_ids, dates):
+    if path.endswith('.parquet'):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        V_df = V_df.sort_values(['reach_id', 'date'], kind='stable')
+        table = pa.table({
+            'reach_id': V_df['reach_id'].values,
+            'date': pa.array(V_df['date'].values.astype('datetime64[D]')),
+            'value': V_df['value'].values.astype('float32')})
+        pq.write_table(table, path, compression=PARQUET_COMP)
+    else:
+        rch_ind = pd.Index(rch_ids).get_indexer(V_df['reach_id'].values)
+        date_ind = pd.Index(np.array(dates, dtype='datetime64[D]')) \
+            .get_indexer(V_df['date'].values.astype('datetime64[D]'))
+
+        V = np.full((len(rch_ids), len(dates)), np.nan)
+        V[rch_ind, date_ind] = V_df['value'].values
+        write_table(pd.DataFrame(V, index=pd.Index(rch_ids, name='reach_id'),
+                                 columns=dates), path, index=True)
+
+
+# Read series written by write_series, returning a long table of reach_id,
+# date (datetime64) and value (float64) columns, without missing values,
+# sorted by reach and date. Wide tables of reaches by dates are also read.
+def read_series(path):
+    if path.endswith('.parquet'):
+        import pyarrow.parquet as pq
+
+        table = pq.read_table(path)
+        if table.column_names == ['reach_id', 'date', 'value']:
+            V_df = table.to_pandas(date_as_object=False)
+            V_df['date'] = V_df['date'].astype('datetime64[ns]')
+            V_df['value'] = V_df['value'].astype('float64')
+            return V_df
+
+    V = read_table(path, index_col='reach_id')
+    rch_ind, date_ind = np.nonzero(pd.notna(V.values))
+    rch_ids = V.index.values[rch_ind]
+    dates = pd.to_datetime(V.columns).values[date_ind]
+    order = np.lexsort((dates, rch_ids))
+
+    return pd.DataFrame({'reach_id': rch_ids[order],
+                         'date': dates[order],
+                         'value': V.values[rch_ind, date_ind][order]})
+
+
+# Retrieve sorted paths of the tables (.csv or .parquet) starting with prefix
+# If a table was written in both formats, the Parquet file is used.
+def glob_tables(prefix):
+    tables = {}
+    for path in glob.glob(prefix + '*.csv') + glob.glob(prefix + '*.parquet'):
+        stem = os.path.splitext(path)[0]
+        if stem not in tables or path.endswith('.parquet'):
+            tables[stem] = path
+    return [tables[x] for x in sorted(tables)]
+
+
+# Write queries of reaches that could not be downloaded next to the output
+# file, as <output>_failed.csv. Removes an outdated list if every reach was
+# downloaded. Returns the path of the list.
+def write_failed(swot_out, failed):
+    failed_out = os.path.splitext(swot_out)[0] + '_failed.csv'
+    if failed:
+        print('Reaches not downloaded:', len(failed), '(listed in ' +
+              failed_out + ')')
+        pd.DataFrame(failed, columns=['reach_id', 'start_time', 'end_time']) \
+            .to_csv(failed_out, index=False)
+    elif os.path.exists(failed_out):
+        os.remove(failed_out)
+    return failed_out
+
+
+# ******************************************************************************
+# Define writer class
+# ******************************************************************************
+# Append dataframes to a csv or Parquet file as they arrive
+# Dataframes are buffered until batch_rows rows are reached, so that memory
+# use is bounded by one batch rather than by the size of the file
+class SwotWriter:
+
+    def __init__(self, path, columns, batch_rows=BATCH_ROWS):
+        self.path = path
+        self.columns = columns
+        self.batch_rows = batch_rows
+        self.parquet = path.endswith('.parquet')
+        self.buffer = []
+        self.n_buffer = 0
+        self.n_rows = 0
+        self.writer = None
+
+    # Add dataframe to buffer, writing buffer once batch is full
+    def write(self, df):
+        self.buffer.append(df)
+        self.n_buffer += len(df)
+        if self.n_buffer >= self.batch_rows:
+            self.flush()
+
+    # Write buffered dataframes to file
+    def flush(self):
+        if len(self.buffer) == 0:
+            return
+
+        df = pd.concat(self.buffer, ignore_index=True)
+        self.buffer = []
+        self.n_buffer = 0
+
+        if self.parquet:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+
+            # Schema of later batches follows the first batch
+            if self.writer is None:
+                table = pa.Table.from_pandas(df, preserve_index=False)
+                self.writer = pq.ParquetWriter(self.path, table.schema,
+                                               compression=PARQUET_COMP)
+            else:
+                table = pa.Table.from_pandas(df, schema=self.writer.schema,
+                                             preserve_index=False)
+            self.writer.write_table(table)
+        else:
+            df.to_csv(self.path, index=False, header=(self.n_rows == 0),
+                      mode='w' if self.n_rows == 0 else 'a')
+
+        self.n_rows += len(df)
+
+    # Write remaining rows and close file
+    # If no rows were written, write empty file with column names
+    def close(self):
+        self.flush()
+
+        if self.n_rows == 0:
+            df = pd.DataFrame(columns=self.columns)
+            if self.parquet:
+                df.to_parquet(self.path, index=False,
+                              compression=PARQUET_COMP)
+            else:
+                df.to_csv(self.path, index=False)
+
+        if self.writer is not None:
+            self.writer.close()
@@ -15,9 +15,10 @@ import os
 import sys
 import pandas as pd
 import numpy as np
-import geopandas as gpd
 import glob
 import xarray as xr
+from shp_attrs import read_attrs
+from swot_io import glob_tables, read_table, write_table
 
 
 # ******************************************************************************
@@ -76,8 +77,8 @@ print('Reading files')
 # Volume
 # ------------------------------------------------------------------------------
 # Read V anomaly files
-V_anom_files = sorted(list(glob.iglob(V_anom_in + '*.csv')))
-V_anom_all = [pd.read_csv(x, index_col='reach_id') for x in V_anom_files]
+V_anom_files = glob_tables(V_anom_in)
+V_anom_all = [read_table(x, index_col='reach_id') for x in V_anom_files]
 
 # Convert columns to dates
 for i in range(len(V_anom_all)):
@@ -107,7 +108,7 @@ sw_pfaf_list = pd.Series([x.partition("reaches_hb")[-1][0:2]
 sword_files = pd.Series(sword_files)[sw_pfaf_list.index.values].tolist()
 
 # Load SWORD shapefiles
-sword_all = [gpd.read_file(x) for x in sword_files]
+sword_all = [read_attrs(x, ['reach_id']) for x in sword_files]
 
 # Add empty dataframe at pfaf 35
 sword_all.insert(35, pd.DataFrame())
@@ -166,4 +167,4 @@ for i in range(len(V_anom_all)):
 obs_df = obs_df.sort_values(by="sword", ascending=True).reset_index(drop='True')
 
 # Write to file
-obs_df.to_csv(obs_out, index=False)
+write_table(obs_df, obs_out)
@@ -15,7 +15,10 @@ import sys
 import os
 import pandas as pd
 import numpy as np
-from datetime import datetime, timedelta
+from datetime import datetime
+import itertools
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
 
 
 # ******************************************************************************
@@ -24,20 +27,60 @@ from datetime import datetime, timedelta
 # 1 - swot_in
 # 2 - V_out
 # 3 - fit_out
+# 4 - n_proc (optional, number of worker processes fitting reaches)
+# 5 - inner_solver (optional, 'reference', 'trust-constr-sums' or 'profile')
+# 6 - fit_opt (optional, FLaPE-Byrd breakpoint option, 3 or 4)
+# 7 - fit_in (optional, fit parameters of a previous run, warm starting fits,
+#     or 'none')
+# 8 - store_file (optional, store of fits, reused for unchanged reaches)
 
 
 # ******************************************************************************
 # Get command line arguments
 # ******************************************************************************
 IS_arg = len(sys.argv)
-if IS_arg != 4:
-    print('ERROR - 3 arguments must be used')
+if IS_arg < 4 or IS_arg > 9:
+    print('ERROR - 3 to 8 arguments must be used')
     raise SystemExit(22)
 
 swot_in = sys.argv[1]
 V_out = sys.argv[2]
 fit_out = sys.argv[3]
 
+if IS_arg > 4:
+    n_proc = int(sys.argv[4])
+else:
+    n_proc = 1
+
+if IS_arg > 5:
+    inner_solver = sys.argv[5]
+else:
+    inner_solver = 'reference'
+
+if inner_solver not in ['reference', 'trust-constr-sums', 'profile']:
+    print('ERROR - inner_solver must be reference, trust-constr-sums or '
+          'profile')
+    raise SystemExit(22)
+
+if IS_arg > 6:
+    fit_opt = int(sys.argv[6])
+else:
+    fit_opt = 3
+
+if fit_opt not in [3, 4]:
+    print('ERROR - fit_opt must be 3 or 4')
+    raise SystemExit(22)
+
+if IS_arg > 7 and sys.argv[7] != 'none':
+    fit_in = sys.argv[7]
+else:
+    fit_in = None
+
+if IS_arg > 8:
+    store_file = sys.argv[8]
+else:
+    store_file = None
+
 
 # ******************************************************************************
 # Check if inputs exist
@@ -49,9 +92,17 @@ except IOError:
     print('ERROR - Unable to open ' + swot_in)
     raise SystemExit(22)
 
+if fit_in is not None:
+    try:
+        with open(fit_in) as file:
+            pass
+    except IOError:
+        print('ERROR - Unable to open ' + fit_in)
+        raise SystemExit(22)
+
 
 # ******************************************************************************
-# Import FLaPE-Byrd ReachObservations function
+# Import FLaPE-Byrd fit function
 # ******************************************************************************
 print('Importing volume function')
 # Check if the code is running in a script or interactive session
@@ -62,67 +113,13 @@ else:
 
 src_dir = os.path.abspath(os.path.join(script_dir, '.', 'src'))
 sys.path.append(src_dir)
-from FLaPE_Byrd_main_jw.ReachObservations_jw import ReachObservations
-
-
-'''
-Required inputs to ReachObservations class
-D,RiverData,ConstrainHWSwitch=False,CalcAreaFitOpt=0,dAOpt=0,Verbose=False,σW=[]
-
-D:
-    nR = number of reaches
-    xkm = reach midpoint distance downstream [m]
-    L = reach lengths [m]
-    nt = number of overpasses
-    t = time [days]
-    dt = time delta between successive overpasses [seconds]
-
-RiverData:
-    h = water surface elevation (wse) [m]
-    h0 = wse at baseflow (minimum height?) [m]
-    S = water surface slope [-]
-    w = river width [m]
-    sigh = wse uncertainty standard deviation [m]
-    sigS = slope uncertainty standard deviation [-]
-    sigW = width uncertainty standard deviation [m] (?)
-    sigw = width uncertainty standard deviation [m]
-
-ConstrainHWSwitch:
-    True = Don't contrain?
-    False = Constrain?
-
-CalcAreaFitOpt:
-    0 = don't calculate
-    1 = use equal-spaced breakpoints
-    2 = optimize breakpoints & fits together
-    3 = optimize breakpoints, then optimize fits
-
-dAOpt:
-    0 = use MetroMan style calculation
-    1 = use SWOT L2 style calculation
-
-Verbose:
-    True = enable printing
-    False = disable printing
-
-σW:
-    empty = use sigW value
-    values = use σW values
-
-'''
-
-
-# ******************************************************************************
-# Set input class for FLaPE-Byrd ReachObservations
-# ******************************************************************************
-class Domain:
-    def __init__(self, RiverData):
-        self.nR = RiverData["nR"]  # number of reaches
-        self.xkm = RiverData["xkm"]  # reach midpoint distance downstream [m]
-        self.L = RiverData["L"]  # reach lengths, [m]
-        self.nt = RiverData["nt"]  # number of overpasses
-        self.t = RiverData["t"]  # time, [days]
-        self.dt = RiverData["dt"]  # time between success. overpasses, [seconds]
+import swot_volume_fit
+from swot_volume_fit import FIT_COLS, FIT_STATS, BATCH_RCH, fit_reaches, \
+    read_warm_starts, task_hash
+from fit_store import FitStore, FitCheckpoint
+from FLaPE_Byrd_main_jw import ReachObservations_jw
+from swot_io import read_swot, read_table, write_table, write_series
+from swot_filter import filter_swot, FILTER_COLS
 
 
 # ******************************************************************************
@@ -130,10 +127,17 @@ class Domain:
 # ******************************************************************************
 print('Loading files')
 # ------------------------------------------------------------------------------
-# Read processed csv files
+# Read processed files
 # ------------------------------------------------------------------------------
-# Read SWOT observation file
-swot_df = pd.read_csv(swot_in)
+# Read columns of SWOT observation file (.csv or .parquet) used by the filter
+# and the fits, with times as datetime64
+swot_df = read_swot(swot_in, columns=FILTER_COLS + ['time', 'p_length'])
+
+# Read fits of previous run, seeding the fits of reaches still present
+if fit_in is not None:
+    warm = read_warm_starts(read_table(fit_in))
+else:
+    warm = {}
 
 
 # ******************************************************************************
@@ -146,62 +150,22 @@ print('Perform EIV fits')
 # Find original number of reaches
 tot_rchs = np.unique(swot_df.reach_id)
 
-# Remove observations with reach_q flags == 3
-swot_df = swot_df[swot_df.reach_q < 3]
+# Keep observations passing quality filters, and reaches with >= 5 kept
+# observations and a reasonable WSE range (cached next to swot_in)
+keep, rch_ids = filter_swot(swot_in, swot_df)
+swot_df = swot_df[keep]
 
-# Remove crossover cal != 0
-swot_df = swot_df[swot_df.xovr_cal_q < 1]
-
-# Remove dark frack > 0.3
-swot_df = swot_df[swot_df.dark_frac < 0.3]
-
-# Remove ice_clim > 0
-swot_df = swot_df[swot_df.ice_clim_f == 0]
-
-# Remove obs_frac_n (fraction of nodes in reach observed) <  0.5
-swot_df = swot_df[swot_df.obs_frac_n > 0.5]
-
-# Remove observations close to or far from nadir
-swot_df = swot_df[((swot_df["xtrk_dist"] >= 10000) &
-                   (swot_df["xtrk_dist"] <= 60000)) |
-                  ((swot_df["xtrk_dist"] <= -10000) &
-                   (swot_df["xtrk_dist"] >= -60000))]
-
-# Remove non-Type 1 or 5 reaches
-rch_type = swot_df.reach_id % 10
-swot_df = swot_df[(rch_type == 1) | (rch_type == 5)]
-
-# Drop rows where wse or width are negative
-swot_df = swot_df[(swot_df['wse'] >= -1e5) & (swot_df['width'] >= -1e5)]
-
-# Find number of observations for each reach
-rch_counts = swot_df.reach_id.value_counts()
-
-# Retrieve reaches with >= 5 observations
-rch_ids = rch_counts.index[rch_counts >= 5]
-
-# Identify reaches where WSE range is abnormally high
-rch_remove = []
-for j in range(len(rch_ids)):
-
-    # Filter dataframe to reach of interest
-    swot_sel = swot_df[swot_df.reach_id == rch_ids[j]]
-
-    # If WSE range larger than reasonable threshold, remove reach
-    if swot_sel.wse.max() - swot_sel.wse.min() > 20:
-        rch_remove.append(rch_ids[j])
-
-# Drop rch_remove reachs from rch_ids
-rch_ids = rch_ids[~np.isin(rch_ids, rch_remove)]
-
-# Convert times to dates
-swot_date = [datetime.strptime(x, '%Y-%m-%d %H:%M:%S.%f').date() if '.' in x
-             else datetime.strptime(x, '%Y-%m-%d %H:%M:%S').date()
-             for x in swot_df.time]
+# Sort observations by reach, keeping the order of observations within each
+# reach, so that the observations of each reach form one contiguous slice
+swot_df = swot_df.sort_values('reach_id', kind='stable')
+rch_uniq, rch_start, rch_nobs = np.unique(swot_df.reach_id.values,
+                                          return_index=True,
+                                          return_counts=True)
+rch_slice = {rch_uniq[i]: slice(rch_start[i], rch_start[i] + rch_nobs[i])
+             for i in range(len(rch_uniq))}
 
 # Retrieve unique date values from SWOT observations
-date_obs = sorted(list(set(swot_date)))
-date_obs = [x for x in date_obs if pd.notna(x)]
+date_obs = sorted(swot_df.time.dropna().dt.date.unique())
 
 # Get unique mon-yrs
 mon_yrs = sorted(list(set([datetime.strftime(x, '%y-%m') for
@@ -210,10 +174,6 @@ mon_yrs = sorted(list(set([datetime.strftime(x, '%y-%m') for
 # ------------------------------------------------------------------------------
 # Prepare inputs to FLaPE-Byrd
 # ------------------------------------------------------------------------------
-# Create dataframe from list of SWOT observation dates
-V_eiv = pd.DataFrame(np.full((len(rch_ids), len(date_obs)), np.nan),
-                     columns=date_obs)
-
 # Create dataframe to store fit parameters
 fits_eiv = pd.DataFrame(np.full((len(rch_ids), 18), np.nan),
                         columns=['reach_id', 'fit_method', 'nobs',
@@ -247,217 +207,174 @@ fits_eiv.reach_id = rch_ids
 # ------------------------------------------------------------------------------
 # Compute EIV fits at each reach
 # ------------------------------------------------------------------------------
+# Assemble fit inputs of each reach
+tasks = []
 for j in range(len(rch_ids)):
 
-    print(j)
-
-    # Select reach of interest
-    rch_sel = rch_ids[j]
+    # Filter dataframe to reach of interest
+    swot_sel = swot_df.iloc[rch_slice[rch_ids[j]]]
+
+    # Retrieve reach length, observation times, wse, width and prior fit
+    tasks.append((rch_ids[j], swot_sel.p_length.values[0],
+                  swot_sel.time.values, swot_sel.wse.values,
+                  swot_sel.width.values, warm.get(rch_ids[j])))
+
+# Set solver and breakpoint option of the height-width fits, inherited by
+# forked workers
+ReachObservations_jw.InnerSolver = inner_solver
+swot_volume_fit.FIT_OPT = fit_opt
+
+# Reuse stored fits of reaches whose observations and fit options have not
+# changed since the previous run, refitting the other reaches
+# Refit reaches are warm started only from an explicitly given fits file
+keys = [task_hash(x) for x in tasks]
+recs = [None] * len(tasks)
+if store_file is not None:
+    store = FitStore(store_file)
+    for j in range(len(tasks)):
+        recs[j] = store.get(rch_ids[j], keys[j])
+
+# Reuse fits of reaches done by an interrupted run with the same outputs,
+# appending the fits of the remaining reaches to its checkpoint
+ckpt = FitCheckpoint(fit_out + '.ckpt')
+n_done = 0
+for j in range(len(tasks)):
+    if recs[j] is None:
+        recs[j] = ckpt.get(rch_ids[j], keys[j])
+        n_done += recs[j] is not None
+if n_done > 0:
+    print('Resuming interrupted run | Reaches already done: ' + str(n_done))
+
+i_fit = [j for j in range(len(tasks)) if recs[j] is None]
+
+print('Reaches reused from fit store or checkpoint: ' +
+      str(len(tasks) - len(i_fit)) + ' | Reaches to fit: ' + str(len(i_fit)))
+
+# Fit reaches in batches of reaches, spread over n_proc worker processes
+# Results are returned in order of reaches, whatever the number of workers
+# Workers are forked, as this script cannot be re-imported by spawned workers
+tasks_fit = [tasks[j] for j in i_fit]
+n_batch = min(BATCH_RCH, max(1, len(tasks_fit) // (4 * n_proc)))
+batches = [tasks_fit[i:i + n_batch]
+           for i in range(0, len(tasks_fit), n_batch)]
+if n_proc > 1:
+    pool = ProcessPoolExecutor(n_proc,
+                               mp_context=multiprocessing.get_context('fork'))
+    fits = itertools.chain.from_iterable(pool.map(fit_reaches, batches))
+else:
+    fits = itertools.chain.from_iterable(map(fit_reaches, batches))
 
-    # Retrieve reach length
-    rch_ln = swot_df[swot_df.reach_id == rch_sel].p_length.values[0]
 
-    # Filter dataframe to reach of interest
-    swot_sel = swot_df[swot_df.reach_id == rch_sel]
-
-    # Compute WSE variance
-    hstd = np.std(swot_sel.wse)
-
-    # Retrieve and format observation dates
-    date_i = [datetime.strptime(x, '%Y-%m-%d %H:%M:%S.%f').date() if
-              '.' in x
-              else datetime.strptime(x, '%Y-%m-%d %H:%M:%S').date()
-              for x in swot_sel.time]
-
-    swot_sel.loc[:, 'time'] = [datetime.strptime(str(x),
-                                                 '%Y-%m-%d %H:%M:%S.%f')
-                               if '.' in str(x) else
-                               datetime.strptime(str(x),
-                                                 '%Y-%m-%d %H:%M:%S') +
-                               timedelta(milliseconds=.1)
-                               for x in swot_sel['time']]
-
-    # Retrieve dates from swot_sel as days
-    time_ind = pd.to_datetime(swot_sel.time.reset_index(drop=True))
-    time_day = (time_ind - time_ind[0]).map(lambda x: x.total_seconds()
-                                            / 86400) + 1
-
-    # Retrieve time gap in seconds between observations
-    time_diffs = np.diff(swot_sel.time)
-    sec_between = np.array([td.total_seconds() for td in time_diffs])
-
-    # Assemble ReachObservations inputs (Standard assumed uncertainty)
-    ObsData = {'nR': 1,
-               'xkm': np.array([0.]),
-               'L': np.array(rch_ln),
-               'nt': len(swot_sel),
-               't': np.array(time_day),
-               'dt': sec_between,
-               'h': swot_sel.wse.values.reshape(1, len(swot_sel)),
-               'h0': np.min(swot_sel.wse.values),
-               'S': np.zeros(len(swot_sel)),
-               'w': swot_sel.width.values.reshape(1, len(swot_sel)),
-               'sigh': 0.1,
-               'sigS': -9999.0,
-               'sigW': [],
-               'sigw': 30}
-
-    # --------------------------------------------------------------------------
-    # Run Errors-in-Variable
-    # --------------------------------------------------------------------------
-    # Run Domain and ReachObservations classes
-    D = Domain(ObsData)
-    obs = ReachObservations(D,  # Domain class
-                            ObsData,  # Observation dictionary
-                            ConstrainHWSwitch=True,  # Contrain HW Option
-                            CalcAreaFitOpt=3,  # Optimize breakpoints + fits
-                            dAOpt=1,  # SWOT L2 Style DA calculation
-                            Verbose=False)  # Plotting option
-
-    # Retrieve dA time series (m2)
-    dA = pd.Series(obs.dA[0, :])
-
-    # Set index of dA
-    dA.index = pd.to_datetime(swot_sel.time)
-
-    # Calculate delta V (del_A * reach length) (km3)
-    dV = dA * rch_ln * 1e-9
-    dV = dV.reset_index(drop=True)
-
-    # Insert values into dataframe
-    for k in range(len(date_i)):
-
-        # Catch NaN time values
-        if pd.isnull(date_i[k]):
-            continue
+# Yield result of each reach in order, stored or newly fit, and whether it
+# was newly fit. Newly fit reaches are added to the checkpoint.
+def results():
+    for j in range(len(tasks)):
+        if recs[j] is None:
+            recs[j] = next(fits)
+            ckpt.put(rch_ids[j], keys[j], recs[j])
+            yield recs[j], True
         else:
-            # Insert V value at location of date in V_eiv
-            # If value is nan, insert value directly
-            if np.isnan(V_eiv.loc[j, date_i[k]]):
-                V_eiv.loc[j, date_i[k]] = dV[k]
-            # If value already at date, take average of two values
-            # This occurs when a reach is observed twice on the same day
-            else:
-                V_eiv.loc[j, date_i[k]] =\
-                    np.mean([V_eiv.loc[j, date_i[k]], dV[k]])
-
-    # Store fit parameters
-    fits_eiv.loc[j, 'fit_method'] = obs.fit_method
-    fits_eiv.loc[j, 'nobs'] = obs.area_fit['h_w_nobs'].item(0)
-    fits_eiv.loc[j, 'med_flow_area'] = obs.area_fit['med_flow_area'].item(0)
-    fits_eiv.loc[j, 'med_wse'] = np.median(obs.h)
-    fits_eiv.loc[j, 'med_width'] = np.median(obs.w)
-    fits_eiv.loc[j, 'h_break_0'] = obs.area_fit['h_break'].item(0)
-    fits_eiv.loc[j, 'h_break_1'] = obs.area_fit['h_break'].item(1)
-    fits_eiv.loc[j, 'h_break_2'] = obs.area_fit['h_break'].item(2)
-    fits_eiv.loc[j, 'h_break_3'] = obs.area_fit['h_break'].item(3)
-    fits_eiv.loc[j, 'm_1'] = obs.area_fit['fit_coeffs'].item(0)
-    fits_eiv.loc[j, 'm_2'] = obs.area_fit['fit_coeffs'].item(1)
-    fits_eiv.loc[j, 'm_3'] = obs.area_fit['fit_coeffs'].item(2)
-    fits_eiv.loc[j, 'y0_1'] = obs.area_fit['fit_coeffs'].item(3)
-    fits_eiv.loc[j, 'y0_2'] = obs.area_fit['fit_coeffs'].item(4)
-    fits_eiv.loc[j, 'y0_3'] = obs.area_fit['fit_coeffs'].item(5)
-
-    # Calculate mean orthogonal residual and orthogonal RMSE
-    # Orthogonal residual is the euclidian distance between h,w and hhat,whhat
-    orth_resid = np.sqrt((obs.hobs - obs.h)**2 + (obs.wobs - obs.w)**2)
-    fits_eiv.loc[j, 'mor'] = np.mean(orth_resid)
-    fits_eiv.loc[j, 'ormse'] = np.sqrt(np.mean(orth_resid**2))
-
-    # # Optional Plots
-    # # Plot observed Width vs WSE
-    # plt.figure()
-    # plt.scatter(swot_sel.wse, swot_sel.width)
-    # plt.ylabel('Width, m')
-    # plt.xlabel('WSE, m')
-
-    # # Plot observed WSE vs dArea
-    # plt.figure()
-    # plt.scatter(swot_sel.wse, obs.dA[0, :], label='EIV')
-    # plt.xlabel('WSE, m')
-    # plt.ylabel('dA, m2')
-    # plt.legend()
-
-    # # Plot observed Width vs dArea
-    # plt.figure()
-    # plt.scatter(swot_sel.width, obs.dA[0, :], label='EIV')
-    # plt.xlabel('Width, m')
-    # plt.ylabel('dA, m2')
-    # plt.legend()
-
-    # # Plot dArea time series
-    # plt.figure(figsize=(9.357, 2.255))
-    # plt.plot(date_i, obs.dA[0, :], label='EIV', color='#ee762dff')
-    # plt.scatter(date_i, obs.dA[0, :], label='EIV', color='#ee762dff')
-    # plt.axhline(y=0, color='gray', linestyle='--', linewidth=1)
-    # plt.gca().xaxis.set_major_locator(mdates.MonthLocator())
-    # plt.gca().xaxis.set_major_formatter(mdates.DateFormatter('%m-%y'))
-    # plt.xticks(rotation=45)
-    # plt.tight_layout()
-    # plt.setp(plt.gca().get_xticklabels(), ha='right',
-    #     rotation_mode='anchor')
-    # plt.ylabel('dA, m2')
-    # plt.ylim([-500, 1530])
-    # ax = plt.gca()
-    # ax.set_aspect(1/15)
-    # plt.show()
-
-    # # # Plot EIV height width regressions and constrained values
-    # plt.figure()
-    # for i in range(len(swot_sel)):
-    #     plt.plot([obs.hobs[i], obs.h[0][i]],
-    #              [obs.wobs[i], obs.w[0][i]],
-    #              color='gray',  zorder=1)
-    # for sd in range(3):
-    #     htest = np.linspace(obs.area_fit['h_break'][sd],
-    #                         obs.area_fit['h_break'][sd + 1], 10)
-    #     wtest = obs.area_fit['fit_coeffs'][0, sd, 0] * htest +\
-    #         obs.area_fit['fit_coeffs'][1, sd, 0]
-    #     plt.plot(htest, wtest, c='#0078A3', zorder=2)
-    # plt.scatter(obs.hobs, obs.wobs, c='black', zorder=3)
-    # plt.scatter(obs.h, obs.w, c='#0078A3', zorder=3)
-    # plt.xlabel('WSE, m')
-    # plt.ylabel('Width, m')
-
-    # # Plot dV time series
-    # plt.figure(figsize=(9.357, 2.255))
-    # plt.plot(date_i, dV, label='EIV', color='#0f355dff')
-    # plt.scatter(date_i, dV, label='EIV', color='#0f355dff')
-    # plt.axhline(y=0, color='gray', linestyle='--', linewidth=1)
-    # plt.gca().xaxis.set_major_locator(mdates.MonthLocator())
-    # plt.gca().xaxis.set_major_formatter(mdates.DateFormatter('%m-%y'))
-    # plt.xticks(rotation=45)
-    # plt.tight_layout()
-    # plt.setp(plt.gca().get_xticklabels(), ha='right',
-    #     rotation_mode='anchor')
-    # plt.ylabel('dV, m3')
-    # ax = plt.gca()
-    # plt.show()
-
-    # # Plot combined dA and dV anomalies
-    # fig, axes = plt.subplots(2, 1, figsize=(9.357, 4.5), sharex=True,
-    #     gridspec_kw={'hspace': 0.3})
-    # axes[0].plot(date_i, obs.dA[0, :], label='EIV', color='#ee762dff')
-    # axes[0].scatter(date_i, obs.dA[0, :], label='EIV', color='#ee762dff')
-    # axes[0].axhline(y=0, color='gray', linestyle='--', linewidth=1)
-    # axes[0].set_ylabel('dA, m2')
-    # axes[0].set_ylim([-500, 1530])
-    # # axes[0].set_aspect(1 / 15)
-    # axes[1].plot(date_i, dV, label='EIV', color='#0f355dff')
-    # axes[1].scatter(date_i, dV, label='EIV', color='#0f355dff')
-    # axes[1].axhline(y=0, color='gray', linestyle='--', linewidth=1)
-    # axes[1].set_ylabel('dV, km3')
-    # axes[1].set_ylim([-0.01, 0.021])
-    # axes[1].xaxis.set_major_locator(mdates.MonthLocator())
-    # axes[1].xaxis.set_major_formatter(mdates.DateFormatter('%m-%y'))
-    # axes[1].tick_params(axis='x', rotation=45)
-    # plt.setp(axes[1].get_xticklabels(), ha='right',
-    #     rotation_mode='anchor')
-    # plt.tight_layout()
-    # plt.show()
-
-# Write to file
-V_eiv.index = rch_ids
-V_eiv.to_csv(V_out, index=True)
-
-fits_eiv.to_csv(fit_out, index=False)
+            yield recs[j], False
+
+
+# Collect volume anomalies of all reaches as flat arrays of reach index,
+# observation date and dV, and the fit parameters of each reach
+rch_j = []
+date_j = []
+dV_j = []
+fit_recs = [None] * len(rch_ids)
+fit_stats = []
+for j, (rec, new) in enumerate(results()):
+
+    print(j)
+
+    # Report failed fits, leaving reach empty
+    if 'error' in rec:
+        print('ERROR - Fit failed at reach ' + str(rec['reach_id']) + ': ' +
+              rec['error'])
+        continue
+
+    rch_j.append(np.full(len(rec['dV']), j))
+    date_j.append(np.asarray(rec['date'], dtype=object))
+    dV_j.append(rec['dV'])
+    fit_recs[j] = rec
+
+    if new:
+        fit_stats.append([rec[col] for col in FIT_STATS])
+
+if n_proc > 1:
+    pool.shutdown()
+
+# Store fits of this run
+if store_file is not None:
+    for j in range(len(tasks)):
+        store.put(rch_ids[j], keys[j], recs[j])
+    store.save()
+
+# Report optimizer iterations and objectives of fit reaches, of warm started
+# reaches and of the other reaches
+fit_stats = pd.DataFrame(fit_stats, columns=FIT_STATS)
+for warm_i, stats_i in fit_stats.groupby('warm'):
+    print(('Warm' if warm_i else 'Cold') + ' started reaches: ' +
+          str(len(stats_i)) + ' | Median breakpoint evaluations: ' +
+          str(stats_i.outer_nfev.median()) + ' | Median inner iterations: ' +
+          str(stats_i.inner_nit.median()) + ' | Sum of objectives: ' +
+          f'{stats_i.J.sum():.6g}')
+
+# ------------------------------------------------------------------------------
+# Assemble volume anomalies and fit parameters of all reaches
+# ------------------------------------------------------------------------------
+# Cell of each volume anomaly in the reach x date matrix, skipping NaN times
+date_cols = np.array(date_obs, dtype='datetime64[D]')
+if len(dV_j) > 0:
+    rch_j = np.concatenate(rch_j)
+    date_j = pd.to_datetime(np.concatenate(date_j)).values.astype(
+        'datetime64[D]')
+    dV_j = np.concatenate(dV_j)
+else:
+    rch_j = np.zeros(0, dtype=int)
+    date_j = np.zeros(0, dtype='datetime64[D]')
+    dV_j = np.zeros(0)
+
+ok = ~np.isnat(date_j)
+cell = rch_j[ok] * len(date_cols) + np.searchsorted(date_cols, date_j[ok])
+dV_j = dV_j[ok]
+
+# Combine values of the same cell (reach observed twice on the same day) in
+# order of observation: a value replaces a NaN cell, and is otherwise averaged
+# with the cell value, i.e. pairwise, as values were inserted one by one
+order = np.argsort(cell, kind='stable')
+cell = cell[order]
+dV_j = dV_j[order]
+start = np.flatnonzero(np.diff(cell, prepend=-1))
+n_cell = np.diff(np.r_[start, len(cell)])
+rank = np.arange(len(cell)) - np.repeat(start, n_cell)
+cell_ind = np.repeat(np.arange(len(start)), n_cell)
+
+V_cell = np.full(len(start), np.nan)
+for r in range(n_cell.max() if len(n_cell) > 0 else 0):
+    sel = rank == r
+    V_r = V_cell[cell_ind[sel]]
+    V_cell[cell_ind[sel]] = np.where(np.isnan(V_r), dV_j[sel],
+                                     (V_r + dV_j[sel]) / 2)
+
+# Long table of the volume anomalies of observed cells, whose size scales
+# with the number of observations rather than reaches x dates
+cell = cell[start]
+V_eiv = pd.DataFrame({'reach_id': np.asarray(rch_ids)[cell // len(date_cols)],
+                      'date': date_cols[cell % len(date_cols)],
+                      'value': V_cell})
+V_eiv = V_eiv[~np.isnan(V_cell)]
+
+# Fill fit parameters of reaches, leaving failed reaches empty
+for col in FIT_COLS:
+    fits_eiv[col] = pd.array([None if x is None else x[col]
+                              for x in fit_recs], dtype=fits_eiv[col].dtype)
+
+# Write to file (.csv matrix of reaches x dates, or .parquet long table)
+write_series(V_eiv, V_out, rch_ids, date_obs)
+
+write_table(fits_eiv, fit_out)
+
+# Outputs are complete, so that the next run starts again
+ckpt.close(remove=True)
@@ -0,0 +1,287 @@
+#!/usr/bin/env python3
+# ******************************************************************************
+# swot_volume_fit.py
+# ******************************************************************************
+
+# Purpose:
+# Shared functions for fitting the SWOT height-width relationship of a reach
+# with FLaPE-Byrd and computing its volume anomalies. Fits of each reach are
+# independent, so fit_reach can be run in parallel worker processes.
+# Author:
+# Jeffrey Wade, 2025
+
+
+# ******************************************************************************
+# Import Python modules
+# ******************************************************************************
+import hashlib
+import numpy as np
+import pandas as pd
+from FLaPE_Byrd_main_jw import ReachObservations_jw
+from FLaPE_Byrd_main_jw.ReachObservations_jw import ReachObservations, \
+    ReachObservationsBatch
+
+
+# ******************************************************************************
+# Declaration of constants
+# ******************************************************************************
+# Fit parameters stored for each reach
+# FLaPE-Byrd breakpoint option (CalcAreaFitOpt), 3 to optimize breakpoints
+# with curve_fit or 4 to search every pair of observed heights. Set before
+# fitting, as worker processes inherit it when forked.
+FIT_OPT = 3
+
+# Standard assumed uncertainty of wse and width (m)
+SIGH = 0.1
+SIGW = 30
+
+# Default number of reaches fit together by fit_reaches
+BATCH_RCH = 200
+
+FIT_COLS = ['fit_method', 'nobs', 'med_flow_area', 'med_wse', 'med_width',
+            'h_break_0', 'h_break_1', 'h_break_2', 'h_break_3', 'm_1', 'm_2',
+            'm_3', 'y0_1', 'y0_2', 'y0_3', 'ormse', 'mor']
+
+# Optimizer statistics returned for each reach (see CalcAreaFit)
+FIT_STATS = ['warm', 'outer_nfev', 'inner_nit', 'inner_nfev', 'J_set',
+             'J_simple', 'J']
+
+
+'''
+Required inputs to ReachObservations class
+D,RiverData,ConstrainHWSwitch=False,CalcAreaFitOpt=0,dAOpt=0,Verbose=False,σW=[]
+
+D:
+    nR = number of reaches
+    xkm = reach midpoint distance downstream [m]
+    L = reach lengths [m]
+    nt = number of overpasses
+    t = time [days]
+    dt = time delta between successive overpasses [seconds]
+
+RiverData:
+    h = water surface elevation (wse) [m]
+    h0 = wse at baseflow (minimum height?) [m]
+    S = water surface slope [-]
+    w = river width [m]
+    sigh = wse uncertainty standard deviation [m]
+    sigS = slope uncertainty standard deviation [-]
+    sigW = width uncertainty standard deviation [m] (?)
+    sigw = width uncertainty standard deviation [m]
+
+ConstrainHWSwitch:
+    True = Don't contrain?
+    False = Constrain?
+
+CalcAreaFitOpt:
+    0 = don't calculate
+    1 = use equal-spaced breakpoints
+    2 = optimize breakpoints & fits together
+    3 = optimize breakpoints, then optimize fits
+    4 = search breakpoints among observed heights, then optimize fits
+
+dAOpt:
+    0 = use MetroMan style calculation
+    1 = use SWOT L2 style calculation
+
+Verbose:
+    True = enable printing
+    False = disable printing
+
+σW:
+    empty = use sigW value
+    values = use σW values
+
+'''
+
+
+# ******************************************************************************
+# Set input class for FLaPE-Byrd ReachObservations
+# ******************************************************************************
+class Domain:
+    def __init__(self, RiverData):
+        self.nR = RiverData["nR"]  # number of reaches
+        self.xkm = RiverData["xkm"]  # reach midpoint distance downstream [m]
+        self.L = RiverData["L"]  # reach lengths, [m]
+        self.nt = RiverData["nt"]  # number of overpasses
+        self.t = RiverData["t"]  # time, [days]
+        self.dt = RiverData["dt"]  # time between success. overpasses, [seconds]
+
+
+# ******************************************************************************
+# Define functions
+# ******************************************************************************
+# Read warm starts of the fits of reaches from a fits file
+# fits_df is a dataframe of fit parameters (FIT_COLS and reach_id), as written
+# by swot_volume_FLaPE-Byrd.py. Returns a dictionary of the warm start of each
+# reach with finite breakpoints and coefficients (see CalcAreaFit).
+def read_warm_starts(fits_df):
+
+    hb_cols = ['h_break_1', 'h_break_2']
+    p_cols = ['m_1', 'y0_1', 'm_2', 'y0_2', 'm_3', 'y0_3']
+    fits_df = fits_df.dropna(subset=['reach_id'] + hb_cols + p_cols)
+
+    hb = fits_df[hb_cols].values.astype(float)
+    p = fits_df[p_cols].values.astype(float)
+    return {rch_id: {'h_break': hb[i], 'fit_coeffs': p[i]}
+            for i, rch_id in enumerate(fits_df.reach_id.values.astype(int))}
+
+
+# Hash the inputs of the fit of a reach (see fit_reach), with the fit options
+# and uncertainties. The warm start is hashed too, as the fit depends on it.
+def task_hash(task):
+
+    h = hashlib.sha1()
+    h.update('|'.join(str(x) for x in [task[0], task[1], FIT_OPT, SIGH, SIGW,
+                                       ReachObservations_jw.InnerSolver,
+                                       len(task[3])]).encode())
+    h.update(np.ascontiguousarray(task[2], dtype='datetime64[ns]').tobytes())
+    h.update(np.ascontiguousarray(task[3], dtype='float64').tobytes())
+    h.update(np.ascontiguousarray(task[4], dtype='float64').tobytes())
+    if len(task) > 5 and task[5] is not None:
+        h.update(np.ascontiguousarray(task[5]['h_break'],
+                                      dtype='float64').tobytes())
+        h.update(np.ascontiguousarray(task[5]['fit_coeffs'],
+                                      dtype='float64').tobytes())
+    return h.hexdigest()
+
+
+# Fit height-width relationship of a reach and compute its volume anomalies
+# task is a tuple of reach id, reach length, arrays of observation times
+# (datetime64), wse and width, and optionally the warm start of the fit (see
+# read_warm_starts, or None). Returns a dictionary of the reach id,
+# observation dates, volume anomalies (dV, km3), fit parameters (FIT_COLS) and
+# optimizer statistics (FIT_STATS), or of the reach id and an error message if
+# the fit failed.
+def fit_reach(task):
+
+    try:
+        return _fit_reach(*task)
+    except Exception as e:
+        return {'reach_id': task[0], 'error': repr(e)}
+
+
+# Fit many reaches at once with ReachObservationsBatch
+# tasks is a list of fit_reach tasks. Returns the fit_reach result of each
+# task, in order. Reaches are fit one by one, and constrained and converted to
+# areas together. If the batch fails as a whole, its reaches are fit one by one
+# with fit_reach, so that only the reaches causing the failure are reported as
+# errors.
+def fit_reaches(tasks):
+
+    wse = np.concatenate([x[3] for x in tasks])
+    width = np.concatenate([x[4] for x in tasks])
+    offsets = np.cumsum([0] + [len(x[3]) for x in tasks])
+    warm = [x[5] if len(x) > 5 else None for x in tasks]
+
+    try:
+        obs = ReachObservationsBatch(wse, width, offsets, SIGH, SIGW,
+                                     ConstrainHWSwitch=True,
+                                     CalcAreaFitOpt=FIT_OPT, dAOpt=1,
+                                     WarmStart=warm)
+    except Exception:
+        return [fit_reach(x) for x in tasks]
+
+    recs = []
+    for r, task in enumerate(tasks):
+        if obs.error[r] is not None:
+            recs.append({'reach_id': task[0], 'error': repr(obs.error[r])})
+            continue
+
+        i0, i1 = offsets[r], offsets[r + 1]
+        try:
+            recs.append(_fit_record(
+                task[0], task[1], pd.DatetimeIndex(task[2]).date,
+                obs.dA[i0:i1], obs.h[i0:i1], obs.w[i0:i1], obs.hobs[i0:i1],
+                obs.wobs[i0:i1], obs.area_fit[r], obs.fit_method[r],
+                obs.fit_stats[r]))
+        except Exception as e:
+            recs.append({'reach_id': task[0], 'error': repr(e)})
+
+    return recs
+
+
+# Fit a single reach, see fit_reach
+def _fit_reach(rch_sel, rch_ln, time_ind, wse, width, warm=None):
+
+    # Retrieve observation dates
+    date_i = pd.DatetimeIndex(time_ind).date
+
+    # Retrieve dates as days
+    time_day = (time_ind - time_ind[0]) / np.timedelta64(1, 'D') + 1
+
+    # Retrieve time gap in seconds between observations
+    sec_between = np.diff(time_ind) / np.timedelta64(1, 's')
+
+    # Assemble ReachObservations inputs (Standard assumed uncertainty)
+    ObsData = {'nR': 1,
+               'xkm': np.array([0.]),
+               'L': np.array(rch_ln),
+               'nt': len(wse),
+               't': np.array(time_day),
+               'dt': sec_between,
+               'h': wse.reshape(1, len(wse)),
+               'h0': np.min(wse),
+               'S': np.zeros(len(wse)),
+               'w': width.reshape(1, len(wse)),
+               'sigh': SIGH,
+               'sigS': -9999.0,
+               'sigW': [],
+               'sigw': SIGW}
+
+    # ----------------------------------------------------------------------
+    # Run Errors-in-Variable
+    # ----------------------------------------------------------------------
+    # Run Domain and ReachObservations classes
+    D = Domain(ObsData)
+    obs = ReachObservations(D,  # Domain class
+                            ObsData,  # Observation dictionary
+                            ConstrainHWSwitch=True,  # Contrain HW Option
+                            CalcAreaFitOpt=FIT_OPT,  # Breakpoints + fits
+                            dAOpt=1,  # SWOT L2 Style DA calculation
+                            Verbose=False,  # Plotting option
+                            WarmStart=warm)  # Prior fit of reach
+
+    return _fit_record(rch_sel, rch_ln, date_i, obs.dA[0, :], obs.h[0, :],
+                       obs.w[0, :], obs.hobs, obs.wobs, obs.area_fit,
+                       obs.fit_method, obs.fit_stats)
+
+
+# Assemble result of a fit reach from its observation dates, area changes,
+# constrained and observed wse and width, fit and optimizer statistics, see
+# fit_reach
+def _fit_record(rch_sel, rch_ln, date_i, dA, h, w, hobs, wobs, area_fit,
+                fit_method, fit_stats):
+
+    # Calculate delta V (del_A * reach length) (km3)
+    dV = dA * rch_ln * 1e-9
+
+    # Store fit parameters
+    rec = {'reach_id': rch_sel, 'date': date_i, 'dV': dV}
+    rec['fit_method'] = fit_method
+    rec['nobs'] = area_fit['h_w_nobs'].item(0)
+    rec['med_flow_area'] = area_fit['med_flow_area'].item(0)
+    rec['med_wse'] = np.median(h)
+    rec['med_width'] = np.median(w)
+    rec['h_break_0'] = area_fit['h_break'].item(0)
+    rec['h_break_1'] = area_fit['h_break'].item(1)
+    rec['h_break_2'] = area_fit['h_break'].item(2)
+    rec['h_break_3'] = area_fit['h_break'].item(3)
+    rec['m_1'] = area_fit['fit_coeffs'].item(0)
+    rec['m_2'] = area_fit['fit_coeffs'].item(1)
+    rec['m_3'] = area_fit['fit_coeffs'].item(2)
+    rec['y0_1'] = area_fit['fit_coeffs'].item(3)
+    rec['y0_2'] = area_fit['fit_coeffs'].item(4)
+    rec['y0_3'] = area_fit['fit_coeffs'].item(5)
+
+    # Calculate mean orthogonal residual and orthogonal RMSE
+    # Orthogonal residual is the euclidian distance between h,w and hhat,whhat
+    orth_resid = np.sqrt((hobs - h)**2 + (wobs - w)**2)
+    rec['mor'] = np.mean(orth_resid)
+    rec['ormse'] = np.sqrt(np.mean(orth_resid**2))
+
+    # Store optimizer statistics
+    for col in FIT_STATS:
+        rec[col] = fit_stats[col]
+
+    return rec
@@ -20,6 +20,7 @@ import matplotlib.pyplot as plt
 import matplotlib.colors as mcolors
 import geopandas as gpd
 import cartopy.crs as ccrs
+from swot_io import glob_tables, read_table
 
 
 # ******************************************************************************
@@ -166,41 +167,41 @@ print('Reading files')
 # SWOT MeanDRS Volume Mean Comparisons
 # ------------------------------------------------------------------------------
 # Read regional comparison files
-comp_reg_files = sorted(list(glob.iglob(comp_reg_in + '*.csv')))
-comp_reg_all = [pd.read_csv(x) for x in comp_reg_files]
+comp_reg_files = glob_tables(comp_reg_in)
+comp_reg_all = [read_table(x) for x in comp_reg_files]
 
 # Retrieve pfaf regions of files
 pfaf_list = pd.Series([x.partition("pfaf_")[-1][0:2] for x in comp_reg_files])
 
 # Read global comparison file
-comp_df = pd.read_csv(comp_global_in)
+comp_df = read_table(comp_global_in)
 
 # ------------------------------------------------------------------------------
 # Scaled SWOT Volumes
 # ------------------------------------------------------------------------------
 # Read regional scale files
-scale_reg_files = sorted(list(glob.iglob(scale_reg_in + '*.csv')))
-scale_reg_all = [pd.read_csv(x) for x in scale_reg_files]
+scale_reg_files = glob_tables(scale_reg_in)
+scale_reg_all = [read_table(x) for x in scale_reg_files]
 
 # Read global scale file
-scale_df = pd.read_csv(scale_global_in)
+scale_df = read_table(scale_global_in)
 
 # ------------------------------------------------------------------------------
 # SWOT MeanDRS Volume Slice Comparsions
 # ------------------------------------------------------------------------------
 # Read regional slice files
-slice_reg_files = sorted(list(glob.iglob(slice_reg_in + '*.csv')))
-slice_reg_all = [pd.read_csv(x) for x in slice_reg_files]
+slice_reg_files = glob_tables(slice_reg_in)
+slice_reg_all = [read_table(x) for x in slice_reg_files]
 
 # Read global scale file
-slice_df = pd.read_csv(slice_global_in)
+slice_df = read_table(slice_global_in)
 
 # ------------------------------------------------------------------------------
 # SWOT MeanDRS Volume Agreement Metrics
 # ------------------------------------------------------------------------------
 # Read agreemenet files
-diff_mag_rat = pd.read_csv(mag_in)
-diff_corr = pd.read_csv(corr_in)
+diff_mag_rat = read_table(mag_in)
+diff_corr = read_table(corr_in)
 
 # ------------------------------------------------------------------------------
 # SWORD Anomaly Shapefiles
@@ -238,7 +239,7 @@ pfaf = pfaf.sort_values(by='PFAF_ID').reset_index(drop=True)
 # ------------------------------------------------------------------------------
 # Number of Observations
 # ------------------------------------------------------------------------------
-obs_df = pd.read_csv(num_obs_in)
+obs_df = read_table(num_obs_in)
 
 
 # ******************************************************************************
@@ -17,6 +17,7 @@ import pandas as pd
 import numpy as np
 import glob
 import geopandas as gpd
+from swot_io import glob_tables, read_table
 
 
 # ******************************************************************************
@@ -74,8 +75,8 @@ print('Reading files')
 # SWOT Observed Volume Anomalies
 # ------------------------------------------------------------------------------
 # Read regional anomaly files
-anom_reg_files = sorted(list(glob.iglob(anom_reg_in + '*.csv')))
-anom_reg_all = [pd.read_csv(x) for x in anom_reg_files]
+anom_reg_files = glob_tables(anom_reg_in)
+anom_reg_all = [read_table(x) for x in anom_reg_files]
 
 # Retrieve pfaf regions of files
 pfaf_list = pd.Series([x.partition("pfaf_")[-1][0:2] for x in anom_reg_files])
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+# ******************************************************************************
+# tst_anomaly_bench.py
+# ******************************************************************************
+
+# Purpose:
+# Benchmark the computation of daily volume anomalies of a large synthetic
+# region, comparing the loop over reaches previously used by
+# swot_volume_anomaly.py (pandas reindex, interpolate, ffill/bfill and groupby
+# for each reach) with anomaly_interp.interp_anomalies, and checking that
+# both give identical anomalies.
+# Author:
+# Jeffrey Wade, 2025
+
+
+# ******************************************************************************
+# Import Python modules
+# ******************************************************************************
+import sys
+import time
+import numpy as np
+import pandas as pd
+from anomaly_interp import interp_anomalies
+
+
+# ******************************************************************************
+# Declaration of variables (given as command line arguments)
+# ******************************************************************************
+# 1 - n_rch (optional, number of reaches of the region)
+
+
+# ******************************************************************************
+# Get command line arguments
+# ******************************************************************************
+IS_arg = len(sys.argv)
+if IS_arg > 2:
+    print('ERROR - 0 or 1 arguments must be used')
+    raise SystemExit(22)
+
+n_rch = int(sys.argv[1]) if IS_arg > 1 else 5000
+
+
+# ******************************************************************************
+# Generate observations and volume estimates
+# ******************************************************************************
+rng = np.random.default_rng(0)
+
+# Unfiltered observations of reaches over two years, some reaches observed
+# more than once on a day
+rch_ids = pd.Index(11000000001 + 10 * np.arange(n_rch), name='reach_id')
+n_obs = rng.integers(5, 80, n_rch)
+obs_rch = np.repeat(rch_ids.values, n_obs)
+obs_time = pd.Timestamp('2023-07-01') + pd.to_timedelta(
+    rng.integers(0, 730 * 86400, n_obs.sum()), unit='s')
+obs_dates = obs_time.values.astype('datetime64[D]')
+
+# Volume estimates on the days of observations passing the filters
+est = np.unique(np.c_[np.arange(n_rch).repeat(n_obs),
+                      obs_dates.astype(np.int64)][
+                          rng.random(n_obs.sum()) < 0.6], axis=0)
+V_df = pd.DataFrame({'reach_id': rch_ids.values[est[:, 0]],
+                     'date': est[:, 1].astype('datetime64[D]'),
+                     'value': rng.normal(0, 1e-2, len(est))})
+
+
+# ******************************************************************************
+# Compute anomalies
+# ******************************************************************************
+# Loop over reaches, as done by swot_volume_anomaly.py before anomaly_interp
+def loop_anomalies(V_df, obs_rch, obs_dates, rch_ids):
+    obs_df = pd.DataFrame({'reach_id': obs_rch,
+                           'dates': pd.Series(obs_dates).dt.date})
+    date_obs_unfil = [obs_df.dates[obs_df.reach_id == x] for x in rch_ids]
+
+    V_rch, V_start, V_nobs = np.unique(V_df.reach_id.values,
+                                       return_index=True, return_counts=True)
+    V_slice = {x: slice(y, y + z) for x, y, z in zip(V_rch, V_start, V_nobs)}
+    V_dates = V_df.date.dt.date.values
+    V_vals = V_df.value.values
+
+    V_a = []
+    for i in range(len(rch_ids)):
+        V_slice_i = V_slice.get(rch_ids[i], slice(0, 0))
+        V_i = pd.Series(V_vals[V_slice_i], index=V_dates[V_slice_i])
+        V_i_reind = V_i.reindex(pd.to_datetime(V_i.
+                                               index.union(date_obs_unfil[i])))
+        V_i_interp = V_i_reind.interpolate(method='time')
+        V_i_interp = V_i_interp.ffill().bfill()
+        V_a_interp = V_i_interp - np.mean(V_i_interp)
+        V_a_interp.index = V_a_interp.index.map(lambda x: x.date())
+        V_a.append(V_a_interp.groupby(V_a_interp.index).mean().values)
+
+    return np.concatenate(V_a)
+
+
+t0 = time.perf_counter()
+V_a_loop = loop_anomalies(V_df, obs_rch, obs_dates, rch_ids)
+t_loop = time.perf_counter() - t0
+
+t0 = time.perf_counter()
+V_a_vect = interp_anomalies(V_df, obs_rch, obs_dates, rch_ids).value.values
+t_vect = time.perf_counter() - t0
+
+print('n_rch,n_obs,loop_s,vectorized_s,identical')
+print(f'{n_rch},{n_obs.sum()},{t_loop:.3f},{t_vect:.3f},'
+      f'{np.array_equal(V_a_loop, V_a_vect, equal_nan=True)}')
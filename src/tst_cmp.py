@@ -38,6 +38,8 @@ def compare_files(file_org, file_tst):
         return compare_shapefiles(file_org, file_tst)
     elif suffix == '.csv':
         return compare_csvs(file_org, file_tst)
+    elif suffix == '.parquet':
+        return compare_parquets(file_org, file_tst)
     elif suffix == '.tif':
         return compare_tifs(file_org, file_tst)
     else:
@@ -118,6 +120,20 @@ def compare_csvs(file_org, file_tst):
         return False
 
 
+# Compare original and testing parquet files
+def compare_parquets(file_org, file_tst):
+    import pandas as pd
+    try:
+        df1 = pd.read_parquet(file_org)
+        df2 = pd.read_parquet(file_tst)
+        assert_frame_equal(df1, df2, check_dtype=False, check_exact=False,
+                           rtol=0, atol=1e-3)
+        return True
+    except Exception as e:
+        print("ERROR comparing Parquet files:", e)
+        return False
+
+
 # Compare original and testing tif files
 def compare_tifs(file_org, file_tst):
     import rasterio
@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+# ******************************************************************************
+# tst_flape_bench.py
+# ******************************************************************************
+
+# Purpose:
+# Benchmark the solvers of the FLaPE-Byrd height-width fits on the reaches of
+# a file of SWOT observations. For each reach, the fit at breakpoints set at
+# 1/3 and 2/3 of the WSE range is solved with the reference trust-constr
+# solver, the trust-constr solver of subdomain sums and the profile solver,
+# comparing their objective values and times. The full fit of each reach
+# (fit_reach) is also timed with each solver.
+# Full fits with breakpoints optimized by curve_fit (CalcAreaFitOpt=3) and
+# searched among observed heights (CalcAreaFitOpt=4) are compared, by time, fit
+# method and objective of the selected breakpoints.
+# Fitting reaches one at a time (fit_reach) is timed against fitting them in
+# one batch (fit_reaches), checking that both give the same volumes. Finally,
+# reaches are refit with warm starts from their own fits, comparing optimizer
+# evaluations and objectives with the cold fits.
+# Author:
+# Jeffrey Wade, 2025
+
+
+# ******************************************************************************
+# Import Python modules
+# ******************************************************************************
+import sys
+import time
+import warnings
+import numpy as np
+import pandas as pd
+import swot_volume_fit
+from swot_io import read_swot
+from swot_volume_fit import fit_reach, fit_reaches, read_warm_starts
+from FLaPE_Byrd_main_jw import ReachObservations_jw
+
+
+# ******************************************************************************
+# Declaration of variables (given as command line arguments)
+# ******************************************************************************
+# 1 - swot_in (.csv or .parquet)
+# 2 - n_rch (optional, maximum number of reaches benchmarked)
+
+
+# ******************************************************************************
+# Get command line arguments
+# ******************************************************************************
+IS_arg = len(sys.argv)
+if IS_arg < 2 or IS_arg > 3:
+    print('ERROR - 1 or 2 arguments must be used')
+    raise SystemExit(22)
+
+swot_in = sys.argv[1]
+n_rch = int(sys.argv[2]) if IS_arg > 2 else None
+
+warnings.filterwarnings('ignore', message='delta_grad == 0.0')
+
+
+# ******************************************************************************
+# Select reaches
+# ******************************************************************************
+# Keep valid wse and width observations of reaches with at least 5 of them
+swot_df = read_swot(swot_in)
+swot_df = swot_df[(swot_df.wse > -1000) & (swot_df.width > 0)]
+swot_df = swot_df.sort_values(['reach_id', 'time'], kind='stable')
+
+tasks = []
+for rch_id, df in swot_df.groupby('reach_id', sort=True):
+    if len(df) >= 5:
+        tasks.append((rch_id, df.p_length.values[0], df.time.values,
+                      df.wse.values.astype(float),
+                      df.width.values.astype(float)))
+tasks = tasks[:n_rch]
+
+
+# ******************************************************************************
+# Run benchmark
+# ******************************************************************************
+solvers = ['reference', 'trust-constr-sums', 'profile']
+J = np.zeros((len(tasks), len(solvers)))
+t_set = np.zeros((len(tasks), len(solvers)))
+t_fit = np.zeros((len(tasks), len(solvers)))
+
+for j, task in enumerate(tasks):
+    h, w = task[3], task[4]
+    h_rng = h.max() - h.min()
+    h_brk = [h.min() + h_rng / 3, h.min() + 2 * h_rng / 3]
+
+    for k, solver in enumerate(solvers):
+        ReachObservations_jw.InnerSolver = solver
+
+        t0 = time.perf_counter()
+        J[j, k] = ReachObservations_jw.SSE_outer(h_brk, h, w, False, 0.1, 30,
+                                                 False)
+        t_set[j, k] = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        fit_reach(task)
+        t_fit[j, k] = time.perf_counter() - t0
+
+print('Reaches:', len(tasks))
+for k in range(1, len(solvers)):
+
+    # Relative difference of objectives (negative if solver k is lower)
+    J_rel = (J[:, k] - J[:, 0]) / np.maximum(np.abs(J[:, 0]), 1e-12)
+
+    print('Objective at set breakpoints, ' + solvers[k] + ' vs reference:')
+    print('  equal (within 1e-6):', np.sum(np.abs(J_rel) <= 1e-6),
+          '| lower:', np.sum(J_rel < -1e-6), '| higher:',
+          np.sum(J_rel > 1e-6),
+          f'| largest increase: {max(J_rel.max(), 0):.2e}')
+print('solver,set_fit_ms,full_fit_ms,total_s,set_speedup,full_speedup')
+for k, solver in enumerate(solvers):
+    print(f'{solver},{1e3 * np.median(t_set[:, k]):.2f},'
+          f'{1e3 * np.median(t_fit[:, k]):.2f},{t_fit[:, k].sum():.1f},'
+          f'{np.median(t_set[:, 0] / t_set[:, k]):.1f},'
+          f'{np.median(t_fit[:, 0] / t_fit[:, k]):.1f}')
+
+
+# ******************************************************************************
+# Compare breakpoint options
+# ******************************************************************************
+ReachObservations_jw.InnerSolver = 'profile'
+fit_opts = [3, 4]
+J = np.full((len(tasks), 2), np.nan)
+t_fit = np.zeros((len(tasks), 2))
+methods = [[], []]
+
+for j, task in enumerate(tasks):
+    h, w = task[3], task[4]
+
+    for k, fit_opt in enumerate(fit_opts):
+        swot_volume_fit.FIT_OPT = fit_opt
+
+        t0 = time.perf_counter()
+        rec = fit_reach(task)
+        t_fit[j, k] = time.perf_counter() - t0
+
+        methods[k].append(rec.get('fit_method', 'error'))
+        if rec.get('fit_method') in ['set', 'simple']:
+            J[j, k] = ReachObservations_jw.SSE_outer(
+                [rec['h_break_1'], rec['h_break_2']], h, w, False, 0.1, 30,
+                False)
+
+# Compare objectives where both options selected breakpoints
+J_rel = (J[:, 1] - J[:, 0]) / np.maximum(np.abs(J[:, 0]), 1e-12)
+J_rel = J_rel[np.isfinite(J_rel)]
+
+print('fit_opt,full_fit_ms,total_s,set,simple,rectangular,error')
+for k, fit_opt in enumerate(fit_opts):
+    print(f'{fit_opt},{1e3 * np.median(t_fit[:, k]):.2f},'
+          f'{t_fit[:, k].sum():.1f},' +
+          ','.join(str(methods[k].count(x)) for x in
+                   ['set', 'simple', 'rectangular', 'error']))
+print('Objective of selected breakpoints, option 4 vs 3 (' +
+      str(len(J_rel)) + ' reaches):')
+print('  equal (within 1e-6):', np.sum(np.abs(J_rel) <= 1e-6),
+      '| lower:', np.sum(J_rel < -1e-6), '| higher:', np.sum(J_rel > 1e-6))
+
+
+# ******************************************************************************
+# Compare single-reach and batched fits
+# ******************************************************************************
+swot_volume_fit.FIT_OPT = 3
+
+t0 = time.perf_counter()
+recs = [fit_reach(task) for task in tasks]
+t_one = time.perf_counter() - t0
+
+t0 = time.perf_counter()
+recs_batch = fit_reaches(tasks)
+t_batch = time.perf_counter() - t0
+
+n_same = sum(('dV' in x and 'dV' in y and np.array_equal(x['dV'], y['dV'],
+                                                         equal_nan=True)) or
+             ('error' in x and 'error' in y)
+             for x, y in zip(recs, recs_batch))
+
+print('Reaches with same volumes, single vs batch:', n_same, 'of',
+      len(tasks))
+print(f'single_s,batch_s: {t_one:.2f},{t_batch:.2f}')
+
+
+# ******************************************************************************
+# Compare cold and warm started fits
+# ******************************************************************************
+# Warm start each reach from its cold fit (recs, fit with option 3 above)
+warm = read_warm_starts(pd.DataFrame([x for x in recs if 'error' not in x]))
+
+t0 = time.perf_counter()
+recs_warm = fit_reaches([task + (warm.get(task[0]),) for task in tasks])
+t_warm = time.perf_counter() - t0
+
+stats = pd.DataFrame([(x['outer_nfev'], x['inner_nit'], x['J'],
+                       y['outer_nfev'], y['inner_nit'], y['J'])
+                      for x, y in zip(recs_batch, recs_warm)
+                      if 'error' not in x and 'error' not in y and y['warm']],
+                     columns=['nfev_cold', 'nit_cold', 'J_cold', 'nfev_warm',
+                              'nit_warm', 'J_warm'])
+J_rel = (stats.J_warm - stats.J_cold) / np.maximum(np.abs(stats.J_cold),
+                                                   1e-12)
+
+print('Warm started reaches:', len(stats))
+print('start,breakpoint_nfev,inner_nit,total_s')
+print(f'cold,{stats.nfev_cold.median():.0f},{stats.nit_cold.median():.0f},'
+      f'{t_batch:.2f}')
+print(f'warm,{stats.nfev_warm.median():.0f},{stats.nit_warm.median():.0f},'
+      f'{t_warm:.2f}')
+print('Objective of kept fit, warm vs cold:')
+print('  equal (within 1e-6):', np.sum(np.abs(J_rel) <= 1e-6),
+      '| lower:', np.sum(J_rel < -1e-6), '| higher:', np.sum(J_rel > 1e-6))
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+# ******************************************************************************
+# tst_hydrocron_bench.py
+# ******************************************************************************
+
+# Purpose:
+# Benchmark the throughput of Hydrocron downloads offline against the local
+# stand-in server, for a synthetic region and several concurrency levels.
+# The server can be made to throttle and fail requests, to check that retries
+# recover every reach.
+# Author:
+# Jeffrey Wade, 2025
+
+
+# ******************************************************************************
+# Import Python modules
+# ******************************************************************************
+import os
+import sys
+import time
+import socket
+import subprocess
+from hydrocron_client import MAX_RATE, dwnl_reaches
+
+
+# ******************************************************************************
+# Declaration of variables (given as command line arguments)
+# ******************************************************************************
+# 1 - n_rch (number of synthetic reaches)
+# 2 - latency (seconds added to each response)
+# 3 - conc_list (comma-separated concurrency levels, e.g. 1,8,32)
+# 4 - srv_rate (optional, requests per second above which server throttles)
+# 5 - p_fail (optional, fraction of requests failed by server)
+# 6 - max_rate (optional, client request rate limit, 0 for none)
+
+
+# ******************************************************************************
+# Get command line arguments
+# ******************************************************************************
+IS_arg = len(sys.argv)
+if IS_arg < 4 or IS_arg > 7:
+    print('ERROR - 3 to 6 arguments must be used')
+    raise SystemExit(22)
+
+n_rch = int(sys.argv[1])
+latency = float(sys.argv[2])
+conc_list = [int(x) for x in sys.argv[3].split(',')]
+srv_rate = sys.argv[4] if IS_arg > 4 else '0'
+p_fail = sys.argv[5] if IS_arg > 5 else '0'
+max_rate = float(sys.argv[6]) if IS_arg > 6 else MAX_RATE
+
+
+# ******************************************************************************
+# Run benchmark
+# ******************************************************************************
+# Find a free port
+with socket.socket() as sock:
+    sock.bind(('127.0.0.1', 0))
+    port = sock.getsockname()[1]
+
+# Start stand-in server in its own process so it does not share the client GIL
+server = subprocess.Popen([sys.executable,
+                           os.path.join(os.path.dirname(
+                               os.path.abspath(__file__)),
+                               'tst_hydrocron_server.py'),
+                           str(port), str(latency), srv_rate, p_fail],
+                          stdout=subprocess.DEVNULL)
+url = 'http://127.0.0.1:' + str(port) + '/hydrocron/v1/timeseries'
+
+# Wait for server to accept connections
+for i in range(100):
+    try:
+        socket.create_connection(('127.0.0.1', port), timeout=1).close()
+        break
+    except OSError:
+        time.sleep(0.1)
+
+# Create synthetic type 1 reach ids in region 11
+rch_id = [11000000000 + 10 * i + 1 for i in range(n_rch)]
+queries = [(x, '2023-10-01T00:00:00Z', '2024-09-30T23:59:59Z')
+           for x in rch_id]
+
+bench = []
+for n_conc in conc_list:
+    t0 = time.perf_counter()
+    n_rows = 0
+    stats = {}
+    for df in dwnl_reaches(queries, n_conc, url=url, max_rate=max_rate,
+                           stats=stats):
+        if df is not None:
+            n_rows += len(df)
+    dt = time.perf_counter() - t0
+    bench.append(f'{n_conc},{n_rch},{n_rows},{dt:.2f},{n_rch / dt:.1f},'
+                 f'{stats["requests"]},{stats["retries"]},'
+                 f'{stats["failures"]},{stats["lost"]}')
+
+server.terminate()
+
+# Print summary
+print('n_conc,reaches,rows,seconds,reaches_per_s,requests,retries,failures,'
+      'lost')
+print('\n'.join(bench))
@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+# ******************************************************************************
+# tst_hydrocron_server.py
+# ******************************************************************************
+
+# Purpose:
+# Local stand-in for PO.DAAC's Hydrocron time series service, used to
+# benchmark and test SWOT downloads offline. Responses mimic the structure of
+# Hydrocron csv responses, with synthetic observations generated
+# deterministically from each reach id.
+# Author:
+# Jeffrey Wade, 2025
+
+
+# ******************************************************************************
+# Import Python modules
+# ******************************************************************************
+import sys
+import json
+import time
+import random
+import threading
+from datetime import datetime
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+import numpy as np
+
+
+# ******************************************************************************
+# Declaration of variables (given as command line arguments)
+# ******************************************************************************
+# 1 - port
+# 2 - latency (optional, seconds added to each response)
+# 3 - max_rate (optional, requests per second above which requests are
+#     throttled with a 429 response)
+# 4 - p_fail (optional, fraction of requests answered with a 503 error)
+
+
+# ******************************************************************************
+# Declaration of constants
+# ******************************************************************************
+# Base date of SWOT times
+BASE_DATE = datetime(2000, 1, 1)
+
+# Variables reported with a units column
+UNIT_VARS = {'time': 's', 'wse': 'm', 'wse_u': 'm', 'wse_r_u': 'm',
+             'width': 'm', 'width_u': 'm', 'xtrk_dist': 'm', 'p_length': 'm'}
+
+# Maximum number of synthetic observations per reach
+MAX_OBS = 40
+
+
+# ******************************************************************************
+# Define functions
+# ******************************************************************************
+# Convert Hydrocron time string to seconds since base date
+def to_seconds(time_str):
+    t = datetime.strptime(time_str, '%Y-%m-%dT%H:%M:%SZ')
+    return (t - BASE_DATE).total_seconds()
+
+
+# Generate synthetic csv time series for a reach between two times
+# Returns None if the reach has no observations
+def reach_csv(rch_id, t0, t1, fields):
+
+    # Seed generator with reach id so each reach is reproducible
+    rng = np.random.default_rng(rch_id)
+
+    # Every tenth reach has no observations
+    if rng.random() < 0.1:
+        return None
+
+    # Draw observation times over the full mission period
+    n_obs = rng.integers(1, MAX_OBS + 1)
+    t_obs = np.sort(rng.uniform(to_seconds('2023-07-01T00:00:00Z'),
+                                to_seconds('2025-07-01T00:00:00Z'), n_obs))
+
+    # Generate observations
+    wse = 100 + 3 * rng.random() * np.sin(t_obs / 3e6)
+    obs = {'reach_id': np.repeat(rch_id, n_obs),
+           'time': t_obs.copy(),
+           'wse': wse,
+           'wse_u': rng.uniform(0.05, 0.2, n_obs),
+           'wse_r_u': rng.uniform(0.05, 0.2, n_obs),
+           'width': 50 + 20 * (wse - 100) + rng.normal(0, 5, n_obs),
+           'width_u': rng.uniform(5, 30, n_obs),
+           'reach_q': rng.integers(0, 4, n_obs),
+           'reach_q_b': rng.integers(0, 2**20, n_obs),
+           'dark_frac': rng.uniform(0, 0.5, n_obs),
+           'ice_clim_f': rng.integers(0, 2, n_obs),
+           'ice_dyn_f': rng.integers(0, 2, n_obs),
+           'xtrk_dist': rng.choice([-1, 1], n_obs) *
+           rng.uniform(5000, 65000, n_obs),
+           'obs_frac_n': rng.uniform(0.3, 1, n_obs),
+           'xovr_cal_q': rng.integers(0, 2, n_obs),
+           'p_length': np.repeat(rng.uniform(5000, 15000), n_obs),
+           'crid': np.repeat('PIC0', n_obs)}
+
+    # Replace a time with a fill value, as returned by Hydrocron for some passes
+    if rng.random() < 0.2:
+        obs['time'][0] = -999999999999
+
+    # Retain observations between requested times
+    ikeep = np.flatnonzero((t_obs >= t0) & (t_obs <= t1))
+    if len(ikeep) == 0:
+        return None
+    n_obs = len(ikeep)
+    obs = {k: v[ikeep] for k, v in obs.items()}
+
+    # Assemble csv with units columns following each variable
+    cols = []
+    for f in fields:
+        cols.append((f, obs[f]))
+        if f in UNIT_VARS:
+            cols.append((f + '_units', np.repeat(UNIT_VARS[f], n_obs)))
+
+    lines = [','.join(c[0] for c in cols)]
+    for i in range(n_obs):
+        lines.append(','.join(str(c[1][i]) for c in cols))
+
+    return '\n'.join(lines) + '\n'
+
+
+# Handle Hydrocron time series requests
+# Requests above max_rate per second are throttled, and a fraction p_fail of
+# requests fail with a server error, mimicking a busy service
+class HydrocronHandler(BaseHTTPRequestHandler):
+
+    latency = 0
+    max_rate = 0
+    p_fail = 0
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+
+        if self.max_rate and not self.server.take_token(self.max_rate):
+            self.reply(429, {'error': '429: Too many requests'},
+                       {'Retry-After': '1'})
+            return
+
+        time.sleep(self.latency)
+
+        if random.random() < self.p_fail:
+            self.reply(503, {'error': '503: Service unavailable'})
+            return
+
+        try:
+            rch_id = int(query['feature_id'][0])
+            t0 = to_seconds(query['start_time'][0])
+            t1 = to_seconds(query['end_time'][0])
+            fields = query['fields'][0].split(',')
+            csv_str = reach_csv(rch_id, t0, t1, fields)
+        except (KeyError, ValueError) as e:
+            self.reply(400, {'error': '400: Invalid request: ' + str(e)})
+            return
+
+        if csv_str is None:
+            self.reply(400, {'error': '400: Results with the specified '
+                             'Feature ID ' + str(rch_id) +
+                             ' were not found.'})
+        else:
+            self.reply(200, {'status': '200 OK',
+                             'hits': csv_str.count('\n') - 1,
+                             'results': {'csv': csv_str, 'geojson': {}}})
+
+    def reply(self, code, body, headers={}):
+        data = json.dumps(body).encode()
+        self.send_response(code)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        for k, v in headers.items():
+            self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+# Threaded server holding a token bucket shared by all request handlers
+class HydrocronServer(ThreadingHTTPServer):
+
+    tokens = 0
+    t_last = 0
+    lock = threading.Lock()
+
+    # Take a token if one is available, allowing bursts of up to one second
+    def take_token(self, rate):
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(rate, self.tokens + (now - self.t_last) * rate)
+            self.t_last = now
+            if self.tokens < 1:
+                return False
+            self.tokens -= 1
+            return True
+
+
+# Start stand-in server in a background thread, returning server and its url
+# A port of 0 selects any free port
+def start_server(port=0, latency=0, max_rate=0, p_fail=0):
+    handler = type('Handler', (HydrocronHandler,),
+                   {'latency': latency, 'max_rate': max_rate,
+                    'p_fail': p_fail})
+    server = HydrocronServer(('127.0.0.1', port), handler)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    url = 'http://127.0.0.1:' + str(server.server_address[1]) + \
+        '/hydrocron/v1/timeseries'
+    return server, url
+
+
+# ******************************************************************************
+# Run stand-in server
+# ******************************************************************************
+if __name__ == '__main__':
+
+    IS_arg = len(sys.argv)
+    if IS_arg < 2 or IS_arg > 5:
+        print('ERROR - 1 to 4 arguments must be used')
+        raise SystemExit(22)
+
+    port = int(sys.argv[1])
+    latency = float(sys.argv[2]) if IS_arg > 2 else 0
+    max_rate = float(sys.argv[3]) if IS_arg > 3 else 0
+    p_fail = float(sys.argv[4]) if IS_arg > 4 else 0
+
+    server, url = start_server(port, latency, max_rate, p_fail)
+    print('Serving Hydrocron stand-in at ' + url)
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
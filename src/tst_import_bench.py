@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+# ******************************************************************************
+# tst_import_bench.py
+# ******************************************************************************
+
+# Purpose:
+# Benchmark the startup cost of a worker fitting reaches, i.e. the time and
+# peak memory of importing swot_volume_fit in a fresh interpreter. Workers
+# importing matplotlib.pyplot as well (eager), as ReachObservations_jw did
+# before its plotting helpers were split into plots_jw, are compared with
+# workers that only import the fitting code (lazy).
+# Author:
+# Jeffrey Wade, 2025
+
+
+# ******************************************************************************
+# Import Python modules
+# ******************************************************************************
+import sys
+import os
+import subprocess
+import numpy as np
+
+
+# ******************************************************************************
+# Declaration of variables (given as command line arguments)
+# ******************************************************************************
+# 1 - n_rep (optional, number of interpreters started for each mode)
+
+
+# ******************************************************************************
+# Get command line arguments
+# ******************************************************************************
+IS_arg = len(sys.argv)
+if IS_arg > 2:
+    print('ERROR - 0 or 1 arguments must be used')
+    raise SystemExit(22)
+
+n_rep = int(sys.argv[1]) if IS_arg > 1 else 5
+
+
+# ******************************************************************************
+# Run benchmark
+# ******************************************************************************
+# Code run by each interpreter, printing import time (s) and peak RSS (kB)
+worker = '''
+import time, resource
+t0 = time.perf_counter()
+{}
+import swot_volume_fit
+import FLaPE_Byrd_main_jw.ReachObservations_jw
+print(time.perf_counter() - t0,
+      resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+      'matplotlib' in __import__('sys').modules)
+'''
+modes = {'eager': 'import matplotlib.pyplot', 'lazy': ''}
+
+src_dir = os.path.dirname(os.path.abspath(__file__))
+env = dict(os.environ, PYTHONPATH=src_dir)
+
+print('mode,import_s,peak_rss_mb,matplotlib_loaded')
+for mode, pre in modes.items():
+    res = []
+    for i in range(n_rep):
+        out = subprocess.run([sys.executable, '-c', worker.format(pre)],
+                             env=env, capture_output=True, text=True,
+                             check=True).stdout.split()
+        res.append((float(out[0]), float(out[1]), out[2]))
+    t = np.median([x[0] for x in res])
+    rss = np.median([x[1] for x in res]) / 1024
+    print(f'{mode},{t:.3f},{rss:.0f},{res[0][2]}')
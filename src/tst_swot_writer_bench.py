@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+# ******************************************************************************
+# tst_swot_writer_bench.py
+# ******************************************************************************
+
+# Purpose:
+# Benchmark peak memory and throughput of assembling a synthetic region of
+# downloaded SWOT reaches, either by growing one dataframe with pd.concat
+# after every reach (concat) or by streaming reaches to file (stream).
+# Author:
+# Jeffrey Wade, 2025
+
+
+# ******************************************************************************
+# Import Python modules
+# ******************************************************************************
+import sys
+import time
+import resource
+import pandas as pd
+from hydrocron_client import SWOT_VARS, parse_response
+from tst_hydrocron_server import reach_csv, to_seconds
+from swot_io import SwotWriter
+
+
+# ******************************************************************************
+# Declaration of variables (given as command line arguments)
+# ******************************************************************************
+# 1 - n_rch (number of synthetic reaches)
+# 2 - method ('concat' or 'stream')
+# 3 - swot_out (.csv or .parquet)
+
+
+# ******************************************************************************
+# Get command line arguments
+# ******************************************************************************
+IS_arg = len(sys.argv)
+if IS_arg != 4:
+    print('ERROR - 3 arguments must be used')
+    raise SystemExit(22)
+
+n_rch = int(sys.argv[1])
+method = sys.argv[2]
+swot_out = sys.argv[3]
+
+if method not in ['concat', 'stream']:
+    print('ERROR - method must be concat or stream')
+    raise SystemExit(22)
+
+
+# ******************************************************************************
+# Generate synthetic reach responses
+# ******************************************************************************
+# Parse a pool of synthetic responses once, and reuse it with new reach ids
+# so that timings reflect assembling the region rather than parsing
+t0 = to_seconds('2023-10-01T00:00:00Z')
+t1 = to_seconds('2024-09-30T23:59:59Z')
+pool = []
+for i in range(1000):
+    csv_str = reach_csv(11000000001 + 10 * i, t0, t1, SWOT_VARS.split(','))
+    if csv_str is not None:
+        df = parse_response({'status': '200 OK', 'results': {'csv': csv_str}})
+        if df is not None:
+            pool.append(df)
+
+
+# Yield synthetic reach dataframes
+def reaches():
+    for i in range(n_rch):
+        df = pool[i % len(pool)].copy()
+        df['reach_id'] = 11000000001 + 10 * i
+        yield df
+
+
+# ******************************************************************************
+# Run benchmark
+# ******************************************************************************
+rss0 = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+t_start = time.perf_counter()
+
+if method == 'concat':
+    swot_df = None
+    for df in reaches():
+        if swot_df is None:
+            swot_df = df.copy()
+        else:
+            swot_df = pd.concat([swot_df, df], ignore_index=True)
+    if swot_out.endswith('.parquet'):
+        swot_df.to_parquet(swot_out, index=False)
+    else:
+        swot_df.to_csv(swot_out, index=False)
+    n_rows = len(swot_df)
+else:
+    swot_wrt = SwotWriter(swot_out, SWOT_VARS.split(','))
+    for df in reaches():
+        swot_wrt.write(df)
+    swot_wrt.close()
+    n_rows = swot_wrt.n_rows
+
+dt = time.perf_counter() - t_start
+rss1 = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+print('method,reaches,rows,seconds,rows_per_s,peak_rss_mb,rss_growth_mb')
+print(f'{method},{n_rch},{n_rows},{dt:.1f},{n_rows / dt:.0f},'
+      f'{rss1 / 1024:.0f},{(rss1 - rss0) / 1024:.0f}')
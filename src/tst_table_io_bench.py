@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+# ******************************************************************************
+# tst_table_io_bench.py
+# ******************************************************************************
+
+# Purpose:
+# Benchmark the tables passed between stages of the workflow, written as csv
+# or Parquet files. Tables shaped as the outputs of each stage are generated
+# for a large synthetic region, and the write time, read time, read time of
+# the columns used by the next stage, file size and memory of the table read
+# are reported for each stage and format.
+# Author:
+# Jeffrey Wade, 2025
+
+
+# ******************************************************************************
+# Import Python modules
+# ******************************************************************************
+import sys
+import os
+import time
+import tempfile
+import numpy as np
+import pandas as pd
+from swot_io import read_swot, read_table, write_table, read_series, \
+    write_series
+from swot_filter import FILTER_COLS
+from swot_volume_fit import FIT_COLS, FIT_STATS
+
+
+# ******************************************************************************
+# Declaration of variables (given as command line arguments)
+# ******************************************************************************
+# 1 - n_rch (optional, number of reaches of the region)
+# 2 - n_rep (optional, number of times each file is written and read)
+
+
+# ******************************************************************************
+# Get command line arguments
+# ******************************************************************************
+IS_arg = len(sys.argv)
+if IS_arg > 3:
+    print('ERROR - 0 to 2 arguments must be used')
+    raise SystemExit(22)
+
+n_rch = int(sys.argv[1]) if IS_arg > 1 else 10000
+n_rep = int(sys.argv[2]) if IS_arg > 2 else 3
+
+
+# ******************************************************************************
+# Generate tables of each stage
+# ******************************************************************************
+rng = np.random.default_rng(0)
+
+# Reaches, observations per reach, days and months of the region
+n_obs = 40
+rch_ids = 11000000000 + 10 * np.arange(n_rch) + rng.choice([1, 5], n_rch)
+days = pd.date_range('2023-07-01', '2025-06-30', freq='D')
+mons = pd.date_range('2023-07-01', '2025-06-30', freq='MS')
+yrs = [str(x) for x in range(1980, 2010)]
+
+# Hydrocron download: SWOT observations, with the precision of Hydrocron
+n = n_rch * n_obs
+swot_df = pd.DataFrame({
+    'reach_id': np.repeat(rch_ids, n_obs),
+    'time': days[0] + pd.to_timedelta(rng.uniform(0, len(days) * 86400, n),
+                                      unit='s'),
+    'wse': np.round(rng.normal(100, 5, n), 6),
+    'wse_u': np.round(rng.uniform(0, 1, n), 6),
+    'wse_r_u': np.round(rng.uniform(0, 1, n), 6),
+    'width': np.round(rng.lognormal(5, 1, n), 6),
+    'width_u': np.round(rng.uniform(0, 50, n), 6),
+    'reach_q': rng.integers(0, 4, n),
+    'reach_q_b': rng.integers(0, 2 ** 22, n),
+    'dark_frac': np.round(rng.uniform(0, 1, n), 1),
+    'ice_clim_f': rng.integers(0, 2, n),
+    'ice_dyn_f': rng.integers(0, 2, n),
+    'xtrk_dist': np.round(rng.uniform(-7e4, 7e4, n), 1),
+    'obs_frac_n': np.round(rng.uniform(0, 1, n), 1),
+    'xovr_cal_q': rng.integers(0, 3, n),
+    'p_length': np.repeat(np.round(rng.uniform(1e3, 2e4, n_rch), 5), n_obs),
+    'crid': 'PIC0'})
+
+# V_EIV: volume anomalies of reaches on observed days, as a long table
+V_eiv = pd.DataFrame({
+    'reach_id': np.repeat(rch_ids, n_obs),
+    'date': np.concatenate([np.sort(rng.choice(days.values, n_obs,
+                                               replace=False))
+                            for i in range(n_rch)]),
+    'value': rng.normal(0, 1e6, n)})
+
+# EIV_fits: fit parameters and optimizer statistics of reaches
+fit_cols = ['reach_id'] + FIT_COLS + FIT_STATS
+fits_eiv = pd.DataFrame(rng.normal(100, 50, (n_rch, len(fit_cols))),
+                        columns=fit_cols)
+fits_eiv['reach_id'] = rch_ids
+fits_eiv['fit_method'] = rng.choice(['simple', 'constrained'], n_rch)
+fits_eiv['nobs'] = n_obs
+fits_eiv['warm'] = rng.integers(0, 2, n_rch).astype(bool)
+for col in ['outer_nfev', 'inner_nit', 'inner_nfev']:
+    fits_eiv[col] = rng.integers(0, 50, n_rch)
+
+# V_anom: monthly volume anomalies of reaches
+V_anom = pd.DataFrame(rng.normal(0, 1e-2, (n_rch, len(mons))),
+                      index=pd.Index(rch_ids, name='reach_id'),
+                      columns=mons.strftime('%Y-%m'))
+
+# MeanDRS_comp: SWOT and MeanDRS monthly volume anomalies of the region
+comp_df = pd.DataFrame(rng.normal(0, 1e9, (len(mons), 3)),
+                       index=pd.Index(mons.date, name='dates'),
+                       columns=['mV_hig_anom', 'mV_nrm_anom', 'mV_low_anom'])
+
+# MeanDRS_scale: MeanDRS monthly volume anomalies at SWOT reaches
+scale_df = pd.DataFrame(rng.normal(0, 1e9, (len(mons), 3)),
+                        index=pd.Index(mons.date, name='dates'),
+                        columns=['mV_low_anom_ms', 'mV_nrm_anom_ms',
+                                 'mV_hig_anom_ms'])
+
+# MeanDRS_slice: SWOT and yearly slices of MeanDRS volume anomalies
+slice_df = pd.DataFrame(rng.normal(0, 1e9, (12, 1 + 3 * len(yrs))),
+                        columns=['V_SWOT'] +
+                        ['mV_' + x + '_' + y for x in ['hig', 'nrm', 'low']
+                         for y in yrs])
+slice_df.insert(0, 'mon', range(1, 13))
+
+
+# Writers of tables including their index, and of series
+def write_index(df, path):
+    write_table(df, path, index=True)
+
+
+def write_V(df, path):
+    write_series(df, path, rch_ids, days.date)
+
+
+# Table, writer, reader, and columns read by the next stage (None if the
+# next stage reads every column)
+stages = {
+    'Hydrocron': (swot_df, write_table, read_swot,
+                  FILTER_COLS + ['time', 'p_length']),
+    'V_EIV': (V_eiv, write_V, read_series, None),
+    'EIV_fits': (fits_eiv, write_table, read_table,
+                 ['reach_id', 'h_break_1', 'h_break_2', 'm_1', 'm_2', 'm_3',
+                  'y0_1', 'y0_2', 'y0_3']),
+    'V_anom': (V_anom, write_index, read_table, list(V_anom.columns[:12])),
+    'MeanDRS_comp': (comp_df, write_index, read_table,
+                     ['dates', 'mV_nrm_anom']),
+    'MeanDRS_scale': (scale_df, write_index, read_table,
+                      ['dates', 'mV_nrm_anom_ms']),
+    'MeanDRS_slice': (slice_df, write_table, read_table, ['mon', 'V_SWOT']),
+}
+
+
+# ******************************************************************************
+# Run benchmark
+# ******************************************************************************
+# Median time (s) of n_rep calls of fun
+def timeit(fun):
+    t = []
+    for i in range(n_rep):
+        t0 = time.perf_counter()
+        fun()
+        t.append(time.perf_counter() - t0)
+    return np.median(t)
+
+
+print('stage,format,rows,write_s,read_s,read_cols_s,size_mb,mem_mb')
+with tempfile.TemporaryDirectory() as tmp_dir:
+    for stage, (df, writer, reader, cols) in stages.items():
+        for ext in ['.csv', '.parquet']:
+            path = os.path.join(tmp_dir, stage + ext)
+            t_w = timeit(lambda: writer(df, path))
+            t_r = timeit(lambda: reader(path))
+            t_c = timeit(lambda: reader(path, columns=cols)) \
+                if cols is not None else np.nan
+            size = os.path.getsize(path) / 1024 ** 2
+            mem = reader(path).memory_usage(deep=True).sum() / 1024 ** 2
+            print(f'{stage},{ext[1:]},{len(df)},{t_w:.3f},{t_r:.3f},'
+                  f'{t_c:.3f},{size:.3f},{mem:.3f}')
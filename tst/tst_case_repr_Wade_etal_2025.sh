@@ -96,6 +96,8 @@ echo "- Fitting EIV Regressions"
     ../input_testing/SWOT/swot_pfaf_${pfaf}_2023-10-01_2024-09-30_testing.csv  \
     ../output_test/V_EIV/swot_vol_pfaf_${pfaf}_2023-10-01_2024-09-30.csv       \
     ../output_test/EIV_fits/swot_vol_fits_${pfaf}_2023-10-01_2024-09-30.csv    \
+    1                                                                          \
+    reference                                                                  \
     > $run_file
 x=$? && if [ $x -gt 0 ] ; then echo "Failed run: $run_file" >&2 ; exit $x ; fi
 
@@ -36,138 +36,6 @@ echo "Please cite these two DOIs if using these files for your publications."
 echo "********************"
 
 
-#*****************************************************************************
-#Define file and region names
-#*****************************************************************************
-reg=(
-     "af"
-     "af"
-     "af"
-     "af"
-     "af"
-     "af"
-     "af"
-     "af"
-     "eu"
-     "eu"
-     "eu"
-     "eu"
-     "eu"
-     "eu"
-     "eu"
-     "eu"
-     "eu"
-     "as"
-     "as"
-     "as"
-     "as"
-     "as"
-     "as"
-     "as"
-     "as"
-     "as"
-     "as"
-     "as"
-     "as"
-     "as"
-     "as"
-     "as"
-     "oc"
-     "oc"
-     "oc"
-     "oc"
-     "oc"
-     "oc"
-     "oc"
-     "sa"
-     "sa"
-     "sa"
-     "sa"
-     "sa"
-     "sa"
-     "sa"
-     "na"
-     "na"
-     "na"
-     "na"
-     "na"
-     "na"
-     "na"
-     "na"
-     "na"
-     "na"
-     "na"
-     "na"
-     "na"
-     "na"
-     "na"
-     )
-       
-pfaf=(
-      11
-      12
-      13
-      14
-      15
-      16
-      17
-      18
-      21
-      22
-      23
-      24
-      25
-      26
-      27
-      28
-      29
-      31
-      32
-      33
-      34
-      35
-      36
-      41
-      42
-      43
-      44
-      45
-      46
-      47
-      48
-      49
-      51
-      52
-      53
-      54
-      55
-      56
-      57
-      61
-      62
-      63
-      64
-      65
-      66
-      67
-      71
-      72
-      73
-      74
-      75
-      76
-      77
-      78
-      81
-      82
-      83
-      84
-      85
-      86
-      91
-      )
-
-
 #*****************************************************************************
 #Download SWOT-River-Width Zenodo Repository
 #*****************************************************************************
@@ -214,20 +82,14 @@ echo "********************"
 #*****************************************************************************
 mkdir -p "../input/SWOT/global_obs"
 
-echo "- Selecting SWORD nodes in target area"
-for ((i = 0; i < ${#reg[@]}; i++)); do
-
-    echo $i
-
-    ../src/swot_dwnl_hydrocron.py                                              \
-        ../input/SWORD/SWORD_reaches_v16/${reg[i]}_sword_reaches_hb${pfaf[i]}_v16.shp\
-        "2023-10-01"                                                           \
-        "2024-09-30"                                                           \
-        ../input/SWOT/swot_pfaf_${pfaf[i]}_2023-10-01_2024-09-30.csv           \
-        > $run_file
-    x=$? && if [ $x -gt 0 ] ; then echo "Failed run: $run_file" >&2 ; exit $x ; fi
-
-done
+echo "- Downloading SWOT observations of all regions"
+../src/swot_dwnl_hydrocron_all.py                                              \
+    ../input/SWORD/SWORD_reaches_v16/                                          \
+    "2023-10-01"                                                               \
+    "2024-09-30"                                                               \
+    ../input/SWOT/                                                             \
+    > $run_file
+x=$? && if [ $x -gt 0 ] ; then echo "Failed run: $run_file" >&2 ; exit $x ; fi
 
 echo "Success"
 echo "********************"